@@ -1,12 +1,16 @@
+import os
 import numpy as np
 import pandas as pd
 import warnings
 from flask import Flask, request
-from AFLPy.AFLData_Client import load_data, upload_data
+from afl_match_outcome_model.data_preparation.data_cache import load_data, upload_data
 from AFLPy.AFLBetting import submit_tips
 from AFLPy.ntfy import push_notification
-from afl_match_outcome_model.predict.predict_outcome import load_outcome_model, load_outcome_preprocessor
-from afl_match_outcome_model.predict.predict_margin import load_margin_model, load_margin_preprocessor
+from afl_match_outcome_model.predict.predict_outcome import get_outcome_model_file_path, get_outcome_preprocessor_file_path
+from afl_match_outcome_model.predict.predict_margin import get_margin_model_file_path, get_margin_preprocessor_file_path
+from afl_match_outcome_model.predict.model_registry import ModelRegistry
+from afl_match_outcome_model.predict.artifact_store import artifact_store
+from afl_match_outcome_model.data_preparation.pipeline_profiler import PipelineProfiler
 from afl_match_outcome_model.data_preparation.update_preprocessor import update_fit_margin_new_expected_data, update_fit_margin_new_squads
 from afl_match_outcome_model.data_preparation.update_preprocessor import update_fit_outcome_new_expected_data, update_fit_outcome_new_squads
 from afl_match_outcome_model.data_preparation.update_preprocessor import check_latest_expected_score_preprocesor_matches, check_latest_expected_vaep_preprocesor_matches, check_latest_squad_preprocesor_matches
@@ -15,23 +19,51 @@ from afl_match_outcome_model.data_preparation.match_id_utils import get_home_tea
 warnings.filterwarnings("ignore")
 
 app = Flask(__name__)
+app.logger.setLevel("INFO")
+
+# Models and preprocessors stay resident and are reloaded when an update saves a new version to the artifact store
+registry = ModelRegistry()
+registry.register("outcome_model", get_outcome_model_file_path)
+registry.register("outcome_preprocessor", get_outcome_preprocessor_file_path)
+registry.register("margin_model", get_margin_model_file_path)
+registry.register("margin_preprocessor", get_margin_preprocessor_file_path)
+registry.load_all()
+
+# Each preprocess request logs a JSON line of per step timings and memory, set AFL_PROFILE_DIR to also dump cProfile stats of the slowest step
+profile_dir = os.environ.get("AFL_PROFILE_DIR")
+preprocess_reports = {}
+
+@app.route("/model/registry/stats", methods=["GET"])
+def get_registry_stats():
+    
+    return registry.get_stats()
+
+@app.route("/model/artifacts/stats", methods=["GET"])
+def get_artifact_stats():
+    
+    return artifact_store.get_stats()
+
+@app.route("/model/preprocess/profile", methods=["GET"])
+def get_preprocess_profile():
+    
+    return preprocess_reports
 
 @app.route("/model/outcome/check_expected_score", methods=["GET", "POST"])
 def check_outcome_expected_score_data():
     
-    preproc = load_outcome_preprocessor()
+    preproc = registry.get("outcome_preprocessor")
     return check_latest_expected_score_preprocesor_matches(preproc)
 
 @app.route("/model/outcome/check_expected_vaep", methods=["GET", "POST"])
 def check_outcome_expected_vaep_data():
 
-    preproc = load_margin_preprocessor()
+    preproc = registry.get("margin_preprocessor")
     return check_latest_expected_vaep_preprocesor_matches(preproc)
 
 @app.route("/model/outcome/check_squad", methods=["GET", "POST"])
 def check_outcome_squad_data():
     
-    preproc = load_margin_preprocessor()
+    preproc = registry.get("margin_preprocessor")
     return check_latest_squad_preprocesor_matches(preproc)
 
 @app.route("/model/outcome/update_expected_data", methods=["GET", "POST"])
@@ -58,8 +90,9 @@ def preprocess_outcome(ID = None):
     
     match_summary = load_data(Dataset_Name="AFL_API_Matches", ID = request.json['ID']).sort_values(by = "Match_ID", ascending = True).reset_index(drop = True)
 
-    preproc = load_outcome_preprocessor()
-    preprocessed_data = preproc.transform(match_summary)
+    profiler = PipelineProfiler(registry.get("outcome_preprocessor"), name = "outcome_preprocessor", profile_dir = profile_dir, logger = app.logger)
+    preprocessed_data = profiler.transform(match_summary)
+    preprocess_reports["outcome_preprocessor"] = profiler.last_report
     preprocessed_data['Match_ID'] = match_summary['Match_ID']
     preprocessed_data = preprocessed_data[['Match_ID'] + [x for x in list(preprocessed_data) if x != 'Match_ID']]
     
@@ -74,7 +107,7 @@ def predict_outcome(ID = None):
     
     data = load_data(Dataset_Name="CG_Outcome_Features", ID = request.json['ID']).sort_values(by = "Match_ID", ascending = True).reset_index(drop = True)
     
-    model = load_outcome_model()
+    model = registry.get("outcome_model")
     model_features = model.xgb_model.get_booster().feature_names
     data[model_features] = data[model_features].apply(pd.to_numeric, axis=1)
 
@@ -89,19 +122,19 @@ def predict_outcome(ID = None):
 @app.route("/model/margin/check_expected_score", methods=["GET", "POST"])
 def check_expected_score_data():
     
-    preproc = load_margin_preprocessor()
+    preproc = registry.get("margin_preprocessor")
     return check_latest_expected_score_preprocesor_matches(preproc)
 
 @app.route("/model/margin/check_expected_vaep", methods=["GET", "POST"])
 def check_expected_vaep_data():
 
-    preproc = load_margin_preprocessor()
+    preproc = registry.get("margin_preprocessor")
     return check_latest_expected_vaep_preprocesor_matches(preproc)
 
 @app.route("/model/margin/check_squad", methods=["GET", "POST"])
 def check_squad_data():
     
-    preproc = load_margin_preprocessor()
+    preproc = registry.get("margin_preprocessor")
     return check_latest_squad_preprocesor_matches(preproc)
 
 @app.route("/model/margin/update_expected_data", methods=["GET", "POST"])
@@ -128,8 +161,9 @@ def preprocess_margin(ID = None):
     
     match_summary = load_data(Dataset_Name="AFL_API_Matches", ID = request.json['ID']).sort_values(by = "Match_ID", ascending = True).reset_index(drop = True)
 
-    preproc = load_margin_preprocessor()
-    preprocessed_data = preproc.transform(match_summary)
+    profiler = PipelineProfiler(registry.get("margin_preprocessor"), name = "margin_preprocessor", profile_dir = profile_dir, logger = app.logger)
+    preprocessed_data = profiler.transform(match_summary)
+    preprocess_reports["margin_preprocessor"] = profiler.last_report
     preprocessed_data['Match_ID'] = match_summary['Match_ID']
     preprocessed_data = preprocessed_data[['Match_ID'] + [x for x in list(preprocessed_data) if x != 'Match_ID']]
     
@@ -144,7 +178,7 @@ def predict_margin(ID = None):
     
     data = load_data(Dataset_Name="CG_Margin_Features", ID = request.json['ID']).sort_values(by = "Match_ID", ascending = True).reset_index(drop = True)
     
-    model = load_margin_model()
+    model = registry.get("margin_model")
     model_features = model.xgb_model.get_booster().feature_names
     data[model_features] = data[model_features].apply(pd.to_numeric, axis=1)
 
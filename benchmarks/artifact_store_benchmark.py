@@ -0,0 +1,35 @@
+import tempfile
+import warnings
+from afl_match_outcome_model.data_preparation.pipeline_utils import ema5, team_performance_cols
+from afl_match_outcome_model.data_preparation.transformers import PastPerformanceTransformer
+from afl_match_outcome_model.predict.artifact_store import ArtifactStore
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+window_summarizer_kwargs = {"lag_feature": {"lag": [1, 2, 3], "mean": [[1, 5], [1, 10]], "std": [[1, 10]], ema5: [[1, 5]]}}
+
+# (compress, mmap_mode) pairs, memory mapping only applies to uncompressed files
+storage_formats = [(0, None), (0, "r"), (1, None), (3, None), (("lz4", 3), None), (9, None)]
+
+def run_benchmark(sizes=(2_000, 20_000)):
+    
+    print(f"{'history':>8} {'compress':>10} {'mmap':>5} {'size':>9} {'save':>8} {'load':>8}")
+    for size in sizes:
+        transformer = PastPerformanceTransformer(team_performance_cols, window_summarizer_kwargs).fit(create_synthetic_matches(size))
+        with tempfile.TemporaryDirectory() as root_dir:
+            store = ArtifactStore(root_dir, keep_versions=1)
+            for compress, mmap_mode in storage_formats:
+                name = f"past_performance_{str(compress).replace(' ', '')}_{mmap_mode}"
+                try:
+                    store.save(name, transformer, compress=compress)
+                except ValueError as e:
+                    # e.g. lz4 compression without the lz4 package
+                    print(f"{size:>8} {str(compress):>10} skipped, {e}")
+                    continue
+                store.load(name, mmap_mode=mmap_mode)
+                save_stats, load_stats = store.get_stats()[name]['save'], store.get_stats()[name]['load']
+                print(f"{size:>8} {str(compress):>10} {str(mmap_mode):>5} {save_stats['file_bytes'] / 1024 ** 2:>7.2f}MB {save_stats['save_seconds']:>7.3f}s {load_stats['load_seconds']:>7.3f}s")
+
+if __name__ == "__main__":
+    run_benchmark()
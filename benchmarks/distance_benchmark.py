@@ -0,0 +1,69 @@
+import time
+import numpy as np
+import pandas as pd
+import geopy.distance
+from afl_match_outcome_model.data_preparation.distance import calculate_geodesic_distance, create_venue_distance_matrix, lookup_venue_distances
+
+venue_info = pd.DataFrame([
+    ('M.C.G.', -37.8200, 144.9834),
+    ('Docklands', -37.8165, 144.9475),
+    ('S.C.G.', -33.8917, 151.2247),
+    ('Sydney Showground', -33.8434, 151.0674),
+    ('Gabba', -27.4858, 153.0381),
+    ('Carrara', -28.0063, 153.3667),
+    ('Adelaide Oval', -34.9156, 138.5961),
+    ('Perth Stadium', -31.9512, 115.8891),
+    ('Kardinia Park', -38.1581, 144.3545),
+    ('Manuka Oval', -35.3180, 149.1346),
+    ('York Park', -41.4256, 147.1392),
+    ('Marrara Oval', -12.3990, 130.8872),
+    ('Jiangwan Stadium', 31.3058, 121.5137),
+    ('Wellington', -41.2731, 174.7855),
+], columns=['Venue', 'Latitude', 'Longitude'])
+
+def check_accuracy(n_points=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.column_stack([rng.uniform(-89, 89, n_points), rng.uniform(-180, 180, n_points), rng.uniform(-89, 89, n_points), rng.uniform(-180, 180, n_points)])
+    points[:10, 2:] = points[:10, :2]
+    
+    distances = calculate_geodesic_distance(points[:, 0], points[:, 1], points[:, 2], points[:, 3])
+    geopy_distances = np.array([geopy.distance.geodesic(p[:2], p[2:]).km for p in points])
+    
+    return np.abs(distances - geopy_distances).max() * 1000
+
+def run_benchmark(n_matches=20000, seed=0):
+    
+    rng = np.random.default_rng(seed)
+    venues = venue_info['Venue'].to_numpy()
+    matches = pd.DataFrame({'Venue': rng.choice(venues, n_matches), 'Home_Team_Venue': rng.choice(venues, n_matches)})
+    coordinates = venue_info.set_index('Venue')
+    for prefix, col in [('Venue', 'Venue'), ('Home_Team_Venue', 'Home_Team_Venue')]:
+        matches[f'{prefix}_Latitude'] = coordinates.loc[matches[col], 'Latitude'].to_numpy()
+        matches[f'{prefix}_Longitude'] = coordinates.loc[matches[col], 'Longitude'].to_numpy()
+    
+    start = time.perf_counter()
+    geopy_distances = matches.apply(lambda x: geopy.distance.geodesic((x['Venue_Latitude'], x['Venue_Longitude']), (x['Home_Team_Venue_Latitude'], x['Home_Team_Venue_Longitude'])).km, axis=1).to_numpy()
+    geopy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    vectorized_distances = calculate_geodesic_distance(matches['Venue_Latitude'], matches['Venue_Longitude'], matches['Home_Team_Venue_Latitude'], matches['Home_Team_Venue_Longitude'])
+    vectorized_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    venue_distance_matrix = create_venue_distance_matrix(venue_info)
+    matrix_time = time.perf_counter() - start
+    start = time.perf_counter()
+    lookup_distances = lookup_venue_distances(venue_distance_matrix, matches['Venue'], matches['Home_Team_Venue'])
+    lookup_time = time.perf_counter() - start
+    
+    print(f"{n_matches} matches over {len(venue_info)} venues")
+    print(f"{'geopy apply':>22} {geopy_time:>9.4f}s")
+    print(f"{'vectorized vincenty':>22} {vectorized_time:>9.4f}s  max error {np.abs(vectorized_distances - geopy_distances).max() * 1000:.2e} m")
+    print(f"{'venue matrix build':>22} {matrix_time:>9.4f}s")
+    print(f"{'venue matrix lookup':>22} {lookup_time:>9.4f}s  max error {np.abs(lookup_distances - geopy_distances).max() * 1000:.2e} m")
+    
+    max_error = check_accuracy()
+    print(f"max error against geopy over random global points {max_error:.2e} m")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,53 @@
+import time
+import warnings
+import afl_match_outcome_model.data_preparation.elo as elo
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+def legacy_fit(data, k_factor=32):
+    """Row by row iterrows ELO fit that ELOTransformer used before the array backed engine, for comparison."""
+    
+    transformer = ELOTransformer(k_factor=k_factor)
+    transformer.elo_dict = {team: 1500 for team in data['Home_Team'].unique()}
+    transformer.team_season_first_matches = transformer.find_season_first_matches_by_year(data)
+    for _, row in data.iterrows():
+        home_team, away_team, year, round_num = row['Home_Team'], row['Away_Team'], row['Year'], row['Round']
+        home_team_elo, away_team_elo = transformer.elo_dict[home_team], transformer.elo_dict[away_team]
+        if transformer.team_season_first_matches[home_team][year] == round_num:
+            home_team_elo = 0.5*1500 + home_team_elo*0.5
+        if transformer.team_season_first_matches[away_team][year] == round_num:
+            away_team_elo = 0.5*1500 + away_team_elo*0.5
+        transformer.elo_dict[home_team], transformer.elo_dict[away_team] = elo.calculate_elo(home_team_elo, away_team_elo, row['Margin'], k_factor)
+    
+    return transformer
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def format_time(seconds):
+    return f"{seconds:>9.3f}s" if seconds == seconds else f"{'-':>10}"
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000), legacy_max_size=10_000):
+    
+    numba_kernel = elo._elo_kernel_numba
+    if numba_kernel is not None:
+        ELOTransformer().fit(create_synthetic_matches(100))  # compile the kernel outside of the timings
+    
+    print(f"{'matches':>10} {'legacy':>10} {'python':>10} {'numba':>10}")
+    for size in sizes:
+        matches = create_synthetic_matches(size)
+        legacy_time = time_call(legacy_fit, matches) if size <= legacy_max_size else float('nan')
+        
+        elo._elo_kernel_numba = None
+        python_time = time_call(ELOTransformer().fit, matches)
+        elo._elo_kernel_numba = numba_kernel
+        numba_time = time_call(ELOTransformer().fit, matches) if numba_kernel is not None else float('nan')
+        
+        print(f"{size:>10} {format_time(legacy_time)} {format_time(python_time)} {format_time(numba_time)}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,55 @@
+import time
+import warnings
+import pandas as pd
+from afl_match_outcome_model.data_preparation.elo import calculate_elo_probability
+from afl_match_outcome_model.data_preparation.match_id_utils import get_home_team_from_match_id, get_away_team_from_match_id
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+def legacy_transform(transformer, elos, elo_probs, X):
+    """Row by row transform that ELOTransformer used before the batched lookup, for comparison."""
+    
+    X_elos, X_elo_probs = {}, {}
+    for _, row in X.iterrows():
+        match_id = row['Match_ID']
+        if match_id in list(elos.keys()):
+            X_elos[match_id] = elos[match_id]
+            X_elo_probs[match_id] = elo_probs[match_id]
+        else:
+            home_team, away_team = get_home_team_from_match_id(match_id), get_away_team_from_match_id(match_id)
+            X_elos[match_id] = [transformer.elo_dict[home_team], transformer.elo_dict[away_team]]
+            home_elo_probs = calculate_elo_probability(transformer.elo_dict[home_team], transformer.elo_dict[away_team])
+            X_elo_probs[match_id] = [home_elo_probs, 1-home_elo_probs]
+    
+    elo_df = pd.DataFrame.from_dict(X_elos, orient='index', columns=['Home_ELO', 'Away_ELO']).rename_axis('Match_ID').reset_index()
+    elo_probs_df = pd.DataFrame.from_dict(X_elo_probs, orient='index', columns=['Home_ELO_probs', 'Away_ELO_probs']).rename_axis('Match_ID').reset_index()
+    X = pd.merge(X, elo_df, how='left', on='Match_ID')
+    return pd.merge(X, elo_probs_df, how='left', on='Match_ID')
+
+def time_call(func, *args, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run_benchmark(sizes=(200, 2_000, 20_000), n_fixtures=9):
+    
+    matches = create_synthetic_matches(max(sizes) + n_fixtures)
+    history, fixtures = matches.iloc[:-n_fixtures], matches.iloc[-n_fixtures:]
+    transformer = ELOTransformer().fit(history)
+    elos = {match_id: row[:2] for match_id, row in zip(transformer.elo_table.index, transformer.elo_table.values.tolist())}
+    elo_probs = {match_id: row[2:] for match_id, row in zip(transformer.elo_table.index, transformer.elo_table.values.tolist())}
+    
+    print(f"{'rows':>10} {'legacy':>10} {'batched':>10} {'speedup':>10}")
+    for size in sizes:
+        X = pd.concat([history.iloc[-(size - n_fixtures):], fixtures], axis=0)
+        legacy_time = time_call(legacy_transform, transformer, elos, elo_probs, X, repeats=1)
+        batched_time = time_call(transformer.transform, X)
+        print(f"{size:>10} {legacy_time:>9.4f}s {batched_time:>9.4f}s {legacy_time / batched_time:>9.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
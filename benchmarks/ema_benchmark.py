@@ -0,0 +1,58 @@
+import time
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.pipeline_utils import ema3, ema5, ema20, summarize_ema_windows
+from afl_match_outcome_model.data_preparation.rolling import convert_home_away_to_team_long
+from synthetic_data import create_synthetic_matches
+
+def make_legacy_ema(span):
+    """Convolution based emaN that pipeline_utils used before the cached weight kernels, for comparison."""
+    
+    def ema(x):
+        alpha = 2 / (span + 1)
+        weights = (1 - alpha) ** (np.arange(len(x)) + 1)
+        weights /= weights.sum()
+        ema = np.convolve(x, weights, mode='full')[:len(x)]
+        return ema[-1]
+    
+    return ema
+
+ema_configs = [(3, [1, 5]), (5, [1, 5]), (20, [1, 20])]
+
+def summarize_with_rolling_apply(team_history, team_cols, ema_functions):
+    for _, team_values in team_history.groupby('Team')[team_cols]:
+        for col in team_cols:
+            for ema, (span, (lag, window_length)) in zip(ema_functions, ema_configs):
+                team_values[col].rolling(window=window_length, min_periods=window_length).apply(ema, raw=True).shift(lag)
+
+def summarize_with_windows(team_history, team_cols):
+    for _, team_values in team_history.groupby('Team')[team_cols]:
+        for col in team_cols:
+            values = team_values[col].to_numpy()
+            for span, window in ema_configs:
+                summarize_ema_windows(values, span, window)
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run_benchmark(seasons=4):
+    
+    matches = create_synthetic_matches(seasons * 216)
+    features = ['Score', 'Goals', 'Behinds', 'xScore_sum']
+    team_history = convert_home_away_to_team_long(matches, features)
+    team_cols = [col for col in team_history if col.startswith('Team_')]
+    
+    legacy_functions = [make_legacy_ema(span) for span, _ in ema_configs]
+    legacy_time = time_call(summarize_with_rolling_apply, team_history, team_cols, legacy_functions)
+    cached_time = time_call(summarize_with_rolling_apply, team_history, team_cols, [ema3, ema5, ema20])
+    windowed_time = time_call(summarize_with_windows, team_history, team_cols)
+    
+    print(f"{len(team_history)} team matches, {len(team_cols)} columns, ema3/ema5 over [1, 5] and ema20 over [1, 20]")
+    print(f"{'convolve per window':>26} {legacy_time:>9.4f}s")
+    print(f"{'cached weights per window':>26} {cached_time:>9.4f}s")
+    print(f"{'single strided pass':>26} {windowed_time:>9.4f}s")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,45 @@
+import time
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.match_id_utils import get_home_team_from_match_id, get_away_team_from_match_id, get_season_from_match_id, parse_match_ids
+import afl_match_outcome_model.data_preparation.match_id_utils as match_id_utils
+from synthetic_data import create_synthetic_matches
+
+def create_chain_match_ids(n_chains=1000000, n_matches=2000, seed=0):
+    
+    rng = np.random.default_rng(seed)
+    match_ids = create_synthetic_matches(n_matches)['Match_ID'].to_numpy()
+    
+    return pd.Series(np.sort(rng.choice(match_ids, n_chains)), name='Match_ID')
+
+def parse_with_apply(match_ids):
+    return pd.DataFrame({
+        'Year': match_ids.apply(get_season_from_match_id),
+        'Round': match_ids.apply(lambda x: x.split("_")[2]),
+        'Home_Team': match_ids.apply(get_home_team_from_match_id),
+        'Away_Team': match_ids.apply(get_away_team_from_match_id),
+    })
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def run_benchmark(n_chains=1000000):
+    
+    match_ids = create_chain_match_ids(n_chains)
+    
+    apply_time, applied = time_call(parse_with_apply, match_ids)
+    match_id_utils.match_id_table = match_id_utils.match_id_table.iloc[:0]
+    cold_time, parsed = time_call(parse_match_ids, match_ids)
+    warm_time, _ = time_call(parse_match_ids, match_ids)
+    
+    assert applied.equals(parsed[['Year', 'Round', 'Home_Team', 'Away_Team']].astype({'Round': object, 'Home_Team': object, 'Away_Team': object}))
+    
+    print(f"{n_chains} chain rows over {match_ids.nunique()} Match_IDs")
+    print(f"{'per row apply':>22} {apply_time:>9.4f}s")
+    print(f"{'parse_match_ids cold':>22} {cold_time:>9.4f}s")
+    print(f"{'parse_match_ids warm':>22} {warm_time:>9.4f}s")
+
+if __name__ == "__main__":
+    run_benchmark()
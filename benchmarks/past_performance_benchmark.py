@@ -0,0 +1,46 @@
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.pipeline_utils import ema5, team_performance_cols
+from afl_match_outcome_model.data_preparation.transformers import PastPerformanceTransformer
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+window_summarizer_kwargs = {"lag_feature": {"lag": [1, 2, 3], "mean": [[1, 5], [1, 10]], "std": [[1, 10]], ema5: [[1, 5]]}}
+
+def full_history_transform(transformer, X):
+    """Transform reaching back through the whole fitted history, as before the cached window state."""
+    
+    window_state = transformer.window_summarizer.window_state
+    transformer.window_summarizer.window_state = {**window_state, 'tails': transformer.window_summarizer.fitted_data}
+    try:
+        return transformer.transform(X)
+    finally:
+        transformer.window_summarizer.window_state = window_state
+
+def time_call(func, *args, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+def run_benchmark(sizes=(2_000, 20_000, 100_000), n_fixtures=9):
+    
+    print(f"{'history':>10} {'full':>10} {'cached':>10} {'speedup':>10}")
+    for size in sizes:
+        matches = create_synthetic_matches(size + n_fixtures)
+        history, fixtures = matches.iloc[:-n_fixtures], matches.iloc[-n_fixtures:].copy()
+        fixtures[[col for col in fixtures if 'Score' in col or 'Goals' in col or 'Behinds' in col]] = np.nan
+        transformer = PastPerformanceTransformer(team_performance_cols, window_summarizer_kwargs).fit(history)
+        
+        full, full_time = time_call(full_history_transform, transformer, fixtures)
+        cached, cached_time = time_call(transformer.transform, fixtures)
+        pd.testing.assert_frame_equal(cached, full)
+        print(f"{size:>10} {full_time:>9.4f}s {cached_time:>9.4f}s {full_time / cached_time:>9.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,64 @@
+import os
+import time
+import warnings
+import pandas as pd
+from afl_match_outcome_model.data_preparation.pipeline_runner import ParallelPipeline
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer, PastPerformanceTransformer
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+def create_steps():
+    window_summarizer_kwargs = {"lag_feature": {"lag": [1, 2, 3], "mean": [[1, 5], [1, 10]], "std": [[1, 10]]}}
+    return [
+        ('elo', ELOTransformer(), []),
+        ('xelo', ELOTransformer(expected=True), []),
+        ('score_for', PastPerformanceTransformer(['Team_Score', 'Team_Goals', 'Team_Behinds'], window_summarizer_kwargs, for_against="For"), []),
+        ('score_against', PastPerformanceTransformer(['Opponent_Score', 'Opponent_Goals', 'Opponent_Behinds'], window_summarizer_kwargs, for_against="Against"), []),
+        ('xscore_for', PastPerformanceTransformer(['Team_xScore_sum', 'Team_exp_vaep_value_sum'], window_summarizer_kwargs, for_against="For"), []),
+        ('xscore_against', PastPerformanceTransformer(['Opponent_xScore_sum', 'Opponent_exp_vaep_value_sum'], window_summarizer_kwargs, for_against="Against"), []),
+    ]
+
+def run_sequential(transformers, X, fit):
+    """Runs the steps one after another, as a Pipeline does."""
+    
+    for transformer in transformers:
+        X = transformer.fit_transform(X) if fit else transformer.transform(X)
+    return X
+
+def time_call(func, *args, repeats=3):
+    """Best of repeats, so neither runner is charged for the first call's imports and worker start up."""
+    
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds.append(time.perf_counter() - start)
+    return result, min(seconds)
+
+def run_benchmark(n_matches=20_000, n_jobs=-1):
+    
+    matches = create_synthetic_matches(n_matches)
+    sequential = [transformer for _, transformer, _ in create_steps()]
+    parallel = ParallelPipeline(create_steps(), n_jobs=n_jobs)
+    
+    sequential_fit, sequential_fit_time = time_call(run_sequential, sequential, matches, True)
+    parallel_fit, parallel_fit_time = time_call(parallel.fit_transform, matches)
+    pd.testing.assert_frame_equal(parallel_fit, sequential_fit[parallel_fit.columns], check_like=True)
+    fit_timings = parallel.step_timings
+    
+    sequential_transform, sequential_transform_time = time_call(run_sequential, sequential, matches, False)
+    parallel_transform, parallel_transform_time = time_call(parallel.transform, matches)
+    pd.testing.assert_frame_equal(parallel_transform, sequential_transform[parallel_transform.columns], check_like=True)
+    
+    print(f"{n_matches} matches, {os.cpu_count()} cores, parallel from {parallel.parallel_min_rows} rows")
+    print(f"{'':>10} {'sequential':>11} {'parallel':>10} {'speedup':>10}")
+    print(f"{'fit':>10} {sequential_fit_time:>10.3f}s {parallel_fit_time:>9.3f}s {sequential_fit_time / parallel_fit_time:>9.1f}x")
+    print(f"{'transform':>10} {sequential_transform_time:>10.3f}s {parallel_transform_time:>9.3f}s {sequential_transform_time / parallel_transform_time:>9.1f}x")
+    print("parallel fit step timings:")
+    for name, seconds in fit_timings.items():
+        print(f"{name:>16} {seconds:>9.3f}s")
+
+if __name__ == "__main__":
+    for n_matches in [2_000, 20_000]:
+        run_benchmark(n_matches)
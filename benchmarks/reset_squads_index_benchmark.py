@@ -0,0 +1,52 @@
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.transformers import SquadPerformanceTransformer
+from synthetic_data import create_synthetic_matches
+
+warnings.filterwarnings("ignore")
+
+def legacy_reset_squads_index(expected_squads):
+    """Per player concat that reset_squads_index used before the grouped cumcount, for comparison."""
+    
+    return pd.concat([expected_squads[expected_squads['Player'] == player].reset_index(drop=True).reset_index(drop = False).set_index(['Player', 'index']).sort_index() for player in list(expected_squads['Player'].unique())], axis=0)
+
+def create_player_history(n_matches, squad_size=22, list_size=44, seed=0):
+    """Creates a player match table of squad_size players per team per match, drawn from each team's list."""
+    
+    rng = np.random.default_rng(seed)
+    matches = create_synthetic_matches(n_matches, seed=seed)
+    teams = np.concatenate([matches['Home_Team'].to_numpy(), matches['Away_Team'].to_numpy()])
+    match_ids = np.concatenate([matches['Match_ID'].to_numpy(), matches['Match_ID'].to_numpy()])
+    player_numbers = np.argsort(rng.random((len(teams), list_size)), axis=1)[:, :squad_size]
+    
+    return pd.DataFrame({
+        'Match_ID': np.repeat(match_ids, squad_size),
+        'Team': np.repeat(teams, squad_size),
+        'Player': [f"{team}_{number}" for team, number in zip(np.repeat(teams, squad_size), player_numbers.ravel())],
+        'xScore': rng.gamma(1, 1, len(teams) * squad_size),
+        'exp_vaep_value': rng.normal(0, 1, len(teams) * squad_size),
+    }).sort_values(by='Match_ID', kind='stable').reset_index(drop=True)
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak_bytes
+
+def run_benchmark(sizes=(216, 1_000, 5_000)):
+    
+    print(f"{'matches':>8} {'rows':>8} {'players':>8} {'legacy':>9} {'cumcount':>9} {'speedup':>8} {'legacy peak':>12} {'peak':>9}")
+    for size in sizes:
+        player_history = create_player_history(size)
+        _, legacy_time, legacy_peak = measure(legacy_reset_squads_index, player_history)
+        _, vectorized_time, vectorized_peak = measure(SquadPerformanceTransformer.reset_squads_index, player_history)
+        print(f"{size:>8} {len(player_history):>8} {player_history['Player'].nunique():>8} {legacy_time:>8.3f}s {vectorized_time:>8.4f}s {legacy_time / vectorized_time:>7.0f}x {legacy_peak / 1024 ** 2:>10.1f}MB {vectorized_peak / 1024 ** 2:>7.1f}MB")
+
+if __name__ == "__main__":
+    run_benchmark()
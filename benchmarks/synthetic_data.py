@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+teams = [
+    'Adelaide', 'Brisbane', 'Carlton', 'Collingwood', 'Essendon', 'Fremantle',
+    'Geelong', 'Gold Coast', 'Greater Western Sydney', 'Hawthorn', 'Melbourne', 'North Melbourne',
+    'Port Adelaide', 'Richmond', 'St Kilda', 'Sydney', 'West Coast', 'Western Bulldogs'
+]
+
+def create_synthetic_matches(n_matches, seed=0, rounds_per_season=23, first_year=2021):
+    """Creates a synthetic AFL match table in Match_ID order, with the Year and Round columns YearRoundTransformer adds.
+
+    Each season is rounds_per_season home and away rounds of nine matches followed by four finals rounds.
+    Seasons keep counting up past the present day so that any number of matches can be generated.
+
+    Args:
+        n_matches (int): Number of matches to create.
+        seed (int, optional): Random seed. Defaults to 0.
+        rounds_per_season (int, optional): Number of home and away rounds in each season. Defaults to 23.
+        first_year (int, optional): Season of the first match. Defaults to 2021.
+
+    Returns:
+        DataFrame: Synthetic matches with Match_ID, Year, Round, YearRound, Date, Home_Team, Away_Team, score, expected and margin columns.
+    """
+    
+    rng = np.random.default_rng(seed)
+    finals_matches = [4, 4, 2, 1]
+    season_rounds = [(f"{round_num:02d}", 9) for round_num in range(1, rounds_per_season + 1)] + [(f"F{i + 1}", n) for i, n in enumerate(finals_matches)]
+    matches_per_season = sum(n for _, n in season_rounds)
+    n_seasons = -(-n_matches // matches_per_season)
+    
+    rows = []
+    for season in range(n_seasons):
+        year = first_year + season
+        for round_index, (round_id, n_round_matches) in enumerate(season_rounds):
+            pairs = rng.permutation(len(teams))[:2 * n_round_matches].reshape(-1, 2)
+            round_num = int(round_id) if "F" not in round_id else rounds_per_season + int(round_id[1])
+            for home, away in pairs:
+                rows.append((year, round_id, round_num, round_index, teams[home], teams[away]))
+    rows = rows[:n_matches]
+    
+    matches = pd.DataFrame(rows, columns=['Year', 'Round_ID', 'Round', 'Round_Index', 'Home_Team', 'Away_Team'])
+    matches['Match_ID'] = "AFL_" + matches['Year'].astype(str) + "_" + matches['Round_ID'] + "_" + matches['Home_Team'].str.replace(" ", "") + "_" + matches['Away_Team'].str.replace(" ", "")
+    matches['Date'] = pd.to_datetime(matches['Year'].clip(upper=2200).astype(str) + "-03-01") + pd.to_timedelta(7 * matches['Round_Index'] + rng.integers(0, 4, len(matches)), unit="D")
+    
+    for team in ['Home', 'Away']:
+        matches[f'{team}_Goals'] = rng.poisson(12, len(matches))
+        matches[f'{team}_Behinds'] = rng.poisson(10, len(matches))
+        matches[f'{team}_Score'] = 6 * matches[f'{team}_Goals'] + matches[f'{team}_Behinds']
+        matches[f'{team}_xScore_sum'] = matches[f'{team}_Score'] + rng.normal(0, 12, len(matches))
+        matches[f'{team}_exp_vaep_value_sum'] = matches[f'{team}_Score'] / 10 + rng.normal(0, 2, len(matches))
+    matches['YearRound'] = 100 * matches['Year'] + matches['Round']
+    matches['Margin'] = matches['Home_Score'] - matches['Away_Score']
+    matches['Home_Margin'], matches['Away_Margin'] = matches['Margin'], -matches['Margin']
+    matches['Home_Win'], matches['Away_Win'] = (matches['Margin'] > 0).astype(int), (matches['Margin'] < 0).astype(int)
+    for stat in ['xScore_sum', 'exp_vaep_value_sum']:
+        matches[f'Home_{stat}_Margin'] = matches[f'Home_{stat}'] - matches[f'Away_{stat}']
+        matches[f'Away_{stat}_Margin'] = matches[f'Away_{stat}'] - matches[f'Home_{stat}']
+    
+    matches = matches.sort_values(by='Match_ID', kind='stable').reset_index(drop=True)
+    
+    return matches.drop(columns=['Round_ID', 'Round_Index'])
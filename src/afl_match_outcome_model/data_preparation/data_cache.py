@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pandas as pd
+from afl_match_outcome_model.data_preparation.utils import FileLock
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+default_cache_dir = os.environ.get("AFL_DATA_CACHE_DIR", "/AFL_Data/cache")
+default_ttl = float(os.environ.get("AFL_DATA_CACHE_TTL", 3600))
+default_max_bytes = int(os.environ.get("AFL_DATA_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# Results, fixtures and team selections change during a round, so these datasets are always loaded from the client
+default_uncached_datasets = os.environ.get("AFL_DATA_CACHE_UNCACHED", "AFL_API_Matches,AFL_API_Team_Positions").split(",")
+fingerprint_metadata_key = b"afl_cache_fingerprint"
+
+def get_cache_key(Dataset_Name, ID=None):
+    """Gets a stable key for a (Dataset_Name, ID) request, where ID may be None, a string or a list.
+
+    Args:
+        Dataset_Name (str): Dataset name.
+        ID (str or list, optional): Dataset ID(s). Defaults to None.
+
+    Returns:
+        str: Hex digest identifying the request.
+    """
+
+    request = json.dumps([Dataset_Name, ID], sort_keys=True, default=str)
+
+    return hashlib.sha1(request.encode()).hexdigest()
+
+def get_data_fingerprint(data):
+    """Gets a content fingerprint of a DataFrame from its columns, dtypes, index and values.
+
+    Args:
+        data (DataFrame): Data to fingerprint.
+
+    Returns:
+        str: Hex digest of the data content.
+    """
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(json.dumps([list(map(str, data.columns)), list(map(str, data.dtypes))]).encode())
+    fingerprint.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+
+    return fingerprint.hexdigest()
+
+class DataCache:
+    """Local cache of AFLPy load_data results, one uncompressed Arrow IPC file per (Dataset_Name, ID).
+
+    Entries expire after ttl seconds, the least recently used entries are evicted once the cache grows past
+    max_bytes, and every entry for a dataset is invalidated when it is written with upload_data. Warm loads
+    memory map the Arrow file rather than calling the client.
+
+    Each entry's content fingerprint is kept in index.json and in the Arrow file's schema metadata. A warm
+    load only returns a file whose fingerprint matches its index entry, and a refetch returning unchanged
+    content keeps the existing file rather than rewriting it. Updates to index.json are serialised across
+    processes, e.g. gunicorn workers and cron jobs sharing the cache directory, with a FileLock.
+
+    Datasets that change during a round, such as match results and team selections, are never cached, so
+    every load of them calls the client.
+
+    Args:
+        cache_dir (str, optional): Directory for cached files. Defaults to AFL_DATA_CACHE_DIR or /AFL_Data/cache.
+        ttl (float, optional): Seconds before an entry is refetched. Defaults to AFL_DATA_CACHE_TTL or 3600.
+        max_bytes (int, optional): Total size of cached files before LRU eviction. Defaults to AFL_DATA_CACHE_MAX_BYTES or 2GB.
+        client (object, optional): Object with load_data and upload_data functions. Defaults to AFLPy.AFLData_Client.
+        uncached_datasets (list, optional): Dataset names always loaded from the client. Defaults to AFL_DATA_CACHE_UNCACHED or AFL_API_Matches and AFL_API_Team_Positions.
+    """
+
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None, client=None, uncached_datasets=None):
+        self.cache_dir = default_cache_dir if cache_dir is None else cache_dir
+        self.ttl = default_ttl if ttl is None else ttl
+        self.max_bytes = default_max_bytes if max_bytes is None else max_bytes
+        self.client = client
+        self.uncached_datasets = default_uncached_datasets if uncached_datasets is None else uncached_datasets
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.lock_path = os.path.join(self.cache_dir, "index.lock")
+        self._lock = threading.Lock()
+
+    def get_client(self):
+        if self.client is None:
+            from AFLPy import AFLData_Client
+            self.client = AFLData_Client
+
+        return self.client
+
+    def load_data(self, Dataset_Name, ID=None, refresh=False):
+        """Loads a dataset from the cache if it holds a fresh entry, otherwise from the client, caching the result.
+
+        Datasets in uncached_datasets are always loaded from the client and never cached.
+
+        Args:
+            Dataset_Name (str): Dataset name.
+            ID (str or list, optional): Dataset ID(s). Defaults to None.
+            refresh (bool, optional): Bypass any cached entry and refetch. Defaults to False.
+
+        Returns:
+            DataFrame: Loaded data.
+        """
+
+        if Dataset_Name in self.uncached_datasets:
+            return self.get_client().load_data(Dataset_Name=Dataset_Name, ID=ID)
+
+        key = get_cache_key(Dataset_Name, ID)
+        if not refresh:
+            data = self._read_entry(key)
+            if data is not None:
+                return data
+
+        data = self.get_client().load_data(Dataset_Name=Dataset_Name, ID=ID)
+        self._write_entry(key, Dataset_Name, ID, data)
+
+        return data
+
+    def upload_data(self, Dataset_Name, Dataset, **kwargs):
+        """Uploads a dataset with the client and invalidates every cached entry for it.
+
+        Args:
+            Dataset_Name (str): Dataset name.
+            Dataset (DataFrame): Data to upload.
+            **kwargs: Passed on to the client upload_data, e.g. overwrite and update_if_identical.
+
+        Returns:
+            The client upload_data result.
+        """
+
+        try:
+            return self.get_client().upload_data(Dataset_Name=Dataset_Name, Dataset=Dataset, **kwargs)
+        finally:
+            self.invalidate(Dataset_Name)
+
+    def invalidate(self, Dataset_Name=None):
+        """Removes cached entries for a dataset, or every entry if no dataset is given.
+
+        Args:
+            Dataset_Name (str, optional): Dataset name. Defaults to None.
+        """
+
+        with self._lock_index():
+            index = self._read_index()
+            for key in [key for key, entry in index.items() if Dataset_Name is None or entry['Dataset_Name'] == Dataset_Name]:
+                self._remove_entry(index, key)
+            self._write_index(index)
+
+    def get_fingerprint(self, Dataset_Name, ID=None):
+        """Gets the content fingerprint of a cached entry, or None if it is not cached."""
+
+        entry = self._read_index().get(get_cache_key(Dataset_Name, ID))
+
+        return None if entry is None else entry['fingerprint']
+
+    def get_stats(self):
+        """Gets the number of cached entries and their total size in bytes."""
+
+        index = self._read_index()
+
+        return {'entries': len(index), 'bytes': sum(entry['size'] for entry in index.values())}
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def _lock_index(self):
+        # The lock file lives in the cache directory, which may not exist yet
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError:
+            pass
+
+        return IndexLock(self._lock, self.lock_path)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(index, f, default=str)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # Caching is best effort, an unwritable cache directory leaves every load going to the client
+            pass
+
+    def _remove_entry(self, index, key):
+        index.pop(key, None)
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _read_entry(self, key):
+        if pa is None:
+            return None
+
+        with self._lock_index():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['created'] > self.ttl:
+                self._remove_entry(index, key)
+                self._write_index(index)
+                return None
+
+        # The file is read outside the lock, a file replaced or removed meanwhile no longer matches the fingerprint
+        try:
+            with pa.memory_map(self._get_path(key)) as source:
+                reader = pa.ipc.open_file(source)
+                if (reader.schema.metadata or {}).get(fingerprint_metadata_key) != entry['fingerprint'].encode():
+                    return None
+                data = reader.read_all().to_pandas()
+        except (OSError, pa.ArrowException):
+            return None
+
+        with self._lock_index():
+            index = self._read_index()
+            if key in index and index[key]['fingerprint'] == entry['fingerprint']:
+                index[key]['last_access'] = time.time()
+                self._write_index(index)
+
+        return data
+
+    def _write_entry(self, key, Dataset_Name, ID, data):
+        # Empty results are not cached, they are usually data that has not been published yet
+        if pa is None or not isinstance(data, pd.DataFrame) or data.empty:
+            return
+
+        try:
+            fingerprint = get_data_fingerprint(data)
+        except TypeError:
+            # Columns that cannot be hashed are not cached
+            return
+
+        path, temp_path = self._get_path(key), None
+        with self._lock_index():
+            entry = self._read_index().get(key)
+        if entry is None or entry['fingerprint'] != fingerprint or not os.path.exists(path):
+            # The file is written outside the lock and renamed into place under it
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                table = pa.Table.from_pandas(data)
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), fingerprint_metadata_key: fingerprint.encode()})
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            except (OSError, TypeError, pa.ArrowException):
+                # Caching is best effort, e.g. an unwritable cache directory or columns that cannot be converted
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return
+
+        with self._lock_index():
+            try:
+                if temp_path is not None:
+                    os.replace(temp_path, path)
+                size = os.path.getsize(path)
+            except OSError:
+                return
+
+            index = self._read_index()
+            now = time.time()
+            index[key] = {
+                'Dataset_Name': Dataset_Name,
+                'ID': ID,
+                'fingerprint': fingerprint,
+                'size': size,
+                'created': now,
+                'last_access': now,
+            }
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index):
+        total_bytes = sum(entry['size'] for entry in index.values())
+        for key in sorted(index, key=lambda key: index[key]['last_access']):
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= index[key]['size']
+            self._remove_entry(index, key)
+
+class IndexLock:
+    """Holds a DataCache's thread lock and then its FileLock, falling back to the thread lock alone where the lock file cannot be opened."""
+
+    def __init__(self, thread_lock, path):
+        self.thread_lock = thread_lock
+        self.file_lock = FileLock(path)
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            self.file_lock.__enter__()
+        except OSError:
+            pass
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.file_lock.__exit__(*exc_info)
+        finally:
+            self.thread_lock.release()
+
+data_cache = DataCache()
+
+def load_data(Dataset_Name, ID=None, refresh=False):
+    """Loads a dataset through the shared data cache, with the same arguments as AFLPy load_data."""
+
+    return data_cache.load_data(Dataset_Name=Dataset_Name, ID=ID, refresh=refresh)
+
+def upload_data(Dataset_Name, Dataset, **kwargs):
+    """Uploads a dataset through the shared data cache, invalidating its cached entries."""
+
+    return data_cache.upload_data(Dataset_Name=Dataset_Name, Dataset=Dataset, **kwargs)
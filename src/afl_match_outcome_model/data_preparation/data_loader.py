@@ -1,4 +1,4 @@
-from AFLPy.AFLData_Client import load_data
+from afl_match_outcome_model.data_preparation.data_cache import load_data
 
 def load_matches(dataset_name = 'AFLTables_Match_Summary'):
     return load_data(Dataset_Name=dataset_name)
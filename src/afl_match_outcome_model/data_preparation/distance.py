@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import geopy.distance
+
+# WGS-84 ellipsoid, as used by geopy.distance.geodesic
+wgs84_major_axis = 6378137.0
+wgs84_flattening = 1 / 298.257223563
+wgs84_minor_axis = (1 - wgs84_flattening) * wgs84_major_axis
+
+def calculate_geodesic_distance(latitude_1, longitude_1, latitude_2, longitude_2, max_iterations=200, tolerance=1e-12):
+    """Calculates the WGS-84 ellipsoidal distance in km between arrays of points with Vincenty's inverse formula.
+
+    Agrees with geopy.distance.geodesic to under a millimetre. Nearly antipodal pairs where Vincenty's
+    iteration does not converge fall back to geopy. Pairs with a missing coordinate are NaN.
+
+    Args:
+        latitude_1 (array-like): Latitudes of the first points in degrees.
+        longitude_1 (array-like): Longitudes of the first points in degrees.
+        latitude_2 (array-like): Latitudes of the second points in degrees.
+        longitude_2 (array-like): Longitudes of the second points in degrees.
+        max_iterations (int, optional): Maximum iterations of the longitude difference. Defaults to 200.
+        tolerance (float, optional): Convergence tolerance in radians. Defaults to 1e-12.
+
+    Returns:
+        ndarray: Distance in km between each pair of points.
+    """
+
+    latitude_1, longitude_1, latitude_2, longitude_2 = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in [latitude_1, longitude_1, latitude_2, longitude_2]])
+    f, a, b = wgs84_flattening, wgs84_major_axis, wgs84_minor_axis
+
+    reduced_latitude_1 = np.arctan((1 - f) * np.tan(np.radians(latitude_1)))
+    reduced_latitude_2 = np.arctan((1 - f) * np.tan(np.radians(latitude_2)))
+    sin_u1, cos_u1 = np.sin(reduced_latitude_1), np.cos(reduced_latitude_1)
+    sin_u2, cos_u2 = np.sin(reduced_latitude_2), np.cos(reduced_latitude_2)
+
+    longitude_difference = np.radians(longitude_2 - longitude_1)
+    lambda_ = longitude_difference
+    is_converged = np.zeros(lambda_.shape, dtype=bool)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iterations):
+            sin_lambda, cos_lambda = np.sin(lambda_), np.cos(lambda_)
+            sin_sigma = np.hypot(cos_u2 * sin_lambda, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lambda)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lambda
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lambda / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            # Equatorial lines have cos_sq_alpha of 0
+            cos_2_sigma_m = np.where(cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha)
+            c = f / 16 * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+            lambda_previous = lambda_
+            lambda_ = longitude_difference + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2_sigma_m + c * cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2))
+            )
+            is_converged = np.abs(lambda_ - lambda_previous) <= tolerance
+            if np.all(is_converged | np.isnan(lambda_)):
+                break
+
+        u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2_sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2) - big_b / 6 * cos_2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2_sigma_m ** 2)
+        ))
+        distance = b * big_a * (sigma - delta_sigma) / 1000
+
+    is_missing = np.isnan(latitude_1) | np.isnan(longitude_1) | np.isnan(latitude_2) | np.isnan(longitude_2)
+    distance = np.where(is_missing, np.nan, distance)
+    for i in zip(*np.nonzero(~is_converged & ~is_missing)):
+        distance[i] = geopy.distance.geodesic((latitude_1[i], longitude_1[i]), (latitude_2[i], longitude_2[i])).km
+
+    return distance
+
+def create_venue_distance_matrix(venue_info):
+    """Creates the distance in km between every pair of venues.
+
+    Args:
+        venue_info (DataFrame): Venue, Latitude and Longitude of each venue. Duplicate venues keep the first.
+
+    Returns:
+        DataFrame: Venue by venue distances.
+    """
+
+    venue_info = venue_info.drop_duplicates(subset='Venue', keep='first')
+    latitude = venue_info['Latitude'].to_numpy(dtype=np.float64)
+    longitude = venue_info['Longitude'].to_numpy(dtype=np.float64)
+    distances = calculate_geodesic_distance(latitude[:, None], longitude[:, None], latitude[None, :], longitude[None, :])
+
+    return pd.DataFrame(distances, index=venue_info['Venue'], columns=venue_info['Venue'])
+
+def lookup_venue_distances(venue_distance_matrix, from_venues, to_venues):
+    """Looks up the distance in km between pairs of venues from a venue distance matrix.
+
+    Args:
+        venue_distance_matrix (DataFrame): Venue by venue distances from create_venue_distance_matrix.
+        from_venues (array-like): Venue of each row.
+        to_venues (array-like): Other venue of each row.
+
+    Returns:
+        ndarray: Distance for each row, NaN where either venue is not in the matrix.
+    """
+
+    from_codes = venue_distance_matrix.index.get_indexer(from_venues)
+    to_codes = venue_distance_matrix.columns.get_indexer(to_venues)
+    distances = venue_distance_matrix.to_numpy()[from_codes, to_codes]
+
+    return np.where((from_codes == -1) | (to_codes == -1), np.nan, distances)
@@ -1,5 +1,11 @@
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 def calculate_elo_probability(home_team_elo, away_team_elo):
     """Calculates the probability of the home team winning a match based on their ELO ratings.
 
@@ -72,17 +78,137 @@ def calculate_elo_ratings(data, k_factor):
             - elo_dict (dict): Final ELO ratings for each team at the end of the data, with team name as the key and the ELO rating as the value.
     """
     
-    elo_dict = {team: 1500 for team in data['Home_Team'].unique()}
-    elos, elo_probs = {}, {}
+    home_codes, away_codes, teams = encode_teams(data['Home_Team'], data['Away_Team'])
+    ratings = np.full(len(teams), 1500, dtype=np.float64)
+    home_elos, away_elos, home_probs = run_elo_engine(home_codes, away_codes, data['Margin'].to_numpy(dtype=np.float64), ratings, k_factor)
 
-    for _, row in data.iterrows():
-        game_id, elos_game, elo_probs_game = calculate_elo_for_row(row, elo_dict, k_factor)
-        elos[game_id] = elos_game
-        elo_probs[game_id] = elo_probs_game
+    elos, elo_probs = convert_elo_arrays_to_dict(data['Match_ID'], home_elos, away_elos, home_probs)
+    elo_dict = dict(zip(teams, ratings.tolist()))
 
     return elos, elo_probs, elo_dict
 
 
+def encode_teams(home_teams, away_teams, teams=None):
+    """Encodes home and away team names as integer codes into a shared team index.
+
+    Args:
+        home_teams (Series): Home team name for each match.
+        away_teams (Series): Away team name for each match.
+        teams (list, optional): Known teams, whose codes are kept in this order. Unseen teams are appended. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing home_codes, away_codes and teams.
+            - home_codes (ndarray): Integer code of the home team for each match.
+            - away_codes (ndarray): Integer code of the away team for each match.
+            - teams (list): Team name for each code.
+    """
+    
+    teams = [] if teams is None else list(teams)
+    known_teams = set(teams)
+    new_teams = pd.unique(pd.concat([pd.Series(home_teams), pd.Series(away_teams)], ignore_index=True))
+    teams = teams + [team for team in new_teams if team not in known_teams]
+    team_index = pd.Index(teams)
+    
+    return team_index.get_indexer(home_teams).astype(np.int64), team_index.get_indexer(away_teams).astype(np.int64), teams
+
+
+def _elo_kernel(home_codes, away_codes, margins, home_regress, away_regress, ratings, k_factor, season_regression, regress_to, home_elos, away_elos, home_probs):
+    """Sequential ELO update over encoded matches, writing pre-match ratings and probabilities in place.
+
+    Plain Python so it can run uncompiled on lists, or compiled by numba on NumPy arrays.
+    """
+    
+    for i in range(len(home_codes)):
+        home, away = home_codes[i], away_codes[i]
+        home_team_elo, away_team_elo = ratings[home], ratings[away]
+        
+        if home_regress[i]:
+            home_team_elo = season_regression*regress_to + home_team_elo*(1 - season_regression)
+        if away_regress[i]:
+            away_team_elo = season_regression*regress_to + away_team_elo*(1 - season_regression)
+        
+        prob_win_home = 1 / (1 + 10 ** ((away_team_elo - home_team_elo) / 400))
+        margin = margins[i]
+        score_diff = 1.0 if margin > 0 else 0.5 if margin == 0 else 0.0
+        
+        ratings[home] = home_team_elo + k_factor * (score_diff - prob_win_home)
+        ratings[away] = away_team_elo + k_factor * ((1 - score_diff) - (1 - prob_win_home))
+        
+        home_elos[i], away_elos[i], home_probs[i] = home_team_elo, away_team_elo, prob_win_home
+
+
+_elo_kernel_numba = njit(_elo_kernel) if njit is not None else None
+
+
+def run_elo_engine(home_codes, away_codes, margins, ratings, k_factor, home_regress=None, away_regress=None, season_regression=0.5, regress_to=1500, use_numba=True):
+    """Runs the ELO update over encoded matches in order, updating ratings in place.
+
+    Uses the numba compiled kernel when numba is installed, otherwise the same kernel runs as plain Python.
+
+    Args:
+        home_codes (ndarray): Integer code of the home team for each match.
+        away_codes (ndarray): Integer code of the away team for each match.
+        margins (ndarray): Home margin for each match, a NaN margin counts as a loss.
+        ratings (ndarray): Current float64 ELO rating for each team code, updated in place.
+        k_factor (int): The size of the adjustment factor.
+        home_regress (ndarray, optional): Flags matches where the home rating regresses to regress_to before the match. Defaults to None.
+        away_regress (ndarray, optional): Flags matches where the away rating regresses to regress_to before the match. Defaults to None.
+        season_regression (float, optional): Weight of regress_to in the regressed rating. Defaults to 0.5.
+        regress_to (float, optional): Rating regressed towards at the start of a season. Defaults to 1500.
+        use_numba (bool, optional): Whether to use the numba kernel when available. Defaults to True.
+
+    Returns:
+        tuple: A tuple containing three float64 arrays: home_elos, away_elos and home_probs.
+            - home_elos (ndarray): ELO rating of the home team before each match.
+            - away_elos (ndarray): ELO rating of the away team before each match.
+            - home_probs (ndarray): Probability of the home team winning each match.
+    """
+    
+    n_matches = len(home_codes)
+    home_regress = np.zeros(n_matches, dtype=np.bool_) if home_regress is None else np.asarray(home_regress, dtype=np.bool_)
+    away_regress = np.zeros(n_matches, dtype=np.bool_) if away_regress is None else np.asarray(away_regress, dtype=np.bool_)
+    
+    home_elos = np.empty(n_matches, dtype=np.float64)
+    away_elos = np.empty(n_matches, dtype=np.float64)
+    home_probs = np.empty(n_matches, dtype=np.float64)
+    
+    if use_numba and _elo_kernel_numba is not None:
+        _elo_kernel_numba(np.asarray(home_codes, dtype=np.int64), np.asarray(away_codes, dtype=np.int64), np.asarray(margins, dtype=np.float64),
+                          home_regress, away_regress, ratings, float(k_factor), float(season_regression), float(regress_to), home_elos, away_elos, home_probs)
+        return home_elos, away_elos, home_probs
+
+    # Python floats index far faster than NumPy scalars in an interpreted loop
+    ratings_list = ratings.tolist()
+    home_elos_list, away_elos_list, home_probs_list = [0.0] * n_matches, [0.0] * n_matches, [0.0] * n_matches
+    _elo_kernel(np.asarray(home_codes).tolist(), np.asarray(away_codes).tolist(), np.asarray(margins, dtype=np.float64).tolist(),
+                home_regress.tolist(), away_regress.tolist(), ratings_list, k_factor, season_regression, regress_to, home_elos_list, away_elos_list, home_probs_list)
+    
+    ratings[:] = ratings_list
+    home_elos[:], away_elos[:], home_probs[:] = home_elos_list, away_elos_list, home_probs_list
+    
+    return home_elos, away_elos, home_probs
+
+
+def convert_elo_arrays_to_dict(match_ids, home_elos, away_elos, home_probs):
+    """Converts ELO engine output arrays to the ELO ratings and probabilities dictionaries keyed by Match_ID.
+
+    Args:
+        match_ids (Series): Match_ID for each match.
+        home_elos (ndarray): ELO rating of the home team before each match.
+        away_elos (ndarray): ELO rating of the away team before each match.
+        home_probs (ndarray): Probability of the home team winning each match.
+
+    Returns:
+        tuple: A tuple containing two dictionaries: elos and elo_probs.
+    """
+    
+    home_probs = home_probs.tolist()
+    elos = {match_id: [home_elo, away_elo] for match_id, home_elo, away_elo in zip(match_ids, home_elos.tolist(), away_elos.tolist())}
+    elo_probs = {match_id: [prob_win_home, 1 - prob_win_home] for match_id, prob_win_home in zip(match_ids, home_probs)}
+    
+    return elos, elo_probs
+
+
 def convert_elo_dict_to_dataframe(elos, elo_probs):
     """Converts a dictionary of ELO ratings and ELO probabilities to dataframes for merging.
 
@@ -134,3 +260,121 @@ def create_elo_ratings_home_away(data, k_factor=32):
     """
     elos, elo_probs, _ = calculate_elo_ratings(data, k_factor)
     return merge_elo_ratings(data, elos, elo_probs)
+
+
+def find_season_first_rounds(data):
+    """Finds the round of each team's first match of each season, in match order.
+
+    Args:
+        data (DataFrame): Input dataframe with match details in match order, including 'Year' and 'Round'.
+
+    Returns:
+        Series: First Round indexed by (Team, Year).
+    """
+    
+    n_matches = len(data)
+    team_matches = pd.DataFrame({
+        'Team': np.concatenate([data['Home_Team'].to_numpy(dtype=object), data['Away_Team'].to_numpy(dtype=object)]),
+        'Year': np.tile(data['Year'].to_numpy(), 2),
+        'Round': np.tile(data['Round'].to_numpy(dtype=object), 2),
+        'Order': np.tile(np.arange(n_matches), 2),
+    }).sort_values(by='Order', kind='stable')
+    
+    return team_matches.groupby(['Team', 'Year'])['Round'].first()
+
+
+def find_season_first_match_flags(data, season_first_rounds=None):
+    """Flags the matches that are the home and away team's first match of the season, where ratings regress before the match.
+
+    Args:
+        data (DataFrame): Input dataframe with match details, including 'Year' and 'Round'.
+        season_first_rounds (Series, optional): First Round by (Team, Year), e.g. including seasons fitted
+            before data. Defaults to None, finding them from data.
+
+    Returns:
+        tuple: A tuple containing two boolean arrays: home_first and away_first.
+    """
+    
+    if season_first_rounds is None:
+        season_first_rounds = find_season_first_rounds(data)
+    rounds = data['Round'].to_numpy(dtype=object)
+    
+    home_first = season_first_rounds.reindex(pd.MultiIndex.from_arrays([data['Home_Team'], data['Year']])).to_numpy(dtype=object) == rounds
+    away_first = season_first_rounds.reindex(pd.MultiIndex.from_arrays([data['Away_Team'], data['Year']])).to_numpy(dtype=object) == rounds
+    
+    return home_first, away_first
+
+
+def _elo_sweep_kernel(home_codes, away_codes, margins, outcomes, scored, home_regress, away_regress, ratings, k_factors, season_regressions, regress_to, log_losses, brier_scores):
+    """Sequential ELO update run for every configuration at once, accumulating log loss and Brier score in place.
+
+    ratings is a teams x configurations matrix, so each match updates two contiguous rows.
+    """
+    
+    for i in range(len(home_codes)):
+        home, away = home_codes[i], away_codes[i]
+        home_team_elo, away_team_elo = ratings[home].copy(), ratings[away].copy()
+        
+        if home_regress[i]:
+            home_team_elo = season_regressions*regress_to + home_team_elo*(1 - season_regressions)
+        if away_regress[i]:
+            away_team_elo = season_regressions*regress_to + away_team_elo*(1 - season_regressions)
+        
+        prob_win_home = 1 / (1 + 10 ** ((away_team_elo - home_team_elo) / 400))
+        margin = margins[i]
+        score_diff = 1.0 if margin > 0 else 0.5 if margin == 0 else 0.0
+        
+        if scored[i]:
+            outcome = outcomes[i]
+            clipped_prob = np.minimum(np.maximum(prob_win_home, 1e-15), 1 - 1e-15)
+            log_losses -= outcome*np.log(clipped_prob) + (1 - outcome)*np.log(1 - clipped_prob)
+            brier_scores += (prob_win_home - outcome)**2
+        
+        ratings[home] = home_team_elo + k_factors * (score_diff - prob_win_home)
+        ratings[away] = away_team_elo + k_factors * ((1 - score_diff) - (1 - prob_win_home))
+
+
+_elo_sweep_kernel_numba = njit(_elo_sweep_kernel) if njit is not None else None
+
+
+def sweep_elo_parameters(data, k_factors, initial_ratings=(1500,), season_regressions=(0.5,), expected=False, burn_in=0, use_numba=True):
+    """Evaluates every combination of ELO parameters in a single pass over the matches.
+
+    All configurations are rated side by side as a teams x configurations matrix, with the same season
+    start regression as ELOTransformer, and each configuration's pre-match probabilities are scored
+    against the actual result (1 for a home win, 0.5 for a draw and 0 for a loss).
+
+    Args:
+        data (DataFrame): Input dataframe with match details in match order, including 'Year', 'Round' and 'Margin'.
+        k_factors (list): Adjustment factors to evaluate.
+        initial_ratings (list, optional): Initial ratings to evaluate. Defaults to (1500,).
+        season_regressions (list, optional): Season start regression weights towards 1500 to evaluate. Defaults to (0.5,).
+        expected (bool, optional): Whether ratings update on the 'Home_xScore_sum_Margin' instead of the 'Margin'. Defaults to False.
+        burn_in (int, optional): Number of initial matches left out of the scores. Defaults to 0.
+        use_numba (bool, optional): Whether to use the numba kernel when available. Defaults to True.
+
+    Returns:
+        DataFrame: One row per configuration with columns 'k_factor', 'initial_rating', 'season_regression', 'log_loss' and 'brier_score'.
+    """
+    
+    configs = pd.MultiIndex.from_product([k_factors, initial_ratings, season_regressions], names=['k_factor', 'initial_rating', 'season_regression']).to_frame(index=False)
+    
+    home_codes, away_codes, teams = encode_teams(data['Home_Team'], data['Away_Team'])
+    home_first, away_first = find_season_first_match_flags(data)
+    margins = (data['Home_xScore_sum_Margin'] if expected else data['Margin']).to_numpy(dtype=np.float64)
+    actual_margins = data['Margin'].to_numpy(dtype=np.float64)
+    outcomes = np.where(actual_margins > 0, 1.0, np.where(actual_margins == 0, 0.5, 0.0))
+    scored = np.arange(len(data)) >= burn_in
+    
+    ratings = np.tile(configs['initial_rating'].to_numpy(dtype=np.float64), (len(teams), 1))
+    log_losses, brier_scores = np.zeros(len(configs)), np.zeros(len(configs))
+    
+    sweep_kernel = _elo_sweep_kernel_numba if use_numba and _elo_sweep_kernel_numba is not None else _elo_sweep_kernel
+    sweep_kernel(home_codes, away_codes, margins, outcomes, scored, home_first, away_first, ratings,
+                 configs['k_factor'].to_numpy(dtype=np.float64), configs['season_regression'].to_numpy(dtype=np.float64), 1500.0, log_losses, brier_scores)
+    
+    n_scored = max(int(scored.sum()), 1)
+    configs['log_loss'] = log_losses / n_scored
+    configs['brier_score'] = brier_scores / n_scored
+    
+    return configs
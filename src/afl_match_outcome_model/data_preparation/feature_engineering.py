@@ -1,5 +1,13 @@
-import geopy.distance
+import re
 import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+from afl_match_outcome_model.data_preparation.distance import calculate_geodesic_distance
 
 def parse_score(score):
     """Parses a score string into goals, behinds, and total score.
@@ -16,6 +24,59 @@ def parse_score(score):
     goals, behinds, total = map(int, score.replace(" - ", ".").split("."))
     return total, goals, behinds
 
+score_pattern = re.compile(r"(?P<Home_Goals>\d+)\.(?P<Home_Behinds>\d+)\.(?P<Home_Score>\d+)\s*-\s*(?P<Away_Goals>\d+)\.(?P<Away_Behinds>\d+)\.(?P<Away_Score>\d+)")
+score_columns = ['Home_Goals', 'Home_Behinds', 'Home_Score', 'Away_Goals', 'Away_Behinds', 'Away_Score']
+
+def parse_scores(scores, dtype="Int16"):
+    """Parses a column of match score strings into home and away goals, behinds, and total score in one pass.
+
+    Args:
+        scores (Series): Score strings in the format 'goals.behinds.total - goals.behinds.total'.
+        dtype (str, optional): Integer dtype of the parsed columns. Defaults to the nullable "Int16", which keeps
+            missing or unplayed scores as <NA>.
+
+    Returns:
+        DataFrame: Home_Goals, Home_Behinds, Home_Score, Away_Goals, Away_Behinds and Away_Score, with the index of scores.
+    """
+
+    scores = pd.Series(scores).astype("string")
+    if pa is None:
+        return scores.str.extract(score_pattern)[score_columns].astype(dtype)
+
+    # Arrow's regex kernel extracts every component in one pass, unmatched or missing scores are null
+    extracted_scores = pc.extract_regex(pa.array(scores), score_pattern.pattern)
+    parsed_scores = pa.Table.from_arrays([pc.cast(pc.struct_field(extracted_scores, [i]), pa.int64()) for i in range(len(score_columns))], names=score_columns)
+    parsed_scores = parsed_scores.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get).set_axis(scores.index, axis=0)
+
+    return parsed_scores.astype(dtype)
+
+def parse_quarter_scores(match_stats, quarters=None, dtype="Int16"):
+    """Parses the score string of every quarter into goals, behinds and total score with a single column scan.
+
+    Args:
+        match_stats (DataFrame): Input dataframe with a {quarter}_Score column for each quarter.
+        quarters (list, optional): Quarters to parse. Defaults to ['Q1', 'Q2', 'Q3', 'Q4'].
+        dtype (str, optional): Integer dtype of the parsed columns. Defaults to "Int16".
+
+    Returns:
+        DataFrame: {quarter}_Home_Goals, ..., {quarter}_Away_Score columns for each quarter, with the index of match_stats.
+    """
+
+    if quarters is None:
+        quarters = ['Q1', 'Q2', 'Q3', 'Q4']
+
+    quarter_scores = pd.concat([match_stats[f'{quarter}_Score'] for quarter in quarters], axis=0, ignore_index=True)
+    parsed_scores = parse_scores(quarter_scores, dtype=dtype)
+
+    n_matches = len(match_stats)
+    quarter_list = []
+    for i, quarter in enumerate(quarters):
+        parsed_quarter = parsed_scores.iloc[i * n_matches:(i + 1) * n_matches].set_axis(match_stats.index, axis=0)
+        parsed_quarter.columns = [f'{quarter}_{col}' for col in score_columns]
+        quarter_list.append(parsed_quarter)
+
+    return pd.concat(quarter_list, axis=1)
+
 def create_score_features(match_stats):
     """Creates score-related features based on the match statistics.
 
@@ -26,10 +87,11 @@ def create_score_features(match_stats):
         DataFrame: Updated dataframe with additional score-related features.
     """
     
+    scores = parse_scores(match_stats['Q4_Score'])
     for team in ['Home', 'Away']:
-        match_stats[f'{team}_Score'], match_stats[f'{team}_Goals'], match_stats[f'{team}_Behinds'] = zip(*match_stats['Q4_Score'].apply(lambda x: (parse_score(x.split(" - ")[0 if team == 'Home' else 1]) if isinstance(x, str) else (np.nan, np.nan, np.nan))))
+        match_stats[[f'{team}_Score', f'{team}_Goals', f'{team}_Behinds']] = scores[[f'{team}_Score', f'{team}_Goals', f'{team}_Behinds']]
         match_stats[f'{team}_Scoring_Shots'] = match_stats[f'{team}_Goals'] + match_stats[f'{team}_Behinds']
-        match_stats[f'{team}_Goal_Conversion'] = match_stats[f'{team}_Goals'] / match_stats[f'{team}_Scoring_Shots']
+        match_stats[f'{team}_Goal_Conversion'] = (match_stats[f'{team}_Goals'] / match_stats[f'{team}_Scoring_Shots']).to_numpy(dtype=np.float64, na_value=np.nan)
 
     return match_stats
 
@@ -91,14 +153,15 @@ def create_win_features(match_stats):
         DataFrame: Updated dataframe with additional win features.
     """
     
-    match_stats['Home_Win'] = (match_stats['Home_Margin'] > 0).astype(int)
-    match_stats['Away_Win'] = (match_stats['Away_Margin'] > 0).astype(int)
+    # Unplayed matches with a missing margin are not wins
+    match_stats['Home_Win'] = (match_stats['Home_Margin'] > 0).fillna(False).astype(int)
+    match_stats['Away_Win'] = (match_stats['Away_Margin'] > 0).fillna(False).astype(int)
 
     return match_stats
 
 def create_distance_travelled_feature(match_stats):
-    match_stats['Home_Distance_Travelled'] = match_stats.apply(lambda x: geopy.distance.geodesic((x['Venue_Latitude'], x['Venue_Longitude']), (x['Home_Team_Venue_Latitude'], x['Home_Team_Venue_Longitude'])).km, axis=1)
-    match_stats['Away_Distance_Travelled'] = match_stats.apply(lambda x: geopy.distance.geodesic((x['Venue_Latitude'], x['Venue_Longitude']), (x['Away_Team_Venue_Latitude'], x['Away_Team_Venue_Longitude'])).km, axis=1)
+    match_stats['Home_Distance_Travelled'] = calculate_geodesic_distance(match_stats['Venue_Latitude'], match_stats['Venue_Longitude'], match_stats['Home_Team_Venue_Latitude'], match_stats['Home_Team_Venue_Longitude'])
+    match_stats['Away_Distance_Travelled'] = calculate_geodesic_distance(match_stats['Venue_Latitude'], match_stats['Venue_Longitude'], match_stats['Away_Team_Venue_Latitude'], match_stats['Away_Team_Venue_Longitude'])
 
     return match_stats
 
@@ -0,0 +1,110 @@
+import pandas as pd
+
+class KeyedTable:
+    """Append structure for chain and squad level data, upserting whole partitions such as a Match_ID.
+
+    Rows are held as a list of parts. An upsert deduplicates only the new rows on the key columns and appends
+    them as a new part, recording that its partitions now live there, so new and replaced Match_IDs are added
+    without copying or hashing the existing table. The full frame is built when it is next needed, dropping
+    the replaced partitions from older parts in the same pass, and cached until the next upsert.
+
+    Args:
+        data (DataFrame, optional): Initial rows, assumed unique on the key columns. Defaults to None.
+        key_cols (list, optional): Columns identifying a row. Defaults to ['Match_ID'].
+        partition_col (str, optional): Column whose values are replaced as a whole on upsert. Defaults to 'Match_ID'.
+    """
+
+    def __init__(self, data=None, key_cols=None, partition_col='Match_ID'):
+        self.key_cols = ['Match_ID'] if key_cols is None else key_cols
+        self.partition_col = partition_col
+        self.parts = []
+        self.part_partitions = []
+        self.partitions = {}
+        self._frame = None
+        if data is not None and not data.empty:
+            self._append_part(data)
+
+    def __setstate__(self, state):
+        # Tables pickled before the frame cache replaced partitions on upsert, so every part only holds live partitions
+        if 'part_partitions' not in state:
+            state['part_partitions'] = [list(part[state['partition_col']].unique()) for part in state['parts']]
+            state['_frame'] = state['parts'][0] if len(state['parts']) == 1 else None
+        self.__dict__.update(state)
+
+    def __len__(self):
+        return len(self.to_frame()) if self.parts else 0
+
+    def upsert(self, rows):
+        """Inserts rows, replacing every existing row of the partitions they contain.
+
+        Args:
+            rows (DataFrame): New rows, e.g. every chain of the newly loaded Match_IDs.
+
+        Returns:
+            KeyedTable: self.
+        """
+
+        if rows.empty:
+            return self
+
+        self._append_part(rows.drop_duplicates(subset=self.key_cols, keep='last'))
+
+        return self
+
+    def to_frame(self):
+        """Gets every row as a single DataFrame, built once after each upsert."""
+
+        if not self.parts:
+            return pd.DataFrame(columns=self.key_cols)
+        if self._frame is None:
+            # Older parts keep only the partitions no later part has replaced
+            live_parts = []
+            for part_number, (part, part_partitions) in enumerate(zip(self.parts, self.part_partitions)):
+                replaced_partitions = [partition for partition in part_partitions if self.partitions[partition] != part_number]
+                if replaced_partitions:
+                    part = part[~part[self.partition_col].isin(replaced_partitions)]
+                live_parts.append(part)
+            self._frame = live_parts[0] if len(live_parts) == 1 else pd.concat(live_parts, axis=0, ignore_index=True)
+            self.parts, self.part_partitions = [self._frame], [list(self.partitions)]
+            self.partitions = dict.fromkeys(self.partitions, 0)
+
+        return self._frame
+
+    def _append_part(self, rows):
+        part_number = len(self.parts)
+        part_partitions = list(rows[self.partition_col].unique())
+        self.parts.append(rows)
+        self.part_partitions.append(part_partitions)
+        self.partitions.update(dict.fromkeys(part_partitions, part_number))
+        self._frame = None
+
+def get_frame(data):
+    """Gets a DataFrame from a KeyedTable, or returns a DataFrame unchanged."""
+
+    return data.to_frame() if isinstance(data, KeyedTable) else data
+
+def upsert_rows(data, rows, key_cols, partition_col='Match_ID'):
+    """Upserts rows into a KeyedTable, first wrapping a DataFrame such as one from an older pickle.
+
+    Args:
+        data (DataFrame or KeyedTable): Existing rows.
+        rows (DataFrame): New rows.
+        key_cols (list): Columns identifying a row.
+        partition_col (str, optional): Column whose values are replaced as a whole. Defaults to 'Match_ID'.
+
+    Returns:
+        KeyedTable: Table with the rows upserted.
+    """
+
+    if not isinstance(data, KeyedTable):
+        data = KeyedTable(data, key_cols=key_cols, partition_col=partition_col)
+
+    return data.upsert(rows)
+
+def get_partition_values(data, partition_col='Match_ID'):
+    """Gets the unique partition values, e.g. Match_IDs, of a KeyedTable or DataFrame."""
+
+    if isinstance(data, KeyedTable):
+        return list(data.partitions)
+
+    return list(data[partition_col].unique())
@@ -1,4 +1,7 @@
 import re
+import threading
+import numpy as np
+import pandas as pd
 
 round_map = {
     '00':0, 
@@ -53,3 +56,137 @@ def get_away_team_from_match_id(match_id):
     
     return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[4])
 
+match_id_components = ['Competition', 'Year', 'Round', 'Home_Team', 'Away_Team']
+
+# Parsed components of the most recently seen Match_IDs, indexed by Match_ID. The table is only ever replaced,
+# never changed in place, so a reference taken under the lock can be read without it
+match_id_table_max_rows = 100_000
+match_id_table_lock = threading.Lock()
+match_id_table = pd.DataFrame(
+    {'Competition': pd.Series(dtype=object), 'Year': pd.Series(dtype=np.int64), 'Round': pd.Series(dtype=object), 'Home_Team': pd.Series(dtype=object), 'Away_Team': pd.Series(dtype=object)},
+    index=pd.Index([], dtype=object, name='Match_ID')
+)
+
+def create_match_id_table(match_ids):
+    """Parses unique Match_IDs into their components with vectorized string splits.
+
+    Args:
+        match_ids (Index): Unique Match_IDs, e.g. "AFL_2023_F4_Collingwood_Brisbane".
+
+    Returns:
+        DataFrame: Competition, Year, Round code (e.g. '05' or 'F4'), Home_Team and Away_Team, indexed by Match_ID.
+    """
+
+    match_id_parts = pd.Series(match_ids, dtype=object).str.split("_", expand=True)
+
+    return pd.DataFrame({
+        'Competition': match_id_parts[0].to_numpy(),
+        'Year': match_id_parts[1].astype(np.int64).to_numpy(),
+        'Round': match_id_parts[2].to_numpy(),
+        'Home_Team': match_id_parts[3].str.replace(r"(?<=\w)([A-Z])", r" \1", regex=True).to_numpy(),
+        'Away_Team': match_id_parts[4].str.replace(r"(?<=\w)([A-Z])", r" \1", regex=True).to_numpy(),
+    }, index=pd.Index(match_ids, dtype=object, name='Match_ID'))
+
+def parse_match_ids(match_ids):
+    """Parses a column of Match_IDs into Competition, Year, Round, Home_Team and Away_Team.
+
+    Only Match_IDs not parsed by an earlier call are split, then each row gathers its components by
+    Match_ID code. String components are returned as categoricals over the distinct values. Parsed
+    Match_IDs are shared between calls and threads, keeping the latest match_id_table_max_rows.
+
+    Args:
+        match_ids (Series or array-like): Match_IDs, e.g. a Match_ID column with one row per chain.
+
+    Returns:
+        DataFrame: Match_ID components for each row, with the index of match_ids if it is a Series.
+
+    Raises:
+        ValueError: If any Match_ID is missing.
+    """
+
+    global match_id_table
+
+    codes, unique_match_ids = pd.factorize(np.asarray(match_ids, dtype=object))
+    if (codes == -1).any():
+        raise ValueError("Match_IDs contain missing values.")
+
+    with match_id_table_lock:
+        cached_table = match_id_table
+    is_cached = pd.Index(unique_match_ids).isin(cached_table.index)
+    new_table = create_match_id_table(unique_match_ids[~is_cached]) if not is_cached.all() else cached_table.iloc[:0]
+
+    # Components come from this call's own rows, whatever other calls do to the shared table meanwhile
+    unique_components = pd.concat([cached_table.reindex(unique_match_ids[is_cached]), new_table], axis=0).reindex(unique_match_ids)
+
+    if len(new_table) > 0:
+        with match_id_table_lock:
+            new_table = new_table[~new_table.index.isin(match_id_table.index)]
+            match_id_table = pd.concat([match_id_table, new_table], axis=0).iloc[-match_id_table_max_rows:]
+    components = {'Year': unique_components['Year'].to_numpy()[codes]}
+    for col in ['Competition', 'Round', 'Home_Team', 'Away_Team']:
+        value_codes, values = pd.factorize(unique_components[col])
+        components[col] = pd.Categorical.from_codes(value_codes[codes], categories=values)
+
+    index = match_ids.index if isinstance(match_ids, pd.Series) else None
+
+    return pd.DataFrame(components, index=index)[match_id_components]
+
+def get_teams_from_match_ids(match_ids):
+    """Gets the home and away team of each Match_ID as object arrays, e.g. for columns merged on team names.
+
+    Args:
+        match_ids (Series or array-like): Match_IDs.
+
+    Returns:
+        tuple: Home team and away team arrays.
+    """
+
+    components = parse_match_ids(match_ids)
+
+    return np.asarray(components['Home_Team'], dtype=object), np.asarray(components['Away_Team'], dtype=object)
+
+def create_season_calendar(match_ids):
+    """Creates the last home and away round of each season from the Match_IDs played in it.
+
+    Args:
+        match_ids (Series or array-like): Match_IDs.
+
+    Returns:
+        Series: Last home and away round number, indexed by Year.
+    """
+
+    components = parse_match_ids(pd.unique(np.asarray(match_ids, dtype=object)))
+    round_codes = components['Round'].astype(str)
+    is_final = round_codes.str.startswith("F")
+
+    return pd.to_numeric(round_codes[~is_final]).groupby(components.loc[~is_final, 'Year']).max().astype(np.int64)
+
+def get_round_numbers(match_ids, season_calendar):
+    """Gets the Year and integer Round of each Match_ID, numbering finals on from the season's last home and away round.
+
+    Args:
+        match_ids (Series or array-like): Match_IDs.
+        season_calendar (Series): Last home and away round number, indexed by Year, from create_season_calendar.
+
+    Returns:
+        tuple: Year and Round arrays.
+
+    Raises:
+        ValueError: If a final is in a season with no home and away rounds in the calendar.
+    """
+
+    components = parse_match_ids(match_ids)
+    years = components['Year'].to_numpy()
+    round_codes = components['Round'].astype(str)
+    is_final = round_codes.str.startswith("F").to_numpy()
+
+    rounds = np.zeros(len(round_codes), dtype=np.int64)
+    rounds[~is_final] = round_codes[~is_final].astype(np.int64).to_numpy()
+    if is_final.any():
+        last_rounds = season_calendar.reindex(years[is_final]).to_numpy()
+        if np.isnan(last_rounds).any():
+            missing_years = sorted({int(year) for year in years[is_final][np.isnan(last_rounds)]})
+            raise ValueError(f"No home and away rounds to number finals after for seasons {missing_years}.")
+        rounds[is_final] = last_rounds.astype(np.int64) + round_codes[is_final].str[1:].astype(np.int64).to_numpy()
+
+    return years, rounds
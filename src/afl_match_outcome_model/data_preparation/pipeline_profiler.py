@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import cProfile
+import logging
+import threading
+from sklearn.pipeline import Pipeline
+
+def get_rss_bytes():
+    """Gets the resident set size of this process in bytes from /proc, or None where /proc is not available."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def get_frame_info(X):
+    """Gets the shape and shallow memory size in bytes of a DataFrame or array, None for anything else."""
+
+    shape = getattr(X, "shape", None)
+    if hasattr(X, "memory_usage"):
+        memory_bytes = int(X.memory_usage(index=True, deep=False).sum())
+    else:
+        memory_bytes = getattr(X, "nbytes", None)
+
+    return (None if shape is None else list(shape)), memory_bytes
+
+class PeakRSSSampler:
+    """Context manager sampling the resident set size on a background thread to find its peak.
+
+    Args:
+        interval (float, optional): Seconds between samples. Defaults to 0.005.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_bytes = None
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_bytes = self.peak_bytes = get_rss_bytes()
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._update_peak()
+
+    @property
+    def peak_delta_bytes(self):
+        return None if self.start_bytes is None else self.peak_bytes - self.start_bytes
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update_peak()
+
+    def _update_peak(self):
+        rss_bytes = get_rss_bytes()
+        if rss_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes, rss_bytes)
+
+class PipelineProfiler:
+    """Runs a fitted pipeline step by step, recording wall time, CPU time, peak RSS delta and data sizes for each step.
+
+    The profiler wraps the pipeline rather than changing it, so it can be attached to a loaded preprocessor
+    without re-pickling. Each run produces a structured report, kept as last_report and logged as a single
+    JSON line. A sklearn Pipeline is profiled per step. Anything else, e.g. a ParallelPipeline, is profiled
+    as one step, with its own step_timings included.
+
+    With profile_dir set each step also runs under cProfile, and the stats of the slowest step are dumped
+    there for e.g. snakeviz. cProfile adds overhead, so timings from profiled runs are inflated.
+
+    Args:
+        pipeline (Pipeline): Fitted pipeline.
+        name (str, optional): Pipeline name in reports, e.g. 'margin_preprocessor'. Defaults to 'pipeline'.
+        profile_dir (str, optional): Directory for the slowest step's cProfile stats. Defaults to None, not profiling.
+        logger (Logger, optional): Logger for the JSON report line. Defaults to this module's logger.
+    """
+
+    def __init__(self, pipeline, name="pipeline", profile_dir=None, logger=None):
+        self.pipeline = pipeline
+        self.name = name
+        self.profile_dir = profile_dir
+        self.logger = logging.getLogger(__name__) if logger is None else logger
+        self.last_report = None
+
+    def fit(self, X, y=None):
+        self._run(X, y, method="fit")
+        return self.pipeline
+
+    def fit_transform(self, X, y=None):
+        return self._run(X, y, method="fit_transform")
+
+    def transform(self, X):
+        return self._run(X, None, method="transform")
+
+    def get_steps(self):
+        """Gets the (name, transformer) steps run one at a time, skipping passthrough steps."""
+
+        if isinstance(self.pipeline, Pipeline):
+            return [(name, step) for name, step in self.pipeline.steps if step is not None and step != "passthrough"]
+
+        return [(type(self.pipeline).__name__, self.pipeline)]
+
+    def _run(self, X, y, method):
+        steps = self.get_steps()
+        step_reports, profiles = [], {}
+        start_time, start_cpu_time = time.perf_counter(), time.process_time()
+
+        for i, (step_name, step) in enumerate(steps):
+            # As in Pipeline.fit, every step is fitted and transformed with y except the last, which is only fitted
+            step_method = method
+            if method == "fit":
+                step_method = "fit" if i == len(steps) - 1 else "fit_transform"
+            input_shape, input_bytes = get_frame_info(X)
+            profile = cProfile.Profile() if self.profile_dir is not None else None
+
+            with PeakRSSSampler() as rss_sampler:
+                step_start_time, step_start_cpu_time = time.perf_counter(), time.process_time()
+                if profile is not None:
+                    profile.enable()
+                try:
+                    X_step = getattr(step, step_method)(X) if step_method == "transform" else getattr(step, step_method)(X, y)
+                finally:
+                    if profile is not None:
+                        profile.disable()
+                step_wall_seconds, step_cpu_seconds = time.perf_counter() - step_start_time, time.process_time() - step_start_cpu_time
+
+            if step_method != "fit":
+                X = X_step
+            output_shape, output_bytes = get_frame_info(X)
+            step_report = {
+                'name': step_name,
+                'transformer': type(step).__name__,
+                'wall_seconds': step_wall_seconds,
+                'cpu_seconds': step_cpu_seconds,
+                'peak_rss_delta_bytes': rss_sampler.peak_delta_bytes,
+                'input_shape': input_shape,
+                'output_shape': output_shape,
+                'input_bytes': input_bytes,
+                'output_bytes': output_bytes,
+            }
+            if hasattr(step, 'step_timings'):
+                step_report['step_timings'] = dict(step.step_timings)
+            step_reports.append(step_report)
+            profiles[step_name] = profile
+
+        slowest_step = max(step_reports, key=lambda step_report: step_report['wall_seconds'])['name'] if step_reports else None
+        self.last_report = {
+            'pipeline': self.name,
+            'method': method,
+            'wall_seconds': time.perf_counter() - start_time,
+            'cpu_seconds': time.process_time() - start_cpu_time,
+            'slowest_step': slowest_step,
+            'profile_path': self._dump_profile(profiles.get(slowest_step), method, slowest_step),
+            'steps': step_reports,
+        }
+        self.logger.info(json.dumps(self.last_report, default=str))
+
+        return X
+
+    def _dump_profile(self, profile, method, step_name):
+        if profile is None:
+            return None
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_path = os.path.join(self.profile_dir, f"{self.name}_{method}_{step_name}_{time.strftime('%Y%m%dT%H%M%S')}.prof")
+        profile.dump_stats(profile_path)
+
+        return profile_path
@@ -0,0 +1,208 @@
+import time
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+
+def get_step_waves(steps):
+    """Groups DAG steps into waves, where every step in a wave only depends on steps in earlier waves.
+
+    Args:
+        steps (list): (name, transformer, depends_on) tuples, depends_on a list of step names.
+
+    Raises:
+        ValueError: If step names are duplicated, a dependency is unknown or the dependencies are cyclic.
+
+    Returns:
+        list: Lists of step names, in declaration order within each wave.
+    """
+
+    dependencies = {name: list(depends_on) for name, _, depends_on in steps}
+    if len(dependencies) != len(steps):
+        raise ValueError("Step names must be unique.")
+    unknown = sorted({dependency for depends_on in dependencies.values() for dependency in depends_on} - set(dependencies))
+    if unknown:
+        raise ValueError(f"Steps depend on unknown steps {' '.join(unknown)}.")
+
+    waves, done = [], set()
+    while len(done) < len(dependencies):
+        wave = [name for name, depends_on in dependencies.items() if name not in done and set(depends_on) <= done]
+        if not wave:
+            raise ValueError(f"Steps {' '.join(name for name in dependencies if name not in done)} have cyclic dependencies.")
+        waves.append(wave)
+        done.update(wave)
+
+    return waves
+
+def get_step_ancestors(steps):
+    """Gets every step each step depends on, directly or through other steps, in declaration order."""
+
+    dependencies = {name: list(depends_on) for name, _, depends_on in steps}
+    ancestors = {}
+    for wave in get_step_waves(steps):
+        for name in wave:
+            upstream = set(dependencies[name]).union(*[ancestors[dependency] for dependency in dependencies[name]])
+            ancestors[name] = [step_name for step_name in dependencies if step_name in upstream]
+
+    return ancestors
+
+def iterate_steps(pipeline):
+    """Yields (name, transformer) for every step of a Pipeline or ParallelPipeline, including nested ones.
+
+    Args:
+        pipeline (Pipeline or ParallelPipeline): Preprocessing pipeline.
+
+    Yields:
+        tuple: (name, transformer).
+    """
+
+    # A fitted ParallelPipeline's named_steps are its fitted copies
+    for name, transformer in pipeline.named_steps.items():
+        yield name, transformer
+        if isinstance(transformer, (Pipeline, ParallelPipeline)):
+            yield from iterate_steps(transformer)
+
+def get_step(pipeline, name):
+    """Gets a named step from a Pipeline or ParallelPipeline, searching nested pipelines.
+
+    Args:
+        pipeline (Pipeline or ParallelPipeline): Preprocessing pipeline.
+        name (str): Step name, e.g. 'expected' or 'squad'.
+
+    Raises:
+        KeyError: If no step has the name.
+
+    Returns:
+        The step's transformer.
+    """
+
+    for step_name, transformer in iterate_steps(pipeline):
+        if step_name == name:
+            return transformer
+
+    raise KeyError(name)
+
+def check_step_output(transformer, X, X_transformed, join_on):
+    """Checks a step kept the rows and columns of its input, raising a ValueError if it dropped or rewrote any."""
+
+    name = type(transformer).__name__
+    if len(X_transformed) != len(X) or not (X_transformed[join_on].to_numpy() == X[join_on].to_numpy()).all():
+        raise ValueError(f"{name} must keep every row of its input in order.")
+
+    dropped_columns = [col for col in X.columns if col not in X_transformed.columns]
+    if dropped_columns:
+        raise ValueError(f"{name} drops columns {' '.join(map(str, dropped_columns))}, steps must only add columns.")
+
+    rewritten_columns = [col for col in X.columns if not X_transformed[col].reset_index(drop=True).equals(X[col].reset_index(drop=True))]
+    if rewritten_columns:
+        raise ValueError(f"{name} rewrites columns {' '.join(map(str, rewritten_columns))}, steps must only add columns.")
+
+def _run_step(transformer, X, fit, join_on):
+    start_time = time.perf_counter()
+    X_transformed = transformer.fit_transform(X) if fit else transformer.transform(X)
+    seconds = time.perf_counter() - start_time
+    check_step_output(transformer, X, X_transformed, join_on)
+
+    # Only the columns the step adds are sent back, keyed by the join column
+    new_columns = [col for col in X_transformed.columns if col not in X.columns]
+    output = X_transformed[new_columns].set_axis(X_transformed[join_on].to_numpy(), axis=0).rename_axis(join_on)
+    if output.index.has_duplicates:
+        raise ValueError(f"{type(transformer).__name__} output must have one row per {join_on}.")
+
+    # Only fitting changes the transformer, so it is only sent back from the worker then
+    return transformer if fit else None, output, seconds
+
+class ParallelPipeline(BaseEstimator, TransformerMixin):
+    """Runs transformers as a DAG, executing steps that do not depend on each other concurrently.
+
+    Each step declares the steps whose output columns it consumes. A step receives the input frame with the
+    columns added by every step it depends on, directly or indirectly, joined on Match_ID. Steps are run in
+    waves, each wave in parallel with joblib. With the default loky backend the workers are separate
+    processes, and joblib memory maps the large NumPy blocks of the input frame rather than copying them
+    to every worker. The columns each step adds are joined back on Match_ID, in step order, at the end.
+
+    Steps must keep every row of their input and only add columns, a step dropping or rewriting rows or
+    columns raises a ValueError. Filters such as ColumnFilter belong in a Pipeline after the ParallelPipeline.
+
+    Process workers fit copies of the steps, which are kept in fitted_steps and used by transform, named_steps
+    and get_step. Refitting starts from the fitted copies, as a Pipeline refits its fitted steps, until steps
+    is set again. Inputs with fewer than parallel_min_rows rows, e.g. a round of fixtures, run the steps in
+    turn in this process, where sending the fitted steps to the workers would take longer than the steps.
+
+    Args:
+        steps (list): (name, transformer, depends_on) tuples, e.g. ('elo', ELOTransformer(), ['score']).
+            (name, transformer) tuples depend on no other step.
+        n_jobs (int, optional): Number of workers, -1 for every core. Defaults to None, running the steps in turn.
+        backend (str, optional): joblib backend, 'loky' for processes or 'threading'. Defaults to 'loky'.
+        join_on (str, optional): Column joining the step outputs. Defaults to 'Match_ID'.
+        parallel_min_rows (int, optional): Fewest input rows run in parallel. Defaults to 5000.
+    """
+
+    def __init__(self, steps, n_jobs=None, backend="loky", join_on="Match_ID", parallel_min_rows=5000):
+        self.steps = steps
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.join_on = join_on
+        self.parallel_min_rows = parallel_min_rows
+
+    @property
+    def named_steps(self):
+        return {name: transformer for name, transformer, _ in self._get_steps()}
+
+    def __getitem__(self, name):
+        return self.named_steps[name]
+
+    def fit(self, X, y=None):
+        self._run(X, fit=True)
+        return self
+
+    def fit_transform(self, X, y=None):
+        return self._run(X, fit=True)
+
+    def transform(self, X):
+        return self._run(X, fit=False)
+
+    def _get_steps(self):
+        steps = [(step[0], step[1], list(step[2]) if len(step) > 2 and step[2] is not None else []) for step in self.steps]
+        # The fitted copies stand in for the steps they were fitted from, until steps is set to a new list
+        if getattr(self, 'fitted_steps', None) is not None and self._fitted_from is self.steps:
+            steps = [(name, self.fitted_steps[name], depends_on) for name, _, depends_on in steps]
+
+        return steps
+
+    def _run(self, X, fit):
+        steps = self._get_steps()
+        transformers = {name: transformer for name, transformer, _ in steps}
+        ancestors = get_step_ancestors(steps)
+        outputs, step_timings = {}, {}
+        n_jobs = self.n_jobs if len(X) >= self.parallel_min_rows else None
+
+        with Parallel(n_jobs=n_jobs, backend=self.backend) as parallel:
+            for wave in get_step_waves(steps):
+                results = parallel(
+                    delayed(_run_step)(transformers[name], self._join_outputs(X, [outputs[ancestor] for ancestor in ancestors[name]]), fit, self.join_on)
+                    for name in wave
+                )
+                for name, (transformer, output, seconds) in zip(wave, results):
+                    if fit:
+                        transformers[name] = transformer
+                    outputs[name] = output
+                    step_timings[name] = seconds
+
+        if fit:
+            self.fitted_steps = transformers
+            self._fitted_from = self.steps
+        self.step_timings = step_timings
+
+        return self._join_outputs(X, [outputs[name] for name, _, _ in steps])
+
+    def _join_outputs(self, X, outputs):
+        if not outputs:
+            return X
+
+        output = pd.concat(outputs, axis=1)
+        duplicated_columns = output.columns[output.columns.duplicated()].unique().tolist()
+        if duplicated_columns:
+            raise ValueError(f"Steps add the same columns {' '.join(map(str, duplicated_columns))}.")
+
+        return X.join(output, on=self.join_on)
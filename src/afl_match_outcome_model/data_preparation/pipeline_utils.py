@@ -1,4 +1,6 @@
 import numpy as np
+import pandas as pd
+from functools import lru_cache
 
 def count_gt50(x):
     return np.sum((x > 50)[::-1])
@@ -9,33 +11,94 @@ def count_gt80(x):
 def count_gt100(x):
     return np.sum((x > 100)[::-1])
 
-def ema3(x):
-    alpha = 2 / (3 + 1)
-    weights = (1 - alpha) ** (np.arange(len(x)) + 1)
-    weights /= weights.sum()
-    ema = np.convolve(x, weights, mode='full')[:len(x)]
-    return ema[-1]
+@lru_cache(maxsize=None)
+def get_ema_weights(span, window_length):
+    """Normalised EMA weights for a window, oldest value first, as used by the emaN window functions.
 
-def ema5(x):
-    alpha = 2 / (5 + 1)
-    weights = (1 - alpha) ** (np.arange(len(x)) + 1)
-    weights /= weights.sum()
-    ema = np.convolve(x, weights, mode='full')[:len(x)]
-    return ema[-1]
+    Args:
+        span (int): EMA span, alpha = 2 / (span + 1).
+        window_length (int): Number of values in the window.
 
-def ema10(x):
-    alpha = 2 / (10 + 1)
-    weights = (1 - alpha) ** (np.arange(len(x)) + 1)
+    Returns:
+        ndarray: Read-only weights, cached per (span, window_length).
+    """
+    
+    alpha = 2 / (span + 1)
+    weights = (1 - alpha) ** (np.arange(window_length) + 1)
     weights /= weights.sum()
-    ema = np.convolve(x, weights, mode='full')[:len(x)]
-    return ema[-1]
+    weights = np.ascontiguousarray(weights[::-1])
+    weights.flags.writeable = False
+    
+    return weights
 
-def ema20(x):
-    alpha = 2 / (20 + 1)
-    weights = (1 - alpha) ** (np.arange(len(x)) + 1)
-    weights /= weights.sum()
-    ema = np.convolve(x, weights, mode='full')[:len(x)]
-    return ema[-1]
+def make_ema(span):
+    """Creates an emaN window function, returning the EMA of the last value in a window.
+
+    The function is named ema{span} so window summarizer feature names (e.g. Team_Score_ema5_1_5) and
+    pickled references to the module level ema3, ema5, ema10 and ema20 resolve as before.
+
+    Args:
+        span (int): EMA span, alpha = 2 / (span + 1).
+
+    Returns:
+        function: Window function with a span attribute.
+    """
+    
+    def ema(x):
+        return np.correlate(x, get_ema_weights(span, len(x)), mode='valid')[-1]
+    
+    ema.__name__ = ema.__qualname__ = f"ema{span}"
+    ema.span = span
+    
+    return ema
+
+ema3 = make_ema(3)
+ema5 = make_ema(5)
+ema10 = make_ema(10)
+ema20 = make_ema(20)
+
+def rolling_ema(values, span, window_length):
+    """Calculates the emaN of every trailing window of a series in a single strided pass.
+
+    Matches Series.rolling(window_length, min_periods=window_length).apply(emaN, raw=True) exactly,
+    including NaN for incomplete windows and windows containing NaN.
+
+    Args:
+        values (array-like): Series values in time order.
+        span (int): EMA span, alpha = 2 / (span + 1).
+        window_length (int): Number of values in each window.
+
+    Returns:
+        ndarray: EMA of the window ending at each value.
+    """
+    
+    values = np.asarray(values, dtype=np.float64)
+    ema = np.full(len(values), np.nan)
+    if len(values) >= window_length:
+        ema[window_length - 1:] = np.correlate(values, get_ema_weights(span, window_length), mode='valid')
+    
+    return ema
+
+def summarize_ema_windows(values, span, window):
+    """Calculates the emaN over a [lag, window_length] window before each value, as the window summarizer does with the emaN functions.
+
+    Args:
+        values (array-like): Series values in time order.
+        span (int): EMA span, alpha = 2 / (span + 1).
+        window (list): Lag and window length, e.g. [1, 5] for the 5 values before the current one.
+
+    Returns:
+        ndarray: Windowed EMA for each value.
+    """
+    
+    lag, window_length = window
+    ema = rolling_ema(values, span, window_length)
+    
+    summarized = np.full(len(ema), np.nan)
+    if lag < len(ema):
+        summarized[lag:] = ema[:len(ema) - lag]
+    
+    return summarized
 
 score_kwargs = {
     "lag_feature": {
@@ -126,4 +189,47 @@ modelling_features = [
     'For_exp_vaep_value_sum_Margin_mean_1_5_ratio',
     'For_exp_vaep_value_sum_Margin_ema5_1_5_ratio',
     'For_exp_vaep_value_sum_Margin_ema20_1_20_ratio'
-    ]
\ No newline at end of file
+    ]
+
+def get_home_away_blocks(X, feature_list, dtype=np.float64):
+    """Gathers the Home_ and Away_ columns of each feature into two contiguous 2-D arrays.
+
+    Args:
+        X (DataFrame): Data with Home_{feature} and Away_{feature} columns.
+        feature_list (list): Feature names without the Home_/Away_ prefix.
+        dtype (dtype, optional): Array dtype, missing values become NaN. Defaults to np.float64.
+
+    Returns:
+        tuple: (home, away) arrays of shape (rows, features).
+    """
+
+    # Filled a column at a time into Fortran order arrays, which avoids an intermediate frame and lets pandas
+    # store the resulting block without another copy
+    home = np.empty((len(X), len(feature_list)), dtype=dtype, order='F')
+    away = np.empty((len(X), len(feature_list)), dtype=dtype, order='F')
+    for i, feature in enumerate(feature_list):
+        home[:, i] = X[f'Home_{feature}'].to_numpy(dtype=dtype, na_value=np.nan)
+        away[:, i] = X[f'Away_{feature}'].to_numpy(dtype=dtype, na_value=np.nan)
+
+    return home, away
+
+def attach_feature_block(X, block, columns):
+    """Attaches a 2-D array as new columns with a single concat, leaving X unmodified.
+
+    Existing columns with the same names are replaced rather than duplicated.
+
+    Args:
+        X (DataFrame): Data to attach to.
+        block (ndarray): Values of shape (rows, columns).
+        columns (list): Column names of the block.
+
+    Returns:
+        DataFrame: X with the block columns appended.
+    """
+
+    existing_cols = [col for col in columns if col in X.columns]
+    if existing_cols:
+        X = X.drop(columns=existing_cols)
+
+    # X's columns are shared rather than copied, so peak memory is the new block only
+    return pd.concat([X, pd.DataFrame(block, index=X.index, columns=columns, copy=False)], axis=1, copy=False)
@@ -0,0 +1,254 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.utils import FileLock
+from afl_match_outcome_model.data_preparation.window_summarizer import calculate_window_feature, get_group_positions, get_summarizer_name, get_summarizer_windows, get_window_history_length
+
+default_store_dir = os.environ.get("AFL_PLAYER_FEATURE_STORE_DIR", "/AFL_Data/player_features")
+
+class PlayerFeatureStore:
+    """Player level values and windowed features indexed by (Player, YearRound), persisted as Parquet parts.
+
+    Each update upserts player match rows, recomputes the windowed features of only the players whose rows
+    are new or changed, from their earliest changed round on, and appends just the recomputed rows to the
+    store directory as a new Parquet part. Given every player row, an update can also delete the rows no
+    longer there, appending them as tombstones. Loading reads the parts in order with later rows replacing
+    earlier ones and tombstones removing them, and compact rewrites them as a single part.
+
+    Loads, updates and compacts hold a FileLock on the store directory, so processes sharing it, e.g. gunicorn
+    workers and cron jobs, never write the same part or remove a part another has just written. An update
+    first reloads the store if another process has changed its parts.
+
+    Features are named as GroupedWindowSummarizer names them, e.g. xScore_ema5_1_5, and match it for the
+    same lag_feature.
+
+    Args:
+        store_dir (str, optional): Directory of Parquet parts. Defaults to AFL_PLAYER_FEATURE_STORE_DIR or /AFL_Data/player_features.
+        target_cols (list, optional): Player value columns to summarise. Defaults to ['xScore', 'exp_vaep_value'].
+        lag_feature (dict, optional): Summarizer to windows, as for GroupedWindowSummarizer. Defaults to {"lag": [1]}.
+        dtype (str, optional): Feature dtype. Defaults to "float32".
+    """
+
+    def __init__(self, store_dir=None, target_cols=None, lag_feature=None, dtype="float32"):
+        self.store_dir = default_store_dir if store_dir is None else store_dir
+        self.target_cols = ['xScore', 'exp_vaep_value'] if target_cols is None else target_cols
+        self.lag_feature = lag_feature
+        self.dtype = dtype
+        self.data = None
+        self._latest = None
+        self._loaded_parts = None
+
+    def __getstate__(self):
+        # The data lives in the store directory, so pickles such as fitted preprocessors stay small
+        state = self.__dict__.copy()
+        state['data'], state['_latest'], state['_loaded_parts'] = None, None, None
+        return state
+
+    @property
+    def feature_cols(self):
+        return [f"{col}_{get_summarizer_name(summarizer, window)}" for col in self.target_cols for summarizer, window in get_summarizer_windows(self.lag_feature)]
+
+    def get_data(self):
+        """Gets the stored rows, loading them from the store directory on first use."""
+
+        if self.data is None:
+            self.load()
+
+        return self.data
+
+    def load(self):
+        """Loads every Parquet part in the store directory, later parts replacing earlier rows and tombstones removing them."""
+
+        with self._lock_store():
+            return self._load()
+
+    def get_changed_rows(self, player_rows):
+        """Gets the player rows that are new to the store or whose values differ from it.
+
+        Args:
+            player_rows (DataFrame): Rows indexed by (Player, YearRound) with Match_ID, Team and the target columns.
+
+        Returns:
+            DataFrame: The new and changed rows.
+        """
+
+        player_rows = self._prepare_rows(player_rows)
+        existing_rows = self.get_data()[['Match_ID', 'Team'] + self.target_cols].reindex(player_rows.index)
+        is_changed = ~(existing_rows.astype(object).eq(player_rows.astype(object)) | (existing_rows.isna() & player_rows.isna())).all(axis=1)
+
+        return player_rows[is_changed.to_numpy()]
+
+    def update(self, player_rows, delete_missing=False):
+        """Upserts player match rows, recomputing features of the changed players and appending them as a new part.
+
+        Args:
+            player_rows (DataFrame): Rows indexed by (Player, YearRound) with Match_ID, Team and the target columns.
+            delete_missing (bool, optional): Whether player_rows is every player row, and stored rows not in it
+                were deleted upstream. Defaults to False.
+
+        Returns:
+            DataFrame: The new and recomputed rows.
+        """
+
+        with self._lock_store():
+            self._reload_if_changed()
+            return self._update(self._prepare_rows(player_rows), delete_missing)
+
+    def get_features(self, index, columns=None):
+        """Looks up rows by (Player, YearRound), NaN for keys not in the store.
+
+        Args:
+            index (MultiIndex): (Player, YearRound) keys, e.g. a team sheet.
+            columns (list, optional): Columns to return. Defaults to the feature columns.
+
+        Returns:
+            DataFrame: Rows in the order of index.
+        """
+
+        columns = self.feature_cols if columns is None else columns
+
+        return self.get_data()[columns].reindex(index)
+
+    def get_latest_features(self, teams, players, columns=None):
+        """Looks up the latest row of each (Team, Player), skipping pairs not in the store.
+
+        Args:
+            teams (array-like): Team of each player.
+            players (array-like): Players.
+            columns (list, optional): Columns to return. Defaults to the feature columns.
+
+        Returns:
+            DataFrame: Team, Player and columns of each pair found.
+        """
+
+        columns = self.feature_cols if columns is None else columns
+        if self._latest is None:
+            data = self.get_data().reset_index()
+            data['Team'], data['Player'] = data['Team'].astype(str), data['Player'].astype(str)
+            self._latest = data.groupby(['Team', 'Player'], sort=False).tail(1).set_index(['Team', 'Player'])
+
+        keys = pd.MultiIndex.from_arrays([list(teams), list(players)], names=['Team', 'Player'])
+        latest = self._latest[columns].reindex(keys)
+
+        return latest[self._latest.index.get_indexer(keys) != -1].reset_index()
+
+    def compact(self):
+        """Rewrites every part as a single part."""
+
+        with self._lock_store():
+            self._reload_if_changed()
+            part_paths = self._get_part_paths()
+            self._write_part(self.data)
+            for path in part_paths:
+                os.remove(path)
+            self._loaded_parts = self._get_part_paths()
+
+    def _load(self):
+        part_paths = self._get_part_paths()
+        parts = [pd.read_parquet(path) for path in part_paths]
+        if parts:
+            data = pd.concat(parts, axis=0)
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+            if 'Is_Deleted' in data:
+                data = data[data['Is_Deleted'].ne(True)].drop(columns='Is_Deleted')
+            self.data = data
+        else:
+            self.data = self._create_empty_data()
+        self._latest = None
+        self._loaded_parts = part_paths
+
+        return self
+
+    def _update(self, player_rows, delete_missing):
+        data = self.data
+
+        # Only rows that are new or whose values differ from the store need their features recomputed
+        changed_rows = self.get_changed_rows(player_rows)
+        deleted_index = data.index.difference(player_rows.index) if delete_missing else data.index[:0]
+        if changed_rows.empty and deleted_index.empty:
+            return changed_rows
+
+        data = pd.concat([data.drop(index=changed_rows.index.union(deleted_index), errors='ignore'), changed_rows], axis=0).sort_index()
+        # A player's rows after a deleted one move up a position, so are recomputed too
+        updated_rows = self._recompute_features(data, changed_rows.index.union(self._get_rows_after(data, deleted_index)))
+        data.loc[updated_rows.index, self.feature_cols] = updated_rows[self.feature_cols]
+        data[self.feature_cols] = data[self.feature_cols].astype(self.dtype)
+
+        self.data = data
+        self._latest = None
+        self._write_part(data.loc[updated_rows.index], deleted_index)
+
+        return self.data.loc[updated_rows.index]
+
+    def _prepare_rows(self, player_rows):
+        player_rows = player_rows[['Match_ID', 'Team'] + self.target_cols]
+        player_rows = player_rows[~player_rows.index.duplicated(keep='last')]
+        player_rows.index = player_rows.index.set_names(['Player', 'YearRound'])
+
+        return player_rows
+
+    def _get_rows_after(self, data, deleted_index):
+        # Rows of each player with a deleted row, after their earliest deleted YearRound
+        first_deleted = pd.Series(deleted_index.get_level_values('YearRound'), index=deleted_index.get_level_values('Player'), dtype=np.float64).groupby(level=0).min()
+        first_deleted = first_deleted.reindex(data.index.get_level_values('Player')).to_numpy()
+
+        return data.index[data.index.get_level_values('YearRound').to_numpy() > first_deleted]
+
+    def _recompute_features(self, data, changed_index):
+        # Each changed player is recomputed from its earliest changed row, with enough earlier rows for the longest window
+        positions = get_group_positions(data.index)
+        changed_positions = pd.Series(positions[data.index.get_indexer(changed_index)], index=changed_index.get_level_values('Player'))
+        first_changed = changed_positions.groupby(level=0).min()
+        first_changed = first_changed.reindex(data.index.get_level_values('Player')).to_numpy()
+
+        is_affected = ~np.isnan(first_changed)
+        is_context = is_affected & (positions >= first_changed - get_window_history_length(self.lag_feature))
+        is_output = is_affected[is_context] & (positions[is_context] >= first_changed[is_context])
+
+        context = data[is_context]
+        context_positions = get_group_positions(context.index)
+        features = {}
+        for col in self.target_cols:
+            values = context[col].to_numpy(dtype=np.float64)
+            for summarizer, window in get_summarizer_windows(self.lag_feature):
+                features[f"{col}_{get_summarizer_name(summarizer, window)}"] = calculate_window_feature(values, context_positions, summarizer, window)[is_output]
+
+        return pd.DataFrame(features, index=context.index[is_output]).astype(self.dtype)
+
+    def _create_empty_data(self):
+        index = pd.MultiIndex.from_arrays([pd.Index([], dtype=object), pd.Index([], dtype=np.int64)], names=['Player', 'YearRound'])
+        data = pd.DataFrame({'Match_ID': pd.Series(dtype=object), 'Team': pd.Series(dtype=object)}, index=index)
+        for col in self.target_cols:
+            data[col] = pd.Series(dtype=np.float64)
+        for col in self.feature_cols:
+            data[col] = pd.Series(dtype=self.dtype)
+
+        return data
+
+    def _lock_store(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        return FileLock(os.path.join(self.store_dir, ".lock"))
+
+    def _reload_if_changed(self):
+        # Parts written or compacted by another process since the last load are read first
+        if self.data is None or self._get_part_paths() != self._loaded_parts:
+            self._load()
+
+    def _get_part_paths(self):
+        return sorted(glob.glob(os.path.join(self.store_dir, "part-*.parquet")))
+
+    def _write_part(self, rows, deleted_index=None):
+        if deleted_index is not None and len(deleted_index) > 0:
+            tombstones = rows.iloc[:0].reindex(deleted_index).assign(Is_Deleted=True)
+            rows = pd.concat([rows.assign(Is_Deleted=False), tombstones], axis=0)
+
+        # Part numbers are only picked under the store lock
+        part_paths = self._get_part_paths()
+        part_number = int(os.path.basename(part_paths[-1])[5:-8]) + 1 if part_paths else 0
+        path = os.path.join(self.store_dir, f"part-{part_number:06d}.parquet")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        rows.to_parquet(temp_path)
+        os.replace(temp_path, path)
+        self._loaded_parts = part_paths + [path]
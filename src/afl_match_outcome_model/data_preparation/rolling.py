@@ -1,74 +1,61 @@
 import pandas as pd
 import numpy as np
 
-def get_team_stats(match_stats, team):
-    
-    team_stats = match_stats[(match_stats['Home_Team'] == team) | (match_stats['Away_Team'] == team)]
-    team_stats['Team'] = team
-    team_stats = team_stats.sort_values(by = "Match_ID")
-    
-    return team_stats
+def convert_home_away_to_team_long(match_stats, feature_list):
+    # One row per team per match, with each feature split into the team's For and Against values
+    team_long_list = []
+    for location, opponent_location in [('Home', 'Away'), ('Away', 'Home')]:
+        location_stats = pd.DataFrame({
+            'Match_Index': match_stats.index,
+            'Location': location,
+            'Team': match_stats[f'{location}_Team'].to_numpy(),
+            'Match_ID': match_stats['Match_ID'].to_numpy(),
+        })
+        for feature in feature_list:
+            location_stats[f'Team_{feature}_For'] = match_stats[f'{location}_{feature}'].to_numpy()
+            location_stats[f'Team_{feature}_Against'] = match_stats[f'{opponent_location}_{feature}'].to_numpy()
+        team_long_list.append(location_stats)
+
+    team_long = pd.concat(team_long_list, axis=0, ignore_index=True)
+    team_long = team_long[team_long['Team'].isin(set(match_stats['Home_Team']))]
+
+    return team_long.sort_values(by=['Team', 'Match_ID'], kind='stable').reset_index(drop=True)
+
+def create_all_teams_rolling_features(match_stats, feature_list, spans):
+    team_long = convert_home_away_to_team_long(match_stats, feature_list)
+    team_cols = [f'Team_{feature}_{suffix}' for feature in feature_list for suffix in ['For', 'Against']]
+    team_groups = team_long.groupby('Team', sort=False)
+
+    rolling_list = []
+    for span in spans:
+        span_ewm = team_groups[team_cols].ewm(span=span).mean().reset_index(level='Team', drop=True).sort_index()
+        span_ewm = span_ewm.groupby(team_long['Team'], sort=False).shift(1)
+        span_ewm.columns = [f'{col}_ewm{span}' for col in team_cols]
+        rolling_list.append(span_ewm)
+
+    return pd.concat([team_long] + rolling_list, axis=1)
+
+def convert_team_rolling_features_to_home_away(rolling_data, feature_list, spans):
+    rolling_cols = [f'Team_{feature}_{suffix}_ewm{span}' for span in spans for feature in feature_list for suffix in ['For', 'Against']]
+    home_away_data = rolling_data.set_index(['Match_Index', 'Location'])[rolling_cols].unstack('Location')
+    home_away_data.columns = [f"{location}{col.removeprefix('Team')}" for col, location in home_away_data.columns]
+    home_away_data.index.name = None
+
+    return home_away_data.reindex(columns=[
+        f'{location}_{feature}_{suffix}_ewm{span}' for span in spans for feature in feature_list for location in ['Home', 'Away'] for suffix in ['For', 'Against']
+    ])
 
-def get_feature_ewm(data, feature_name, span):
-    
-    return data[feature_name].ewm(span=span).mean().shift(1)
-
-def create_team_rolling_feature(match_stats, team, feature_name, span):
-    team_stats = get_team_stats(match_stats, team)
-
-    is_home_game = team_stats['Home_Team'] == team
-    col_mapping = {
-        'For': ('Home', 'Away'),
-        'Against': ('Away', 'Home')
-    }
-
-    for suffix, (home_suffix, away_suffix) in col_mapping.items():
-        home_col = f'{home_suffix}_{feature_name}'
-        away_col = f'{away_suffix}_{feature_name}'
-
-        team_stats[f'Team_{feature_name}_{suffix}'] = np.where(is_home_game, team_stats[home_col], team_stats[away_col])
-
-        team_stats[f'Team_{feature_name}_{suffix}_ewm{span}'] = get_feature_ewm(team_stats, f'Team_{feature_name}_{suffix}', span)
-
-    return team_stats
-
-def create_all_teams_rolling_feature(match_stats, feature_name, span):
-
-    team_list = sorted(set(match_stats['Home_Team']))
-
-    return pd.concat([create_team_rolling_feature(match_stats, team, feature_name, span) for team in team_list], axis=0).sort_index()
+def create_all_teams_home_away_rolling_feature(match_stats, feature_name, span):
 
- 
-def convert_team_rolling_feature_to_home_away(rolling_data, feature_name, span):
+    rolling_data = create_all_teams_rolling_features(match_stats, [feature_name], [span])
+    return convert_team_rolling_features_to_home_away(rolling_data, [feature_name], [span]).reindex(match_stats.index)
 
-    rolling_match_stats = pd.DataFrame()
-    for loc in ['Home', 'Away']:
-        rename_dict = {
-            f'Team_{feature_name}_For_ewm{span}': f'{loc}_{feature_name}_For_ewm{span}',
-            f'Team_{feature_name}_Against_ewm{span}': f'{loc}_{feature_name}_Against_ewm{span}'
-        }
-        loc_data = rolling_data[rolling_data[f'{loc}_Team'] == rolling_data['Team']].rename(columns=rename_dict)
-        rolling_match_stats = pd.concat([rolling_match_stats, loc_data], axis=1)
+def create_team_rolling_features(match_stats, feature_list, span):
 
-    return rolling_match_stats[[f'Home_{feature_name}_For_ewm{span}', f'Home_{feature_name}_Against_ewm{span}', f'Away_{feature_name}_For_ewm{span}', f'Away_{feature_name}_Against_ewm{span}']]
+    spans = list(span) if isinstance(span, (list, tuple)) else [span]
+    rolling_data = create_all_teams_rolling_features(match_stats, feature_list, spans)
+    home_away_data = convert_team_rolling_features_to_home_away(rolling_data, feature_list, spans)
 
-def create_all_teams_home_away_rolling_feature(match_stats, feature_name, span):
-    
-    rolling_data = create_all_teams_rolling_feature(match_stats, feature_name, span)
-    return convert_team_rolling_feature_to_home_away(rolling_data, feature_name, span)
-    
-def create_team_rolling_features(match_stats, feature_list, span):
-    
-    for feature in feature_list:
-        match_stats[
-            [
-                f'Home_{feature}_For_ewm{span}',
-                f'Home_{feature}_Against_ewm{span}',
-                f'Away_{feature}_For_ewm{span}',
-                f'Away_{feature}_Against_ewm{span}',
-            ]
-        ] = create_all_teams_home_away_rolling_feature(
-            match_stats, feature_name=feature, span=span
-        )
+    match_stats[list(home_away_data)] = home_away_data.reindex(match_stats.index)
 
-    return match_stats
\ No newline at end of file
+    return match_stats
@@ -1,6 +1,7 @@
 import pandas as pd
-from AFLPy.AFLData_Client import load_data
+from afl_match_outcome_model.data_preparation.data_cache import load_data
 from afl_match_outcome_model.data_preparation.match_id_utils import get_home_team_from_match_id, get_away_team_from_match_id
+from afl_match_outcome_model.data_preparation.player_feature_store import PlayerFeatureStore
 
 def get_squad_list_from_match_id(ID):
     """
@@ -54,7 +55,7 @@ def get_latest_squad_player_stats(match_id, player_stats, numeric_stats):
 
     Args:
         match_id: The match ID.
-        player_stats: A DataFrame containing the player statistics.
+        player_stats: A DataFrame containing the player statistics, or a PlayerFeatureStore to read each squad player's latest row from.
         numeric_stats: A list of numeric statistics to retrieve.
 
     Returns:
@@ -71,6 +72,11 @@ def get_latest_squad_player_stats(match_id, player_stats, numeric_stats):
     home_team = get_home_team_from_match_id(match_id=match_id)
     away_team = get_away_team_from_match_id(match_id=match_id)
 
+    if isinstance(player_stats, PlayerFeatureStore):
+        latest_home_stats = player_stats.get_latest_features([home_team] * len(home_squad), home_squad, numeric_stats).drop(columns='Team')
+        latest_away_stats = player_stats.get_latest_features([away_team] * len(away_squad), away_squad, numeric_stats).drop(columns='Team')
+        return latest_home_stats.sort_values(by='Player').reset_index(drop=True), latest_away_stats.sort_values(by='Player').reset_index(drop=True)
+
     home_player_stats = player_stats[(player_stats['Team'] == home_team)][['Match_ID', 'Player'] + numeric_stats]
     away_player_stats = player_stats[(player_stats['Team'] == away_team)][['Match_ID', 'Player'] + numeric_stats]
 
@@ -110,6 +116,72 @@ def aggregate_player_stats_by_match_squad(match_id, player_stats, numeric_stats)
     return new_squad_team_stats
 
 
+def get_match_squad_players(squads, match_ids):
+    """
+    Retrieves the home and away squad players for each of the given match IDs from the preloaded team positions.
+
+    Args:
+        squads: A DataFrame containing the team positions for all matches, with Match_ID, Team and Player columns.
+        match_ids: A list of match IDs.
+
+    Returns:
+        A DataFrame with one row per squad player per match, with Match_ID, Home_Away, Team and Player columns.
+
+    Examples:
+        squad_players = get_match_squad_players(squads_df, ["AFL_2023_F4_Collingwood_Brisbane"])
+    """
+    match_teams = pd.DataFrame({'Match_ID': list(match_ids)})
+    match_teams['Home'] = match_teams['Match_ID'].map(get_home_team_from_match_id)
+    match_teams['Away'] = match_teams['Match_ID'].map(get_away_team_from_match_id)
+    match_teams = match_teams.melt(id_vars='Match_ID', value_vars=['Home', 'Away'], var_name='Home_Away', value_name='Team')
+
+    squad_players = squads[['Match_ID', 'Team', 'Player']].drop_duplicates()
+
+    return match_teams.merge(squad_players, how="inner", on=['Match_ID', 'Team'])
+
+def aggregate_player_stats_by_squads(squads, player_stats, numeric_stats, match_ids):
+    """
+    Aggregates the latest player statistics by match squad for all of the given match IDs at once.
+
+    Equivalent to calling aggregate_player_stats_by_match_squad for each match ID, but joins the preloaded
+    team positions against the latest row per (Team, Player) and sums per (Match_ID, Home_Away) in one groupby.
+
+    Args:
+        squads: A DataFrame containing the team positions for all matches, with Match_ID, Team and Player columns.
+        player_stats: A DataFrame containing the player statistics, or a PlayerFeatureStore to read each squad player's latest row from.
+        numeric_stats: A list of numeric statistics to aggregate.
+        match_ids: A list of match IDs.
+
+    Returns:
+        A DataFrame containing the aggregated squad team statistics, one row per match ID.
+
+    Examples:
+        squad_team_stats = aggregate_player_stats_by_squads(squads_df, player_stats_df, ['Goals', 'Player_Rating_Points'], match_ids)
+    """
+    squad_players = get_match_squad_players(squads, match_ids)
+    if isinstance(player_stats, PlayerFeatureStore):
+        latest_player_stats = player_stats.get_latest_features(squad_players['Team'], squad_players['Player'], numeric_stats).drop_duplicates(subset=['Team', 'Player'])
+    else:
+        latest_player_stats = player_stats.groupby(['Team', 'Player'])[numeric_stats].last().reset_index()
+
+    squad_player_stats = squad_players.merge(latest_player_stats, how="inner", on=['Team', 'Player'])
+    squad_team_stats = squad_player_stats.groupby(['Match_ID', 'Home_Away'])[numeric_stats].sum().unstack('Home_Away', fill_value=0.0)
+    squad_team_stats = squad_team_stats.reindex(
+        index=pd.Index(list(match_ids), name='Match_ID'),
+        columns=pd.MultiIndex.from_product([numeric_stats, ['Home', 'Away']]),
+        fill_value=0.0
+    )
+
+    new_squad_team_stats = pd.DataFrame({'Match_ID': list(match_ids)})
+    for home_away in ['Home', 'Away']:
+        for col in numeric_stats:
+            new_squad_team_stats[f'{home_away}_{col}_Squad_sum'] = squad_team_stats[(col, home_away)].to_numpy()
+
+    for col in numeric_stats:
+        new_squad_team_stats[f'{col}_Squad_sum_diff'] = new_squad_team_stats[f'Home_{col}_Squad_sum'] - new_squad_team_stats[f'Away_{col}_Squad_sum']
+
+    return new_squad_team_stats
+
 def get_squad_stats(matches, player_stats):
     """
     Retrieves the squad statistics for each match in the given matches DataFrame.
@@ -137,10 +209,7 @@ def get_squad_stats(matches, player_stats):
     match_id_history = sorted(list(squads['Match_ID'].unique()))
     match_id_history_post_2020 = [x for x in match_id_history if int(x.split("_")[1]) > 2020]
 
-    match_squad_player_stats_list = [aggregate_player_stats_by_match_squad(match_id, player_stats, numeric_stats) for
-                                     match_id in match_id_history_post_2020]
-
-    match_squad_player_stats = pd.concat(match_squad_player_stats_list, axis=0)
+    match_squad_player_stats = aggregate_player_stats_by_squads(squads, player_stats, numeric_stats, match_id_history_post_2020)
     matches = matches.merge(match_squad_player_stats, how="left", on="Match_ID")
 
     return matches
@@ -1,97 +1,102 @@
 import pandas as pd
 import numpy as np
-import geopy.distance
-import re
 from sklearn.base import BaseEstimator, TransformerMixin
-from sktime.transformations.series.summarize import WindowSummarizer
+from sklearn.exceptions import NotFittedError
+from afl_match_outcome_model.data_preparation.elo import calculate_elo_probability, encode_teams, run_elo_engine, find_season_first_rounds, find_season_first_match_flags
+from afl_match_outcome_model.data_preparation.window_summarizer import GroupedWindowSummarizer, get_summarizer_windows
+from afl_match_outcome_model.data_preparation.distance import create_venue_distance_matrix, lookup_venue_distances
+from afl_match_outcome_model.data_preparation.feature_engineering import parse_scores, score_columns
+from afl_match_outcome_model.data_preparation.match_id_utils import get_teams_from_match_ids, create_season_calendar, get_round_numbers
+from afl_match_outcome_model.data_preparation.pipeline_utils import get_home_away_blocks, attach_feature_block
+from afl_match_outcome_model.data_preparation.keyed_table import get_frame
 
 class YearRoundTransformer(BaseEstimator, TransformerMixin):
     def __init__(self) -> None:
         super().__init__()
         
     def fit(self, X, y = None):
+        # Last home and away round of each season, finals are numbered on from it
+        self.season_calendar = create_season_calendar(X['Match_ID'])
         return self
     
     def transform(self, X):
         
         X_transformed = X.copy()
         
-        X_transformed['Year'] = X_transformed['Match_ID'].apply(lambda x: int(x.split("_")[1]))
-        X_transformed['Round'] = X_transformed['Match_ID'].apply(lambda x: self.match_id_to_round_num(x))
-        X_transformed['YearRound'] = X_transformed.apply(lambda row: int(str(row['Year']) + str(row['Round'])), axis=1)
+        season_calendar = self.get_season_calendar(X_transformed['Match_ID'])
+        years, rounds = get_round_numbers(X_transformed['Match_ID'], season_calendar)
+        
+        X_transformed['Year'] = years
+        X_transformed['Round'] = rounds
+        X_transformed['YearRound'] = 100 * years + rounds
         
         return X_transformed
     
-    @staticmethod
-    def match_id_to_round_num(match_id):
-    
-        finals_map = {
-            2021: {
-                'F1':24,
-                'F2':25,
-                'F3':26,
-                'F4':27
-            },
-            2022: {
-                'F1':24,
-                'F2':25,
-                'F3':26,
-                'F4':27
-            },
-            2023: {
-                'F1':25,
-                'F2':26,
-                'F3':27,
-                'F4':28
-            },
-            2024:{
-                'F1':25,
-                'F2':26,
-                'F3':27,
-                'F4':28
-            }
-        }
-        
-        year, round_id = int(match_id.split("_")[1]), match_id.split("_")[2]
-        return finals_map[year][round_id] if "F" in round_id else round_id
+    def get_season_calendar(self, match_ids):
+        # Seasons in progress take their latest home and away round from either the fitted or new matches, unfitted
+        # transformers and ones pickled before the season calendar existed use the new matches alone
+        season_calendar = pd.concat([getattr(self, 'season_calendar', pd.Series(dtype=np.int64)), create_season_calendar(match_ids)])
+        return season_calendar.groupby(level=0).max()
   
 class DaysRestTransformer(BaseEstimator, TransformerMixin):
+    def __setstate__(self, state):
+        # Preprocessors pickled before the team timeline existed only kept each team's latest date
+        if 'team_timeline' not in state:
+            state['team_timeline'] = pd.DataFrame({'Team': list(state['latest_date'].keys()), 'Date': list(state['latest_date'].values())})
+        super().__setstate__(state)
+    
     def fit(self, X, y=None):
         
-        unique_teams = list(set(list(X['Home_Team'].unique()) + list(X['Away_Team'].unique())))
-        self.latest_date = {}
-        for team in unique_teams:
-            team_data = X[(X['Home_Team'] == team) | (X['Away_Team'] == team)]
-            self.latest_date[team] = team_data['Date'].max()
+        self.team_timeline = self.get_team_timeline(X)
         
         return self
     
     def transform(self, X):
     
         Xt = X.copy()
-            
-        # From the last match date, how many days
-        Xt['Home_Days_Rest'] = Xt.apply(lambda row: (row["Date"] - self.latest_date[row['Home_Team']]).days, axis=1)
-        Xt['Away_Days_Rest'] = Xt.apply(lambda row: (row["Date"] - self.latest_date[row['Away_Team']]).days, axis=1)
+        
+        # Days since each team's previous match before this one, from the fitted history and X itself, NaN for a team's first match or an unknown team
+        team_timeline = pd.concat([self.team_timeline, self.get_team_timeline(Xt)], axis=0).drop_duplicates().sort_values(by='Date', kind='stable')
+        team_dates = self.convert_home_away_to_team_dates(Xt).dropna(subset=['Date']).sort_values(by='Date', kind='stable')
+        team_dates = pd.merge_asof(team_dates, team_timeline.rename(columns={'Date': 'Previous_Date'}), left_on='Date', right_on='Previous_Date', by='Team', allow_exact_matches=False)
+        team_dates['Days_Rest'] = (team_dates['Date'] - team_dates['Previous_Date']).dt.days
+        
+        days_rest = team_dates.pivot(index='Row', columns='Location', values='Days_Rest').reindex(index=np.arange(len(Xt)), columns=['Home', 'Away'])
+        Xt['Home_Days_Rest'] = days_rest['Home'].to_numpy()
+        Xt['Away_Days_Rest'] = days_rest['Away'].to_numpy()
         
         return Xt
+    
+    @staticmethod
+    def convert_home_away_to_team_dates(X):
+        
+        return pd.DataFrame({
+            'Row': np.tile(np.arange(len(X)), 2),
+            'Location': np.repeat(['Home', 'Away'], len(X)),
+            'Team': np.concatenate([X['Home_Team'].to_numpy(dtype=object), X['Away_Team'].to_numpy(dtype=object)]),
+            'Date': np.concatenate([X['Date'].to_numpy(), X['Date'].to_numpy()]),
+        })
+    
+    def get_team_timeline(self, X):
+        
+        return self.convert_home_away_to_team_dates(X)[['Team', 'Date']].dropna().drop_duplicates().sort_values(by=['Team', 'Date']).reset_index(drop=True)
       
 class ScoreTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, score_col):
+    def __init__(self, score_col, dtype = "Int16"):
         self.score_col = score_col
+        self.dtype = dtype
+    
+    def __setstate__(self, state):
+        # Preprocessors pickled before dtype existed keep their int64 scores
+        state.setdefault('dtype', "int64")
+        super().__setstate__(state)
     
     def fit(self, X, y=None):
         return self
     
     def transform(self, X):
-        def parse_score(score):
-            home, away = score.split(' - ')
-            Home_Goals, Home_Behinds, Home_Score = map(int, home.split('.'))
-            Away_Goals, Away_Behinds, Away_Score = map(int, away.split('.'))
-            return Home_Goals, Home_Behinds, Home_Score, Away_Goals, Away_Behinds, Away_Score
-
         Xt = X.copy()
-        Xt[['Home_Goals', 'Home_Behinds', 'Home_Score', 'Away_Goals', 'Away_Behinds', 'Away_Score']] = Xt[self.score_col].apply(parse_score).tolist()
+        Xt[score_columns] = parse_scores(Xt[self.score_col], dtype=self.dtype)
              
         return Xt
     
@@ -110,108 +115,137 @@ class WinTransformer(BaseEstimator, TransformerMixin):
         return self
     def transform(self, X):
         Xt = X.copy() 
-        Xt['Home_Win'] = np.where(Xt['Home_Margin'] > 0, 1, 0)
-        Xt['Away_Win'] = np.where(Xt['Away_Margin'] > 0, 1, 0)
+        Xt['Home_Win'] = np.where((Xt['Home_Margin'] > 0).fillna(False), 1, 0)
+        Xt['Away_Win'] = np.where((Xt['Away_Margin'] > 0).fillna(False), 1, 0)
         return Xt
         
 class ELOTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, k_factor=32, initial_rating = 1500, expected = False):
+    def __init__(self, k_factor=32, initial_rating = 1500, expected = False, warm_start = False, season_regression = 0.5):
         self.k_factor = k_factor
         self.initial_rating = initial_rating
         self.expected = expected
+        self.warm_start = warm_start
+        self.season_regression = season_regression
+    
+    def __setstate__(self, state):
+        # Preprocessors pickled before warm_start and season_regression existed keep their original behaviour
+        state.setdefault('warm_start', False)
+        state.setdefault('season_regression', 0.5)
+        super().__setstate__(state)
+        # Preprocessors pickled before the ELO table existed kept per match dicts of ratings and probabilities
+        if 'elo_table' not in state and 'elos' in state:
+            self._convert_elo_dicts_to_elo_table()
+
+    def _convert_elo_dicts_to_elo_table(self):
+        # The dicts are in fit order, the margins were not kept, so a warm start first refits in full
+        match_ids = list(self.elos.keys())
+        elos, elo_probs = np.array(list(self.elos.values()), dtype=np.float64).reshape(-1, 2), np.array([self.elo_probs[match_id] for match_id in match_ids], dtype=np.float64).reshape(-1, 2)
+        self.elo_table = self._convert_elo_arrays_to_dataframe(match_ids, elos[:, 0], elos[:, 1], elo_probs[:, 0])
+        self.fitted_margins = pd.Series(np.nan, index=pd.Index(match_ids, name='Match_ID'), dtype=np.float64)
+        if match_ids:
+            self.last_match_id = match_ids[-1]
+        del self.elos, self.elo_probs
         
     @staticmethod
     def find_season_first_matches_by_year(data):
-
+        
         team_season_first_matches = {}
-        for team in list(data['Home_Team'].unique()):
-            team_matches = data[(data['Home_Team'] == team) | (data['Away_Team'] == team)]
-            team_matches['Team'] = team
-            team_season_first_matches[team] = team_matches.groupby('Year').first()['Round'].to_dict()
+        for (team, year), round_num in find_season_first_rounds(data).items():
+            team_season_first_matches.setdefault(team, {})[year] = round_num
             
         return team_season_first_matches
                 
     def fit(self, X, y=None):
+        if self.warm_start and self._can_partial_fit(X):
+            return self.partial_fit(X)
+        
         self.elo_dict = {team: self.initial_rating for team in X['Home_Team'].unique()}
         self.team_season_first_matches = self.find_season_first_matches_by_year(X)
-        elos, elo_probs = self._calculate_elo_ratings(X)
-        self.elos = elos
-        self.elo_probs = elo_probs
+        self.elo_table = self._calculate_elo_ratings(X)
+        self.fitted_margins = self._get_match_margins(X)
+        self.last_match_id = X['Match_ID'].iloc[-1]
         return self
+    
+    def partial_fit(self, X, y=None):
+        # Continues from the checkpoint (last_match_id, elo_dict, team_season_first_matches), skipping already fitted matches
+        if not hasattr(self, 'last_match_id'):
+            return self.fit(X)
+        if not self._can_partial_fit(X):
+            raise ValueError(f"ELOTransformer can only fold in unchanged history followed by matches after {self.last_match_id}, refit with fit instead.")
+        
+        new_matches = X[~X['Match_ID'].isin(self.fitted_margins.index)]
+        if new_matches.empty:
+            return self
+        
+        for team, seasons in self.find_season_first_matches_by_year(new_matches).items():
+            team_season_first_matches = self.team_season_first_matches.setdefault(team, {})
+            for year, round_num in seasons.items():
+                team_season_first_matches.setdefault(year, round_num)
+        
+        new_elo_table = self._calculate_elo_ratings(new_matches)
+        self.elo_table = pd.concat([self.elo_table, new_elo_table], axis=0)
+        self.fitted_margins = pd.concat([self.fitted_margins, self._get_match_margins(new_matches)], axis=0)
+        self.last_match_id = new_matches['Match_ID'].iloc[-1]
+        return self
+    
+    def _can_partial_fit(self, X):
+        if not hasattr(self, 'last_match_id'):
+            return False
+        
+        is_fitted = X['Match_ID'].isin(self.fitted_margins.index)
+        if (X.loc[~is_fitted, 'Match_ID'] <= self.last_match_id).any():
+            return False
+        
+        margins = self._get_match_margins(X[is_fitted])
+        return np.array_equal(margins.to_numpy(), self.fitted_margins.reindex(margins.index).to_numpy(), equal_nan=True)
+    
+    def _get_match_margins(self, data):
+        margins = data['Home_xScore_sum_Margin'] if self.expected else data['Margin']
+        margins = pd.Series(margins.to_numpy(dtype=np.float64), index=pd.Index(data['Match_ID'], name='Match_ID'))
+        return margins[~margins.index.duplicated(keep='last')]
 
     def transform(self, X):
-        X_elos, X_elo_probs = {}, {}
-        for index, row in X.iterrows():
-            match_id = row['Match_ID']
-            if match_id in list(self.elos.keys()):
-                X_elos[match_id] = self.elos[match_id]
-                X_elo_probs[match_id] = self.elo_probs[match_id]
-            else:
-                home_team, away_team = self.get_home_team_from_match_id(match_id), self.get_away_team_from_match_id(match_id)
-                X_elos[match_id] = [self.elo_dict[home_team], self.elo_dict[away_team]]
-                
-                home_elo_probs = self._calculate_elo_probability(self.elo_dict[home_team], self.elo_dict[away_team])
-                X_elo_probs[match_id] = [home_elo_probs, 1-home_elo_probs]
-                
-        new_elo_df, new_elo_probs_df = self._convert_elo_dict_to_dataframe(X_elos, X_elo_probs)
-        return self._merge_elo_ratings(X, new_elo_df, new_elo_probs_df)
-    
-    def _calculate_elo_probability(self, home_team_elo, away_team_elo):
-        return 1 / (1 + 10 ** ((away_team_elo - home_team_elo) / 400))
-
-    def _calculate_elo(self, home_team_elo, away_team_elo, margin):
-        prob_win_home = self._calculate_elo_probability(home_team_elo, away_team_elo)
-        score_diff = 1 if margin > 0 else 0.5 if margin == 0 else 0
-        new_home_team_elo = home_team_elo + self.k_factor * (score_diff - prob_win_home)
-        new_away_team_elo = away_team_elo + self.k_factor * ((1 - score_diff) - (1 - prob_win_home))
-        return new_home_team_elo, new_away_team_elo
-
-    def _calculate_elo_for_row(self, row):
-        game_id, year, round_num, home_team, away_team = row['Match_ID'], row['Year'], row['Round'], row['Home_Team'], row['Away_Team']
-        margin = row['Home_xScore_sum_Margin'] if self.expected else row['Margin']
-        home_team_elo, away_team_elo = self.elo_dict[home_team], self.elo_dict[away_team]
-        
-        if self.team_season_first_matches[home_team][year] == round_num:
-            home_team_elo = 0.5*1500 + home_team_elo*0.5 
-        if self.team_season_first_matches[away_team][year] == round_num:
-            away_team_elo = 0.5*1500 + away_team_elo*0.5 
-            
-        self.elo_dict[home_team], self.elo_dict[away_team] = self._calculate_elo(home_team_elo, away_team_elo, margin)
-        return game_id, [home_team_elo, away_team_elo], [self._calculate_elo_probability(home_team_elo, away_team_elo), 1 - self._calculate_elo_probability(home_team_elo, away_team_elo)]
+        match_ids = pd.Index(X['Match_ID'].unique(), name='Match_ID')
+        X_elo_table = self.elo_table.reindex(match_ids)
+        
+        # Fixtures that have not been fitted yet are rated from the latest ELO ratings
+        unseen_match_ids = match_ids[~match_ids.isin(self.elo_table.index)]
+        if len(unseen_match_ids) > 0:
+            home_teams, away_teams = get_teams_from_match_ids(unseen_match_ids)
+            elo_ratings = pd.Series(self.elo_dict, dtype=np.float64)
+            home_elos, away_elos = elo_ratings.loc[home_teams].to_numpy(), elo_ratings.loc[away_teams].to_numpy()
+            home_elo_probs = calculate_elo_probability(home_elos, away_elos)
+            X_elo_table.loc[unseen_match_ids] = np.column_stack([home_elos, away_elos, home_elo_probs, 1 - home_elo_probs])
+        
+        return pd.merge(X, X_elo_table.reset_index(), how='left', on='Match_ID')
 
-    def _calculate_elo_ratings(self, data):
-        elos, elo_probs = {}, {}
+    def _find_season_first_match_flags(self, data):
+        # Seasons started in an earlier fit keep the first round recorded then
+        season_first_rounds = pd.Series({(team, year): round_num for team, seasons in self.team_season_first_matches.items() for year, round_num in seasons.items()}, dtype=object)
+        
+        return find_season_first_match_flags(data, season_first_rounds)
 
-        for _, row in data.iterrows():
-            game_id, elos_game, elo_probs_game = self._calculate_elo_for_row(row)
-            elos[game_id] = elos_game
-            elo_probs[game_id] = elo_probs_game
+    def _calculate_elo_ratings(self, data):
+        
+        home_codes, away_codes, teams = encode_teams(data['Home_Team'], data['Away_Team'], teams=self.elo_dict.keys())
+        ratings = np.array([self.elo_dict.get(team, self.initial_rating) for team in teams], dtype=np.float64)
+        home_first, away_first = self._find_season_first_match_flags(data)
+        margins = data['Home_xScore_sum_Margin'] if self.expected else data['Margin']
+        
+        home_elos, away_elos, home_probs = run_elo_engine(home_codes, away_codes, margins.to_numpy(dtype=np.float64), ratings, self.k_factor,
+                                                          home_regress=home_first, away_regress=away_first, season_regression=self.season_regression)
+        self.elo_dict.update(zip(teams, ratings.tolist()))
 
-        return elos, elo_probs
+        return self._convert_elo_arrays_to_dataframe(data['Match_ID'], home_elos, away_elos, home_probs)
 
-    def _convert_elo_dict_to_dataframe(self, elos, elo_probs):
+    def _convert_elo_arrays_to_dataframe(self, match_ids, home_elos, away_elos, home_probs):
         elo_columns = ['Home_xELO', 'Away_xELO'] if self.expected else ['Home_ELO', 'Away_ELO']
         elo_probs_columns = ['Home_xELO_probs', 'Away_xELO_probs'] if self.expected else ['Home_ELO_probs', 'Away_ELO_probs']
         
-        elo_df = pd.DataFrame.from_dict(elos, orient='index', columns=elo_columns).rename_axis('Match_ID').reset_index()
-        elo_probs_df = pd.DataFrame.from_dict(elo_probs, orient='index', columns=elo_probs_columns).rename_axis('Match_ID').reset_index()
+        elo_table = pd.DataFrame(dict(zip(elo_columns + elo_probs_columns, [home_elos, away_elos, home_probs, 1 - home_probs])), index=pd.Index(match_ids, name='Match_ID'))
         
-        return elo_df, elo_probs_df
+        return elo_table[~elo_table.index.duplicated(keep='last')]
 
-    def _merge_elo_ratings(self, X, elo_df, elo_probs_df):
-        X = pd.merge(X, elo_df, how='left', on='Match_ID')
-        X = pd.merge(X, elo_probs_df, how='left', on='Match_ID')
-        return X
-    
-    @staticmethod
-    def get_home_team_from_match_id(match_id):
-
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[3])
-
-    @staticmethod
-    def get_away_team_from_match_id(match_id):
-        
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[4]) 
 
 class VenueInfoMerger(BaseEstimator, TransformerMixin):
     def __init__(self, venue_info, home_info, away_info):
@@ -219,15 +253,22 @@ class VenueInfoMerger(BaseEstimator, TransformerMixin):
         self.home_info = home_info
         self.away_info = away_info        
 
+    def __setstate__(self, state):
+        # Preprocessors pickled before the venue distance matrix existed
+        if 'venue_distance_matrix' not in state:
+            state['venue_distance_matrix'] = create_venue_distance_matrix(state['venue_info'])
+        super().__setstate__(state)
+
     def fit(self, X, y=None):
+        self.venue_distance_matrix = create_venue_distance_matrix(self.venue_info)
         return self
 
     def transform(self, X):
         X_venue = self.merge_venue_info(X)
         X_home_away_venue =  self.merge_home_away_venue(X_venue)
         
-        X_home_away_venue['Home_Distance_Travelled'] = X_home_away_venue.apply(lambda x: geopy.distance.geodesic((x['Venue_Latitude'], x['Venue_Longitude']), (x['Home_Team_Venue_Latitude'], x['Home_Team_Venue_Longitude'])).km, axis=1)
-        X_home_away_venue['Away_Distance_Travelled'] = X_home_away_venue.apply(lambda x: geopy.distance.geodesic((x['Venue_Latitude'], x['Venue_Longitude']), (x['Away_Team_Venue_Latitude'], x['Away_Team_Venue_Longitude'])).km, axis=1)
+        X_home_away_venue['Home_Distance_Travelled'] = lookup_venue_distances(self.venue_distance_matrix, X_home_away_venue['Venue'], X_home_away_venue['Home_Team_Venue'])
+        X_home_away_venue['Away_Distance_Travelled'] = lookup_venue_distances(self.venue_distance_matrix, X_home_away_venue['Venue'], X_home_away_venue['Away_Team_Venue'])
         
         return X_home_away_venue
     
@@ -269,8 +310,7 @@ class TeamStatsAggregator(BaseEstimator, TransformerMixin):
         aggregated_stats.columns = [f'{self.column}_{self.stat}']
         aggregated_stats = aggregated_stats.reset_index()
         
-        aggregated_stats['Home_Team'] = aggregated_stats['Match_ID'].apply(lambda match_id: self.get_home_team_from_match_id(match_id))
-        aggregated_stats['Away_Team'] = aggregated_stats['Match_ID'].apply(lambda match_id: self.get_away_team_from_match_id(match_id))
+        aggregated_stats['Home_Team'], aggregated_stats['Away_Team'] = get_teams_from_match_ids(aggregated_stats['Match_ID'])
         aggregated_stats['HomeAway'] = np.where(aggregated_stats['Team'] == aggregated_stats['Home_Team'], f'Home_{self.column}_{self.stat}', f'Away_{self.column}_{self.stat}')
 
         aggregated_stats = aggregated_stats.pivot_table(index = "Match_ID", values=f'{self.column}_{self.stat}', columns='HomeAway').reset_index()
@@ -280,35 +320,80 @@ class TeamStatsAggregator(BaseEstimator, TransformerMixin):
         aggregated_stats[f'Away_{self.column}_{self.stat}_Margin'] = aggregated_stats[f'Away_{self.column}_{self.stat}'] - aggregated_stats[f'Home_{self.column}_{self.stat}']
         
         return aggregated_stats
-    
-    @staticmethod
-    def get_home_team_from_match_id(match_id):
-    
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[3])
-
-    @staticmethod
-    def get_away_team_from_match_id(match_id):
-        
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[4])   
         
 class ExpectedMerger(BaseEstimator, TransformerMixin):
-    def __init__(self, expected_score, expected_vaep):
+    def __init__(self, expected_score = None, expected_vaep = None, xscore_team_sum = None, xvaep_team_sum = None):
+        # Chain level data, or per match team sums of it, for each expected stat. Chain level data takes precedence
         self.expected_score = expected_score
         self.expected_vaep = expected_vaep
+        self.xscore_team_sum = xscore_team_sum
+        self.xvaep_team_sum = xvaep_team_sum
+
+    def __setstate__(self, state):
+        # Preprocessors pickled before the team sums were parameters kept their sums, fitted, under the parameter names
+        if 'fitted_xscore_team_sum' not in state and state.get('xscore_team_sum') is not None:
+            state['fitted_xscore_team_sum'] = state['xscore_team_sum']
+        if 'fitted_xvaep_team_sum' not in state and state.get('xvaep_team_sum') is not None:
+            state['fitted_xvaep_team_sum'] = state['xvaep_team_sum']
+        super().__setstate__(state)
 
     def fit(self, X, y=None):
         
-        xscore_aggregator = TeamStatsAggregator(groupby_column=['Match_ID','Team'], stat='sum', column='xScore')
-        self.xscore_team_sum = xscore_aggregator.fit_transform(self.expected_score)
+        xscore_team_sum = self.get_team_sum(self.expected_score, self.xscore_team_sum, 'xScore')
+        xvaep_team_sum = self.get_team_sum(self.expected_vaep, self.xvaep_team_sum, 'exp_vaep_value')
+        if xscore_team_sum is None or xvaep_team_sum is None:
+            raise ValueError("ExpectedMerger needs chain level data or team sums of both xScore and exp_vaep_value.")
         
-        xvaep_aggregator = TeamStatsAggregator(groupby_column=['Match_ID','Team'], stat='sum', column='exp_vaep_value')
-        self.xvaep_team_sum = xvaep_aggregator.fit_transform(self.expected_vaep)
+        self.fitted_xscore_team_sum, self.fitted_xvaep_team_sum = xscore_team_sum, xvaep_team_sum
         
         return self
 
     def transform(self, X):
-        X_score = X.merge(self.xscore_team_sum, how = "left", on = "Match_ID")
-        return X_score.merge(self.xvaep_team_sum, how = "left", on = "Match_ID")
+        if not hasattr(self, 'fitted_xscore_team_sum') or not hasattr(self, 'fitted_xvaep_team_sum'):
+            raise NotFittedError("ExpectedMerger is not fitted yet, call fit first.")
+        
+        X_score = X.merge(self.fitted_xscore_team_sum, how = "left", on = "Match_ID")
+        return X_score.merge(self.fitted_xvaep_team_sum, how = "left", on = "Match_ID")
+    
+    def update_expected_data(self, expected_score = None, expected_vaep = None):
+        
+        # Each Match_ID in the new chain level data is re-aggregated into the team sum parameters, appending new matches
+        # and replacing corrected ones. The chain level parameters are folded into the sums, so pickles only carry the sums
+        if expected_score is not None:
+            self.xscore_team_sum = self.update_team_sum(self.get_team_sum(self.expected_score, self.xscore_team_sum, 'xScore'), expected_score, 'xScore')
+            self.expected_score = None
+        if expected_vaep is not None:
+            self.xvaep_team_sum = self.update_team_sum(self.get_team_sum(self.expected_vaep, self.xvaep_team_sum, 'exp_vaep_value'), expected_vaep, 'exp_vaep_value')
+            self.expected_vaep = None
+        
+        # A fitted merger uses the updated sums straight away, as a refit would
+        if hasattr(self, 'fitted_xscore_team_sum'):
+            self.fit(None)
+        
+        return self
+    
+    @staticmethod
+    def get_team_sum(data, team_sum, column):
+        
+        if data is not None:
+            return TeamStatsAggregator(groupby_column=['Match_ID','Team'], stat='sum', column=column).fit_transform(data)
+        
+        return team_sum
+    
+    @staticmethod
+    def update_team_sum(team_sum, data, column):
+        
+        if data.empty:
+            return team_sum
+        
+        aggregator = TeamStatsAggregator(groupby_column=['Match_ID','Team'], stat='sum', column=column)
+        new_team_sum = aggregator.fit_transform(data)
+        if team_sum is None:
+            return new_team_sum
+        
+        team_sum = team_sum[~team_sum['Match_ID'].isin(new_team_sum['Match_ID'])]
+        
+        return pd.concat([team_sum, new_team_sum], axis = 0).sort_values(by = 'Match_ID').reset_index(drop = True)
 
 class PastPerformanceTransformer(BaseEstimator, TransformerMixin):
     def __init__(self, target_cols, window_summarizer_kwargs = None, for_against = "For") -> None:
@@ -317,7 +402,7 @@ class PastPerformanceTransformer(BaseEstimator, TransformerMixin):
         if window_summarizer_kwargs is None:
             window_summarizer_kwargs = {}
         self.window_summarizer_kwargs = window_summarizer_kwargs
-        self.window_summarizer = WindowSummarizer(**self.window_summarizer_kwargs, target_cols=self.target_cols)
+        self.window_summarizer = GroupedWindowSummarizer(**self.window_summarizer_kwargs, target_cols=self.target_cols)
         
         self.for_against = for_against
         
@@ -357,24 +442,28 @@ class PastPerformanceTransformer(BaseEstimator, TransformerMixin):
         )
         
     def convert_home_away_to_team_opp(self, match_summary):
-        team_opp_data_list = [self.convert_home_away_to_team_opp_single_team(match_summary, team) for team in list(set(list(match_summary['Home_Team'].unique()) + list(match_summary['Away_Team'].unique())))]
-        return pd.concat(team_opp_data_list, axis=0).set_index(['Team', 'YearRound']).sort_index()
+        # Every match once from the home team's view and once from the away team's, as convert_home_away_to_team_opp_single_team does for each team
+        home_data = match_summary.copy()
+        home_data.columns = [x.replace("Home_Team", "Team").replace("Home", "Team").replace("Away_Team", "Opponent").replace("Away", "Opponent") for x in home_data.columns]
+        home_data['Home'] = 1
 
-    @staticmethod
-    def get_home_team_from_match_id(match_id):
-    
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[3])
+        away_data = match_summary.copy()
+        away_data.columns = [x.replace("Home_Team", "Opponent").replace("Home", "Opponent").replace("Away_Team", "Team").replace("Away", "Team") for x in away_data.columns]
+        away_data['Home'] = 0
+        if 'Margin' in list(away_data):
+            away_data['Margin'] = -1*away_data['Margin']
 
-    @staticmethod
-    def get_away_team_from_match_id(match_id):
-        
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[4])
+        return (
+            pd.concat([home_data, away_data], axis=0)
+            .sort_values(by="Match_ID", kind="stable")
+            .set_index(['Team', 'YearRound'])
+            .sort_index(kind="stable")
+        )
 
     def convert_team_opp_to_home_away(self, team_opp_data):
         
         team_opp_data = team_opp_data.reset_index(drop = False).sort_values(by = 'Match_ID')
-        team_opp_data['Home_Team'] = team_opp_data['Match_ID'].apply(lambda match_id: self.get_home_team_from_match_id(match_id))
-        team_opp_data['Away_Team'] = team_opp_data['Match_ID'].apply(lambda match_id: self.get_away_team_from_match_id(match_id))
+        team_opp_data['Home_Team'], team_opp_data['Away_Team'] = get_teams_from_match_ids(team_opp_data['Match_ID'])
         
         home_data = team_opp_data[team_opp_data['Team'] == team_opp_data['Home_Team']]
         home_data = home_data.drop(columns=['Team'])
@@ -394,7 +483,7 @@ class PastPerformanceTransformer(BaseEstimator, TransformerMixin):
         return home_away_data
 
 class SquadPerformanceTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, squads, expected_score, expected_vaep, target_cols, window_summarizer_kwargs = None) -> None:
+    def __init__(self, squads, expected_score, expected_vaep, target_cols, window_summarizer_kwargs = None, dtype = "float32", feature_store = None) -> None:
         super().__init__()
         self.squads = squads
         self.expected_score = expected_score
@@ -403,40 +492,89 @@ class SquadPerformanceTransformer(BaseEstimator, TransformerMixin):
         if window_summarizer_kwargs is None:
             window_summarizer_kwargs = {}
         self.window_summarizer_kwargs = window_summarizer_kwargs
-        self.window_summarizer = WindowSummarizer(**self.window_summarizer_kwargs, target_cols=self.target_cols)
+        self.window_summarizer = GroupedWindowSummarizer(**self.window_summarizer_kwargs, target_cols=self.target_cols)
         self.yearround = YearRoundTransformer()
+        self.dtype = dtype
+        self.feature_store = feature_store
+    
+    def __setstate__(self, state):
+        # Preprocessors pickled before the player features were materialised in fit keep float64 features
+        state.setdefault('dtype', "float64")
+        state.setdefault('feature_store', None)
+        super().__setstate__(state)
+        if 'player_features' not in state and hasattr(self.window_summarizer, 'fitted_data'):
+            self.player_features = self.create_player_features(self.get_expected_squads())
                 
     def fit(self, X, y=None):
         
-        X_squads = self.aggregate_expected_squads()
-        X_squads = self.yearround.fit_transform(X_squads).set_index(['Player', 'YearRound']).sort_index()
-        X_squads = X_squads[~X_squads.index.duplicated()]
+        X_squads = self.get_expected_squads()
+        if self.feature_store is None:
+            self.window_summarizer.fit(X_squads[self.target_cols])
+        else:
+            # fit only reads the store, which update_feature_store writes to
+            self.check_feature_store(X_squads)
         
-        self.window_summarizer.fit(X_squads[self.target_cols])
+        # Every squad player's windowed features are computed once, transform only sums the requested squads
+        self.player_features = self.create_player_features(X_squads)
         
         return self
     
     def transform(self, X):
         
+        feature_cols = [x for x in self.player_features if x not in ['Match_ID', 'Team', 'Player']]
+        X_players = self.player_features[self.player_features['Match_ID'].isin(X['Match_ID'])]
+        X_players = X_players[['Match_ID', 'Team']].astype(object).join(X_players[feature_cols].astype(np.float64))
+        
+        X_squads_home_away = self.convert_squad_team_to_home_away(X_players)
+    
+        return X.merge(X_squads_home_away, how = "left", on = ['Match_ID', 'Home_Team', 'Away_Team'])
+    
+    def update_feature_store(self):
+        # Upserts every squad player row into the feature store and deletes the rows no longer in the squad data
+        self.check_feature_store()
+        X_squads = self.get_expected_squads()
+        self.feature_store.update(X_squads[['Match_ID', 'Team'] + self.target_cols], delete_missing=True)
+        
+        return self
+    
+    def check_feature_store(self, X_squads=None):
+        # The store must summarise the same columns with the same windows as window_summarizer_kwargs, and be up to date with X_squads
+        if get_summarizer_windows(self.feature_store.lag_feature) != get_summarizer_windows(self.window_summarizer_kwargs.get('lag_feature')) or list(self.feature_store.target_cols) != list(self.target_cols):
+            raise ValueError("The feature store lag_feature and target_cols must match window_summarizer_kwargs and target_cols.")
+        if X_squads is not None and not self.feature_store.get_changed_rows(X_squads[['Match_ID', 'Team'] + self.target_cols]).empty:
+            raise ValueError("The feature store is behind the squad data, call update_feature_store before fit.")
+    
+    def get_expected_squads(self):
+        
         X_squads = self.aggregate_expected_squads()
         X_squads = self.yearround.fit_transform(X_squads).set_index(['Player', 'YearRound']).sort_index()
-        X_squads = X_squads[~X_squads.index.duplicated()]
-
-        X_squads_transformed = self.window_summarizer.transform(X_squads[self.target_cols])
-        X_squads_transformed.columns = [f'Team_Squad_{x}' for x in X_squads_transformed]
-        X_squads_transformed = X_squads_transformed.merge(X_squads[['Match_ID', 'Team']], how = "left", left_index=True, right_index=True).reset_index(drop = False)
-        X_squads_transformed = X_squads_transformed.drop(columns=['YearRound'])
         
-        X_squads_home_away = self.convert_squad_team_to_home_away(X_squads_transformed)
+        return X_squads[~X_squads.index.duplicated()]
     
-        return X.merge(X_squads_home_away, how = "left", on = ['Match_ID', 'Home_Team', 'Away_Team'])
+    def create_player_features(self, X_squads):
+        
+        if self.feature_store is None:
+            X_squads_transformed = self.window_summarizer.transform(X_squads[self.target_cols])
+        else:
+            X_squads_transformed = self.feature_store.get_features(X_squads.index)
+        X_squads_transformed.columns = [f'Team_Squad_{x}' for x in X_squads_transformed]
+        
+        # Compact storage, categorical codes for the repeated names and dtype (float32 by default) features
+        player_features = pd.DataFrame({
+            'Match_ID': pd.Categorical(X_squads['Match_ID']),
+            'Team': pd.Categorical(X_squads['Team']),
+            'Player': pd.Categorical(X_squads.index.get_level_values('Player')),
+            })
+        
+        return player_features.join(pd.DataFrame(X_squads_transformed.to_numpy(dtype=self.dtype), columns=X_squads_transformed.columns))
 
     def aggregate_expected_squads(self):
         
-        player_expected_score = self.expected_score.groupby(['Match_ID', 'Team', 'Player']).sum()[['xScore']].reset_index()
-        player_expected_vaep = self.expected_vaep.groupby(['Match_ID', 'Team', 'Player']).sum()[['exp_vaep_value']].reset_index()
+        # squads, expected_score and expected_vaep may be DataFrames or the KeyedTables update_preprocessor upserts into
+        player_expected_score = get_frame(self.expected_score).groupby(['Match_ID', 'Team', 'Player']).sum()[['xScore']].reset_index()
+        player_expected_vaep = get_frame(self.expected_vaep).groupby(['Match_ID', 'Team', 'Player']).sum()[['exp_vaep_value']].reset_index()
 
-        squads_xscore = self.squads.merge(player_expected_score, how = "left", on = ['Match_ID', 'Team', 'Player'])
+        squads_xscore = get_frame(self.squads).merge(player_expected_score, how = "left", on = ['Match_ID', 'Team', 'Player'])
         expected_squads = squads_xscore.merge(player_expected_vaep, how = "left", on = ['Match_ID', 'Team', 'Player'])
         
         expected_squads[['xScore', 'exp_vaep_value']] = expected_squads[['xScore', 'exp_vaep_value']].fillna(0)
@@ -445,25 +583,24 @@ class SquadPerformanceTransformer(BaseEstimator, TransformerMixin):
     
     @staticmethod
     def reset_squads_index(expected_squads):
-        return pd.concat([expected_squads[expected_squads['Player'] == player].reset_index(drop=True).reset_index(drop = False).set_index(['Player', 'index']).sort_index() for player in list(expected_squads['Player'].unique())], axis=0)
-    
-    @staticmethod
-    def get_home_team_from_match_id(match_id):
-    
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[3])
-
-    @staticmethod
-    def get_away_team_from_match_id(match_id):
+        # Each player's rows numbered in order, players kept in order of first appearance, in a single take.
+        # Rows with a missing Player match no player, so are dropped
+        player_codes = pd.factorize(expected_squads['Player'])[0]
+        order = np.argsort(player_codes, kind='stable')
+        order = order[player_codes[order] != -1]
+        player_index = expected_squads.groupby(player_codes, sort=False).cumcount().to_numpy()
         
-        return re.sub(r"(?<=\w)([A-Z])", r" \1", match_id.split("_")[4])
-
+        columns = [i for i, col in enumerate(expected_squads.columns) if col != 'Player']
+        index = pd.MultiIndex.from_arrays([expected_squads['Player'].to_numpy()[order], player_index[order]], names=['Player', 'index'])
+        
+        return expected_squads.iloc[order, columns].set_axis(index, axis=0)
+    
     def convert_squad_team_to_home_away(self, X):
         # sourcery skip: extract-duplicate-method
         
         team_squad_sums = X.groupby(['Match_ID', 'Team']).sum().reset_index()
         
-        team_squad_sums['Home_Team'] = team_squad_sums['Match_ID'].apply(lambda match_id: self.get_home_team_from_match_id(match_id))
-        team_squad_sums['Away_Team'] = team_squad_sums['Match_ID'].apply(lambda match_id: self.get_away_team_from_match_id(match_id))
+        team_squad_sums['Home_Team'], team_squad_sums['Away_Team'] = get_teams_from_match_ids(team_squad_sums['Match_ID'])
 
         home_data = team_squad_sums[team_squad_sums['Team'] == team_squad_sums['Home_Team']]
         home_data = home_data.drop(columns=['Team'])
@@ -479,31 +616,47 @@ class SquadPerformanceTransformer(BaseEstimator, TransformerMixin):
         return home_away_data 
     
 class HomeAwayDifferenceTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, feature_list):
+    def __init__(self, feature_list, dtype=np.float64):
         self.feature_list = feature_list
+        self.dtype = dtype
+
+    def __setstate__(self, state):
+        # Preprocessors pickled before dtype existed
+        state.setdefault('dtype', np.float64)
+        super().__setstate__(state)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        # Assuming X is a DataFrame with columns for both home and away features
-        for feature in self.feature_list:
-            X[f'{feature}_diff'] = X[f'Home_{feature}'] - X[f'Away_{feature}']
+        # Every difference in one operation over the Home_ and Away_ column blocks, computed into the Home_ block
+        home, away = get_home_away_blocks(X, self.feature_list, self.dtype)
+        diff = np.subtract(home, away, out=home)
 
-        return X
+        return attach_feature_block(X, diff, [f'{feature}_diff' for feature in self.feature_list])
 
 class HomeAwayRatioTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, feature_list):
+    def __init__(self, feature_list, dtype=np.float64):
         self.feature_list = feature_list
+        self.dtype = dtype
+
+    def __setstate__(self, state):
+        # Preprocessors pickled before dtype existed
+        state.setdefault('dtype', np.float64)
+        super().__setstate__(state)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        # Assuming X is a DataFrame with columns for both home and away features
-        for feature in self.feature_list:
-            X[f'{feature}_ratio'] = np.where(X[f'Away_{feature}'] == 0, 0, X[f'Home_{feature}'] / X[f'Away_{feature}'])
-        return X
+        # Every ratio in one operation over the Home_ and Away_ column blocks, 0 where the away value is 0
+        home, away = get_home_away_blocks(X, self.feature_list, self.dtype)
+        is_away_zero = away == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.divide(home, away, out=home)
+        ratio[is_away_zero] = 0
+
+        return attach_feature_block(X, ratio, [f'{feature}_ratio' for feature in self.feature_list])
 
 class ColumnFilter(BaseEstimator, TransformerMixin):
     def __init__(self, selected_columns = None, excluded_columns = None):
@@ -1,8 +1,13 @@
-import pandas as pd
-import joblib
-from AFLPy.AFLData_Client import load_data
-from afl_match_outcome_model.predict.predict_margin import load_margin_preprocessor
-from afl_match_outcome_model.predict.predict_outcome import load_outcome_preprocessor
+from afl_match_outcome_model.data_preparation.data_cache import load_data
+from afl_match_outcome_model.predict.predict_margin import load_margin_preprocessor, save_margin_preprocessor
+from afl_match_outcome_model.predict.predict_outcome import load_outcome_preprocessor, save_outcome_preprocessor
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer, SquadPerformanceTransformer
+from afl_match_outcome_model.data_preparation.pipeline_runner import get_step, iterate_steps
+from afl_match_outcome_model.data_preparation.pipeline_profiler import PipelineProfiler
+from afl_match_outcome_model.data_preparation.keyed_table import upsert_rows, get_partition_values
+
+expected_key_cols = ['Match_ID', 'Chain_Number', 'Order', 'Player']
+squad_key_cols = ['Match_ID', 'Player']
 
 def update_fit_outcome_new_expected_data(ID = None):
     
@@ -10,7 +15,7 @@ def update_fit_outcome_new_expected_data(ID = None):
     preproc = update_preprocessor_expected_data(preproc, ID = ID)
     preproc = fit_preprocessor(preproc)
     
-    save_margin_preprocessor(preproc)
+    save_outcome_preprocessor(preproc)
     
     return preproc
 
@@ -20,7 +25,7 @@ def update_fit_outcome_new_squads(ID = None):
     preproc = update_preprocessor_new_squads(preproc, ID = ID)
     preproc = fit_preprocessor(preproc)
     
-    save_margin_preprocessor(preproc)
+    save_outcome_preprocessor(preproc)
     
     return preproc
 
@@ -46,27 +51,30 @@ def update_fit_margin_new_squads(ID = None):
 
 def update_preprocessor_expected_data(preproc, ID = None):
     
-    new_expected_score = load_data(Dataset_Name="CG_Expected_Score", ID = ID).sort_values(by = "Match_ID", ascending = True).reset_index()
-    new_expected_score = new_expected_score[['Match_ID', 'Chain_Number', 'Order', 'Team', 'Player', 'xScore']]
-    preproc['expected'].expected_score = pd.concat([preproc['expected'].expected_score, new_expected_score], axis = 0)
-    preproc['expected'].expected_score = preproc['expected'].expected_score.drop_duplicates(subset=['Match_ID', 'Chain_Number', 'Order', 'Player'])
-    preproc['squad'].expected_score = pd.concat([preproc['squad'].expected_score, new_expected_score], axis = 0)
-    preproc['squad'].expected_score = preproc['squad'].expected_score.drop_duplicates(subset=['Match_ID', 'Chain_Number', 'Order', 'Player'])
+    # Steps are found by name whether the preprocessor is a Pipeline or contains a ParallelPipeline
+    expected_merger, squad_transformer = get_step(preproc, 'expected'), get_step(preproc, 'squad')
+
+    new_expected_score = load_data(Dataset_Name="CG_Expected_Score", ID = ID, refresh = True).sort_values(by = "Match_ID", ascending = True).reset_index()
+    new_expected_score = new_expected_score[['Match_ID', 'Chain_Number', 'Order', 'Team', 'Player', 'xScore']].drop_duplicates(subset=expected_key_cols)
+
+    new_expected_vaep = load_data(Dataset_Name="CG_Expected_VAEP", ID = ID, refresh = True).sort_values(by = "Match_ID", ascending = True).reset_index()
+    new_expected_vaep = new_expected_vaep[['Match_ID', 'Chain_Number', 'Order', 'Team', 'Player', 'exp_vaep_value']].drop_duplicates(subset=expected_key_cols)
+
+    # The squad step keeps the only chain level table, the loaded Match_IDs are upserted without copying or deduplicating its history
+    squad_transformer.expected_score = upsert_rows(squad_transformer.expected_score, new_expected_score, key_cols = expected_key_cols)
+    squad_transformer.expected_vaep = upsert_rows(squad_transformer.expected_vaep, new_expected_vaep, key_cols = expected_key_cols)
 
-    new_expected_vaep = load_data(Dataset_Name="CG_Expected_VAEP", ID = ID).sort_values(by = "Match_ID", ascending = True).reset_index()
-    new_expected_vaep = new_expected_vaep[['Match_ID', 'Chain_Number', 'Order', 'Team', 'Player', 'exp_vaep_value']]
-    preproc['expected'].expected_vaep = pd.concat([preproc['expected'].expected_vaep, new_expected_vaep], axis = 0)
-    preproc['expected'].expected_vaep = preproc['expected'].expected_vaep.drop_duplicates(subset=['Match_ID', 'Chain_Number', 'Order', 'Player'])
-    preproc['squad'].expected_vaep = pd.concat([preproc['squad'].expected_vaep, new_expected_vaep], axis = 0)
-    preproc['squad'].expected_vaep = preproc['squad'].expected_vaep.drop_duplicates(subset=['Match_ID', 'Chain_Number', 'Order', 'Player'])
+    # The expected merger only keeps per match team sums, re-aggregating just the loaded Match_IDs
+    expected_merger.update_expected_data(expected_score = new_expected_score, expected_vaep = new_expected_vaep)
     
     return preproc
 
 def update_preprocessor_new_squads(preproc, ID = None):
     
-    new_squads = load_data(Dataset_Name='AFL_API_Team_Positions', ID = ID).sort_values(by = "Match_ID", ascending = True)
-    preproc['squad'].squads = pd.concat([preproc['squad'].squads, new_squads], axis = 0)
-    preproc['squad'].squads = preproc['squad'].squads.drop_duplicates(subset=['Match_ID', 'Player'])
+    squad_transformer = get_step(preproc, 'squad')
+
+    new_squads = load_data(Dataset_Name='AFL_API_Team_Positions', ID = ID, refresh = True).sort_values(by = "Match_ID", ascending = True)
+    squad_transformer.squads = upsert_rows(squad_transformer.squads, new_squads, key_cols = squad_key_cols)
 
     return preproc
 
@@ -75,22 +83,24 @@ def fit_preprocessor(preproc):
     match_summary = load_data(Dataset_Name="AFL_API_Matches", ID = ["AFL", "2021", "2022", '2023', '2024']).sort_values(by = "Match_ID", ascending = True)
     match_summary = match_summary[match_summary['Match_Status'] == "CONCLUDED"]
     
-    preproc.fit(match_summary)
-    
-    return preproc
-    
-def save_margin_preprocessor(preproc):
+    # ELO ratings fold in only the newly concluded matches on top of their checkpoint
+    for _, step in iterate_steps(preproc):
+        if isinstance(step, ELOTransformer):
+            step.warm_start = True
+        # Player feature stores are written here rather than in fit, which only reads them
+        if isinstance(step, SquadPerformanceTransformer) and step.feature_store is not None:
+            step.update_feature_store()
     
-    preproc_file_path = "model_outputs/match_margin_pipeline_v10.joblib"
+    # Logs a JSON line with each step's timings and memory
+    PipelineProfiler(preproc, name = "preprocessor").fit(match_summary)
     
-    return joblib.dump(preproc, preproc_file_path)
-
+    return preproc
 
 def check_latest_expected_score_preprocesor_matches(preproc):
-    return sorted(preproc['expected'].expected_score['Match_ID'].unique())[-10:]
+    return sorted(get_step(preproc, 'expected').fitted_xscore_team_sum['Match_ID'].unique())[-10:]
 
 def check_latest_expected_vaep_preprocesor_matches(preproc):
-    return sorted(preproc['expected'].expected_vaep['Match_ID'].unique())[-10:]
+    return sorted(get_step(preproc, 'expected').fitted_xvaep_team_sum['Match_ID'].unique())[-10:]
 
 def check_latest_squad_preprocesor_matches(preproc):
-    return sorted(preproc['squad'].squads['Match_ID'].unique())[-10:]
\ No newline at end of file
+    return sorted(get_partition_values(get_step(preproc, 'squad').squads))[-10:]
\ No newline at end of file
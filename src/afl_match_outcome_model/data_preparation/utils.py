@@ -1,6 +1,35 @@
 import numpy as np
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 def get_numeric_columns_list(data):
     
     return list(data.select_dtypes(np.number))
 
+class FileLock:
+    """Exclusive advisory lock on a file, held for a with block, serialising writers across processes.
+
+    Does nothing where fcntl is not available, leaving only the callers' own thread locks.
+
+    Args:
+        path (str): Lock file path, created if missing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.base import BaseEstimator, TransformerMixin
+from afl_match_outcome_model.data_preparation.pipeline_utils import get_ema_weights
+
+window_statistics = {
+    'sum': lambda windows: windows.sum(axis=1),
+    'mean': lambda windows: windows.mean(axis=1),
+    'median': lambda windows: np.median(windows, axis=1),
+    'std': lambda windows: windows.std(axis=1, ddof=1),
+    'var': lambda windows: windows.var(axis=1, ddof=1),
+    'min': lambda windows: windows.min(axis=1),
+    'max': lambda windows: windows.max(axis=1),
+}
+
+def get_summarizer_name(summarizer, window):
+    """Gets the feature name suffix for a summarizer and window, e.g. 'lag_1', 'mean_1_5' or 'ema5_1_5'.
+
+    Args:
+        summarizer (str or function): 'lag', a window statistic name or a window function.
+        window (list): Lag and window length.
+
+    Returns:
+        str: Feature name suffix.
+    """
+
+    name = summarizer.__name__ if callable(summarizer) else summarizer
+    if name == 'lag':
+        return f"lag_{window[0]}"
+
+    return f"{name}_{window[0]}_{window[1]}"
+
+def get_summarizer_windows(lag_feature):
+    """Expands a lag_feature spec to a list of (summarizer, [lag, window_length]) pairs in feature order.
+
+    Args:
+        lag_feature (dict): Summarizer to windows, e.g. {"lag": [1], "mean": [[1, 5]], ema5: [[1, 5]]}. Lags are given as integers.
+
+    Returns:
+        list: (summarizer, window) pairs.
+    """
+
+    if lag_feature is None:
+        lag_feature = {"lag": [1]}
+
+    return [(summarizer, [int(window), 1] if summarizer == 'lag' else list(window)) for summarizer, windows in lag_feature.items() for window in windows]
+
+def get_group_positions(index):
+    """Gets the position of each row within its group, where groups are all but the last index level and are contiguous.
+
+    Args:
+        index (Index): Sorted index, a MultiIndex of e.g. (Team, YearRound) or a single time index.
+
+    Returns:
+        ndarray: Zero based position of each row within its group.
+    """
+
+    row_numbers = np.arange(len(index))
+    if not isinstance(index, pd.MultiIndex) or len(index) == 0:
+        return row_numbers
+
+    group_codes = pd.factorize(index.droplevel(-1))[0]
+    is_group_start = np.concatenate([[True], group_codes[1:] != group_codes[:-1]])
+
+    return row_numbers - np.maximum.accumulate(np.where(is_group_start, row_numbers, 0))
+
+def calculate_window_feature(values, group_positions, summarizer, window):
+    """Calculates a summarizer over a [lag, window_length] window before each value of grouped series.
+
+    Every window is evaluated over the concatenated values with NumPy strides, then windows that cross a
+    group boundary or contain NaN are masked out, matching a per group
+    rolling(window_length, min_periods=window_length) followed by shift(lag).
+
+    Args:
+        values (ndarray): float64 values of every group, each group contiguous and in time order.
+        group_positions (ndarray): Position of each value within its group.
+        summarizer (str or function): 'lag', a window statistic name or a window function. emaN functions use a single correlate pass.
+        window (list): Non-negative lag and window length.
+
+    Returns:
+        ndarray: Feature value for each row.
+    """
+
+    lag, window_length = window
+    n_values = len(values)
+    feature = np.full(n_values, np.nan)
+    if n_values < window_length or lag >= n_values:
+        return feature
+
+    windows = sliding_window_view(values, window_length)
+    if summarizer == 'lag':
+        summarized = values.copy()
+    elif callable(summarizer) and hasattr(summarizer, 'span'):
+        summarized = np.correlate(values, get_ema_weights(summarizer.span, window_length), mode='valid')
+    elif callable(summarizer):
+        summarized = np.array([summarizer(window_values) for window_values in windows], dtype=np.float64)
+    elif summarizer in window_statistics:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summarized = window_statistics[summarizer](windows)
+    else:
+        raise ValueError(f"The provided summarizer {summarizer} is not supported.")
+
+    window_values = np.full(n_values, np.nan)
+    window_values[window_length - 1:] = np.where(sliding_window_view(np.isnan(values), window_length).any(axis=1), np.nan, summarized[-(n_values - window_length + 1):])
+
+    is_within_group = group_positions[lag:] >= lag + window_length - 1
+    feature[lag:] = np.where(is_within_group, window_values[:n_values - lag], np.nan)
+
+    return feature
+
+def get_window_history_length(lag_feature):
+    """Gets the number of past values per group any feature of a lag_feature spec can reach back to.
+
+    Args:
+        lag_feature (dict): Summarizer to windows, as for get_summarizer_windows.
+
+    Returns:
+        int: Largest lag + window_length - 1.
+    """
+
+    return max([lag + window_length - 1 for _, (lag, window_length) in get_summarizer_windows(lag_feature)], default=0)
+
+def get_group_tails(data, n_rows):
+    """Gets the last n_rows of each group of sorted data, where groups are all but the last index level.
+
+    Args:
+        data (DataFrame): Data sorted by its index.
+        n_rows (int): Rows to keep per group.
+
+    Returns:
+        DataFrame: Trailing rows of each group.
+    """
+
+    if not isinstance(data.index, pd.MultiIndex):
+        return data.iloc[len(data) - min(n_rows, len(data)):]
+
+    return data.groupby(level=list(range(data.index.nlevels - 1)), sort=False).tail(n_rows)
+
+def get_group_last_times(index):
+    """Gets the last time, the last index level, of each group of a sorted MultiIndex.
+
+    Args:
+        index (MultiIndex): Sorted index of e.g. (Team, YearRound).
+
+    Returns:
+        Series: Last time by group.
+    """
+
+    times = pd.Series(index.get_level_values(-1), index=index.droplevel(-1))
+
+    return times[~times.index.duplicated(keep='last')]
+
+class GroupedWindowSummarizer(BaseEstimator, TransformerMixin):
+    def __init__(self, lag_feature=None, target_cols=None):
+        self.lag_feature = lag_feature
+        self.target_cols = target_cols
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Summarizers pickled before the window state existed
+        if 'window_state' not in state and 'fitted_data' in state:
+            self.window_state = self.get_window_state(self.fitted_data)
+
+    def fit(self, X, y=None):
+        target_cols = self._get_target_cols(X)
+        self.fitted_data = X[target_cols].copy()
+        if not self.fitted_data.index.is_monotonic_increasing:
+            self.fitted_data = self.fitted_data.sort_index()
+        self.window_state = self.get_window_state(self.fitted_data)
+        return self
+
+    def transform(self, X):
+        target_cols = self._get_target_cols(X)
+
+        # Rows after each group's fitted history only need its trailing window state, not the whole history
+        if self.is_after_fitted_data(X.index):
+            X_combined = pd.concat([self.window_state['tails'][target_cols], X[target_cols]], axis=0)
+        else:
+            # Windows reach back into the fitted history, with X taking precedence where they overlap
+            X_combined = X[target_cols].combine_first(self.fitted_data)
+        if not X_combined.index.is_monotonic_increasing:
+            X_combined = X_combined.sort_index()
+        group_positions = get_group_positions(X_combined.index)
+
+        features = {}
+        for col in target_cols:
+            values = X_combined[col].to_numpy(dtype=np.float64)
+            for summarizer, window in get_summarizer_windows(self.lag_feature):
+                features[f"{col}_{get_summarizer_name(summarizer, window)}"] = calculate_window_feature(values, group_positions, summarizer, window)
+
+        X_transformed = pd.DataFrame(features, index=X_combined.index)
+
+        return X_transformed.loc[X.index]
+
+    def get_window_state(self, fitted_data):
+        """Gets the trailing rows of each group that features after the fitted data can reach, and each group's last time."""
+
+        fitted_data = fitted_data if fitted_data.index.is_monotonic_increasing else fitted_data.sort_index()
+        last_times = get_group_last_times(fitted_data.index) if isinstance(fitted_data.index, pd.MultiIndex) else None
+
+        return {'tails': get_group_tails(fitted_data, get_window_history_length(self.lag_feature)), 'last_times': last_times}
+
+    def is_after_fitted_data(self, index):
+        """Checks whether every row of an index comes after its group's fitted history, e.g. upcoming fixtures."""
+
+        if len(self.fitted_data) == 0:
+            return True
+        if not isinstance(index, pd.MultiIndex):
+            return bool(len(index) == 0 or index.min() > self.fitted_data.index.max())
+        if index.nlevels != self.fitted_data.index.nlevels:
+            return False
+
+        last_times = self.window_state['last_times'].reindex(index.droplevel(-1))
+        times = index.get_level_values(-1)
+
+        return bool((last_times.isna().to_numpy() | (times.to_numpy() > last_times.to_numpy())).all())
+
+    def _get_target_cols(self, X):
+        target_cols = [X.columns[0]] if self.target_cols is None else self.target_cols
+        missing_cols = [col for col in target_cols if col not in X.columns]
+        if missing_cols:
+            raise ValueError(f"target_cols {' '.join(missing_cols)} specified that do not exist in X.")
+
+        return target_cols
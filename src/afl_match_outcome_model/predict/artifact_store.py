@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import threading
+import joblib
+from afl_match_outcome_model.predict.model_registry import get_file_hash
+from afl_match_outcome_model.data_preparation.utils import FileLock
+
+default_artifact_dir = os.environ.get("AFL_ARTIFACT_DIR", "model_outputs")
+default_keep_versions = int(os.environ.get("AFL_ARTIFACT_KEEP_VERSIONS", 5))
+default_compress = int(os.environ.get("AFL_ARTIFACT_COMPRESS", 0))
+
+def write_json_atomic(data, path):
+    """Writes JSON to a temp file and renames it into place, so readers never see a partial file."""
+
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class ArtifactStore:
+    """Versioned store of joblib artifacts such as fitted preprocessors and models.
+
+    Each artifact name has its own directory holding up to keep_versions version files, a versions.json
+    manifest and a latest.json pointer. A save dumps to a temp file, hashes it, renames it to a version file
+    named by timestamp and hash, then atomically replaces the pointer, so a crash mid-dump or a concurrent
+    save never leaves a loader with a partial file. Saving content identical to the latest version keeps
+    that version rather than adding a copy, and rollback points latest back at a kept version. Writers of the
+    same name are serialised with a FileLock.
+
+    Uncompressed versions (compress=0) can be loaded with mmap_mode, memory mapping their NumPy arrays
+    read only. Compressed versions are smaller but always read into memory. Every save and load records its
+    time and file size in get_stats, to compare formats on real artifacts.
+
+    Args:
+        root_dir (str, optional): Directory of artifact directories. Defaults to AFL_ARTIFACT_DIR or model_outputs.
+        keep_versions (int, optional): Versions kept per artifact. Defaults to AFL_ARTIFACT_KEEP_VERSIONS or 5.
+        compress (int, optional): joblib compression level, 0 for uncompressed. Defaults to AFL_ARTIFACT_COMPRESS or 0.
+    """
+
+    def __init__(self, root_dir=None, keep_versions=None, compress=None):
+        self.root_dir = default_artifact_dir if root_dir is None else root_dir
+        self.keep_versions = default_keep_versions if keep_versions is None else keep_versions
+        self.compress = default_compress if compress is None else compress
+        self.stats = {}
+        self._lock = threading.Lock()
+
+        if self.keep_versions < 1:
+            raise ValueError("keep_versions must be at least 1.")
+
+    def get_artifact_dir(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def get_latest(self, name):
+        """Gets the latest version record of an artifact, or None if it has never been saved.
+
+        Args:
+            name (str): Artifact name, e.g. 'match_margin_pipeline'.
+
+        Returns:
+            dict: Version record with file, sha256, file_bytes, compress, save_seconds and saved_at.
+        """
+
+        try:
+            with open(os.path.join(self.get_artifact_dir(name), "latest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get_versions(self, name):
+        """Gets the version records of an artifact, oldest first."""
+
+        try:
+            with open(os.path.join(self.get_artifact_dir(name), "versions.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def get_latest_path(self, name, default_path=None):
+        """Gets the file path of the latest version, or default_path if the artifact has never been saved.
+
+        Args:
+            name (str): Artifact name.
+            default_path (str, optional): Path used before the first save, e.g. a legacy unversioned file. Defaults to None.
+
+        Raises:
+            FileNotFoundError: If the artifact has never been saved and there is no default_path.
+
+        Returns:
+            str: File path.
+        """
+
+        latest = self.get_latest(name)
+        if latest is not None:
+            return os.path.join(self.get_artifact_dir(name), latest['file'])
+        if default_path is None:
+            raise FileNotFoundError(f"No saved versions of {name} in {self.root_dir}.")
+
+        return default_path
+
+    def save(self, name, artifact, compress=None):
+        """Saves an artifact as a new version and points latest at it, pruning the oldest versions.
+
+        Args:
+            name (str): Artifact name.
+            artifact (object): Picklable artifact, e.g. a fitted Pipeline.
+            compress (int, optional): joblib compression level. Defaults to the store's compress.
+
+        Returns:
+            dict: The latest version record.
+        """
+
+        compress = self.compress if compress is None else compress
+        artifact_dir = self.get_artifact_dir(name)
+        os.makedirs(artifact_dir, exist_ok=True)
+
+        # The dump goes to a temp file in the same directory, so the rename into place is atomic
+        temp_path = os.path.join(artifact_dir, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        start_time = time.perf_counter()
+        try:
+            joblib.dump(artifact, temp_path, compress=compress)
+            with open(temp_path, "rb") as f:
+                os.fsync(f.fileno())
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        save_seconds = time.perf_counter() - start_time
+        file_hash = get_file_hash(temp_path)
+
+        with self._lock, self._lock_file(artifact_dir):
+            latest = self.get_latest(name)
+            if latest is not None and latest['sha256'] == file_hash and os.path.exists(os.path.join(artifact_dir, latest['file'])):
+                os.remove(temp_path)
+                record = latest
+            else:
+                saved_at = time.time()
+                # Version files sort by save time, to the microsecond, and carry their content hash
+                file_name = f"{name}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime(saved_at))}{int(saved_at % 1 * 1e6):06d}-{file_hash[:12]}.joblib"
+                record = {
+                    'file': file_name,
+                    'sha256': file_hash,
+                    'file_bytes': os.path.getsize(temp_path),
+                    'compress': compress,
+                    'save_seconds': save_seconds,
+                    'saved_at': saved_at,
+                }
+                os.replace(temp_path, os.path.join(artifact_dir, file_name))
+                versions = [version for version in self.get_versions(name) if version['file'] != file_name] + [record]
+                write_json_atomic(versions[-self.keep_versions:], os.path.join(artifact_dir, "versions.json"))
+                write_json_atomic(record, os.path.join(artifact_dir, "latest.json"))
+                self._prune(artifact_dir, versions[:-self.keep_versions])
+
+        self.stats.setdefault(name, {})['save'] = {**record, 'save_seconds': save_seconds}
+
+        return record
+
+    def rollback(self, name, version):
+        """Points latest back at a kept version, e.g. after an update saved a bad preprocessor.
+
+        Args:
+            name (str): Artifact name.
+            version (str): Version file name or sha256, as in get_versions.
+
+        Raises:
+            KeyError: If no kept version has the file name or hash.
+
+        Returns:
+            dict: The version record latest now points at.
+        """
+
+        artifact_dir = self.get_artifact_dir(name)
+        with self._lock, self._lock_file(artifact_dir):
+            versions = self.get_versions(name)
+            record = next((record for record in reversed(versions) if version in [record['file'], record['sha256']]), None)
+            if record is None or not os.path.exists(os.path.join(artifact_dir, record['file'])):
+                raise KeyError(f"No kept version {version} of {name}.")
+            # The version moves to the end of the list, so the next saves prune it last
+            versions = [other for other in versions if other['file'] != record['file']] + [record]
+            write_json_atomic(versions, os.path.join(artifact_dir, "versions.json"))
+            write_json_atomic(record, os.path.join(artifact_dir, "latest.json"))
+
+        return record
+
+    def load(self, name, mmap_mode=None, default_path=None):
+        """Loads the latest version of an artifact.
+
+        Args:
+            name (str): Artifact name.
+            mmap_mode (str, optional): joblib mmap_mode, e.g. 'r', for uncompressed versions. Defaults to None.
+            default_path (str, optional): Path loaded before the first save. Defaults to None.
+
+        Returns:
+            The loaded artifact.
+        """
+
+        # The pointer is read once, so a concurrent save cannot pair one version's path with another's record
+        latest = self.get_latest(name)
+        if latest is not None:
+            file_path = os.path.join(self.get_artifact_dir(name), latest['file'])
+            if latest['compress']:
+                # joblib cannot memory map compressed files
+                mmap_mode = None
+        else:
+            file_path = self.get_latest_path(name, default_path=default_path)
+
+        start_time = time.perf_counter()
+        artifact = joblib.load(file_path, mmap_mode=mmap_mode)
+        self.stats.setdefault(name, {})['load'] = {
+            'file_path': file_path,
+            'file_bytes': os.path.getsize(file_path),
+            'mmap_mode': mmap_mode,
+            'load_seconds': time.perf_counter() - start_time,
+            'loaded_at': time.time(),
+        }
+
+        return artifact
+
+    def get_stats(self):
+        """Gets the last save and load of each artifact in this process.
+
+        Returns:
+            dict: Artifact name to 'save' and 'load' records with times and file sizes.
+        """
+
+        return {name: dict(stats) for name, stats in list(self.stats.items())}
+
+    def _prune(self, artifact_dir, versions):
+        for version in versions:
+            try:
+                os.remove(os.path.join(artifact_dir, version['file']))
+            except FileNotFoundError:
+                pass
+
+    def _lock_file(self, artifact_dir):
+        return FileLock(os.path.join(artifact_dir, ".lock"))
+
+artifact_store = ArtifactStore()
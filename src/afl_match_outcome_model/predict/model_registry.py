@@ -0,0 +1,156 @@
+import os
+import time
+import hashlib
+import threading
+import joblib
+from afl_match_outcome_model.data_preparation.pipeline_profiler import get_rss_bytes
+
+def get_file_signature(file_path):
+    """Gets a cheap signature of a file from its modification time and size.
+
+    Args:
+        file_path (str): File path.
+
+    Returns:
+        tuple: (mtime_ns, size).
+    """
+
+    file_stat = os.stat(file_path)
+
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+def get_file_hash(file_path, chunk_size=1024 ** 2):
+    """Gets the sha256 hex digest of a file's contents.
+
+    Args:
+        file_path (str): File path.
+        chunk_size (int, optional): Bytes read at a time. Defaults to 1MB.
+
+    Returns:
+        str: Hex digest.
+    """
+
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+class ModelRegistry:
+    """Keeps fitted models and preprocessors resident in memory, reloading each when its file changes.
+
+    Each get checks the file's path, mtime and size. A path can be a function, e.g. one following an
+    ArtifactStore's latest pointer, so a newly saved version is picked up. When the signature changes the
+    file is hashed, and only a different hash is unpickled. The new artifact replaces the old one in a single
+    assignment, so a request holding the previous artifact keeps using it unchanged. A file that fails to load, e.g. one still being written,
+    leaves the previous artifact in place and is retried on the next get.
+
+    Artifacts are shared between requests and must only be used read only. Code that updates and refits a
+    pipeline should load its own copy.
+
+    Args:
+        loader (function, optional): Function loading an artifact from a file path. Defaults to joblib.load.
+    """
+
+    def __init__(self, loader=joblib.load):
+        self.loader = loader
+        self.file_paths = {}
+        self.artifacts = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, file_path):
+        """Registers an artifact file under a name, without loading it.
+
+        Args:
+            name (str): Artifact name, e.g. 'margin_model'.
+            file_path (str or function): Path to the artifact file, or a function returning the current path.
+        """
+
+        self.file_paths[name] = file_path
+
+    def load_all(self):
+        """Loads every registered artifact, e.g. at startup."""
+
+        for name in self.file_paths:
+            self.get(name)
+
+    def get(self, name):
+        """Gets an artifact, reloading it first if its file has changed.
+
+        Args:
+            name (str): Artifact name.
+
+        Returns:
+            The loaded artifact.
+        """
+
+        artifact = self.artifacts.get(name)
+        try:
+            file_path = self.get_file_path(name)
+            signature = (file_path,) + get_file_signature(file_path)
+        except OSError:
+            if artifact is None:
+                raise
+            return artifact['value']
+
+        if artifact is not None and artifact['signature'] == signature:
+            return artifact['value']
+
+        with self._lock:
+            artifact = self.artifacts.get(name)
+            if artifact is None or artifact['signature'] != signature:
+                try:
+                    artifact = self._load(name, signature, artifact)
+                except Exception:
+                    if artifact is None:
+                        raise
+                    return artifact['value']
+                self.artifacts[name] = artifact
+
+        return artifact['value']
+
+    def get_file_path(self, name):
+        """Gets the current file path of a registered artifact."""
+
+        file_path = self.file_paths[name]
+
+        return file_path() if callable(file_path) else file_path
+
+    def get_stats(self):
+        """Gets load statistics for each loaded artifact.
+
+        Returns:
+            dict: Artifact name to file path, hash, file size, resident memory growth over the load, load time and reload count.
+        """
+
+        return {
+            name: {key: value for key, value in artifact.items() if key not in ['value', 'signature']}
+            for name, artifact in list(self.artifacts.items())
+        }
+
+    def _load(self, name, signature, previous):
+        file_path = signature[0]
+        file_hash = get_file_hash(file_path)
+        if previous is not None and previous['sha256'] == file_hash:
+            return {**previous, 'signature': signature, 'file_path': file_path}
+
+        # Memory size is the growth in resident set size over the load, tracing allocations would slow the load it times
+        rss_before = get_rss_bytes()
+        start_time = time.perf_counter()
+        value = self.loader(file_path)
+        load_seconds = time.perf_counter() - start_time
+        rss_after = get_rss_bytes()
+        memory_bytes = None if rss_before is None or rss_after is None else rss_after - rss_before
+
+        return {
+            'value': value,
+            'signature': signature,
+            'file_path': file_path,
+            'sha256': file_hash,
+            'file_bytes': signature[2],
+            'memory_bytes': memory_bytes,
+            'load_seconds': load_seconds,
+            'loaded_at': time.time(),
+            'loads': 1 if previous is None else previous['loads'] + 1,
+        }
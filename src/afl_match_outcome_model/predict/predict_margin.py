@@ -1,13 +1,31 @@
-import joblib
+from afl_match_outcome_model.predict.artifact_store import artifact_store
 
-def load_margin_model():
+# Versions are saved to the artifact store, the unversioned files are loaded until the first save
+margin_model_name = "match_margin_xgb"
+margin_preprocessor_name = "match_margin_pipeline"
+margin_model_file_path = "model_outputs/match_margin_xgb_v10.joblib"
+margin_preprocessor_file_path = "model_outputs/match_margin_pipeline_v10.joblib"
+
+def get_margin_model_file_path():
     
-    model_file_path = "model_outputs/match_margin_xgb_v10.joblib"
+    return artifact_store.get_latest_path(margin_model_name, default_path=margin_model_file_path)
+
+def get_margin_preprocessor_file_path():
     
-    return joblib.load(model_file_path)
+    return artifact_store.get_latest_path(margin_preprocessor_name, default_path=margin_preprocessor_file_path)
+
+def load_margin_model():
+    
+    return artifact_store.load(margin_model_name, default_path=margin_model_file_path)
 
 def load_margin_preprocessor():
     
-    preproc_file_path = "model_outputs/match_margin_pipeline_v10.joblib"
+    return artifact_store.load(margin_preprocessor_name, default_path=margin_preprocessor_file_path)
+
+def save_margin_model(model):
+    
+    return artifact_store.save(margin_model_name, model)
+
+def save_margin_preprocessor(preproc):
     
-    return joblib.load(preproc_file_path)
\ No newline at end of file
+    return artifact_store.save(margin_preprocessor_name, preproc)
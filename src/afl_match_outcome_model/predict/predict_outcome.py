@@ -1,11 +1,23 @@
-import joblib
 import numpy as np
+from afl_match_outcome_model.predict.artifact_store import artifact_store
 
-def load_outcome_model():
+# Versions are saved to the artifact store, the unversioned files are loaded until the first save
+outcome_model_name = "match_outcome_xgb"
+outcome_preprocessor_name = "match_outcome_pipeline"
+outcome_model_file_path = "model_outputs/match_outcome_xgb_v10.joblib"
+outcome_preprocessor_file_path = "model_outputs/match_outcome_pipeline_v10.joblib"
+
+def get_outcome_model_file_path():
     
-    model_file_path = "model_outputs/match_outcome_xgb_v10.joblib"
+    return artifact_store.get_latest_path(outcome_model_name, default_path=outcome_model_file_path)
+
+def get_outcome_preprocessor_file_path():
     
-    return joblib.load(model_file_path)
+    return artifact_store.get_latest_path(outcome_preprocessor_name, default_path=outcome_preprocessor_file_path)
+
+def load_outcome_model():
+    
+    return artifact_store.load(outcome_model_name, default_path=outcome_model_file_path)
 
 def get_outcome_prediction(data, model, model_features):
     
@@ -20,6 +32,12 @@ def get_outcome_prediction(data, model, model_features):
 
 def load_outcome_preprocessor():
     
-    preproc_file_path = "model_outputs/match_outcome_pipeline_v10.joblib"
+    return artifact_store.load(outcome_preprocessor_name, default_path=outcome_preprocessor_file_path)
+
+def save_outcome_model(model):
+    
+    return artifact_store.save(outcome_model_name, model)
+
+def save_outcome_preprocessor(preproc):
     
-    return joblib.load(preproc_file_path)
+    return artifact_store.save(outcome_preprocessor_name, preproc)
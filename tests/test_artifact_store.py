@@ -0,0 +1,101 @@
+import os
+import multiprocessing
+import joblib
+import numpy as np
+import pytest
+from afl_match_outcome_model.predict import artifact_store as artifact_store_module
+from afl_match_outcome_model.predict.artifact_store import ArtifactStore
+
+def create_artifact(version, n_values=1000):
+    return {'version': version, 'values': np.full(n_values, version, dtype=np.float64)}
+
+def crash_mid_dump(root_dir):
+    def partial_dump(artifact, path, compress=0):
+        with open(path, "wb") as f:
+            f.write(b"partial pickle")
+        os._exit(1)
+
+    artifact_store_module.joblib.dump = partial_dump
+    ArtifactStore(root_dir=root_dir).save("pipeline", create_artifact(2))
+
+def test_crash_mid_dump_leaves_latest_on_previous_version(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path))
+    record = store.save("pipeline", create_artifact(1))
+
+    process = multiprocessing.get_context("fork").Process(target=crash_mid_dump, args=(str(tmp_path),))
+    process.start()
+    process.join()
+
+    assert process.exitcode == 1
+    assert store.get_latest("pipeline") == record
+    assert [version['file'] for version in store.get_versions("pipeline")] == [record['file']]
+    assert store.load("pipeline")['version'] == 1
+
+def test_failed_dump_removes_temp_file(tmp_path, monkeypatch):
+    store = ArtifactStore(root_dir=str(tmp_path))
+    record = store.save("pipeline", create_artifact(1))
+
+    def failing_dump(artifact, path, compress=0):
+        with open(path, "wb") as f:
+            f.write(b"partial pickle")
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(artifact_store_module.joblib, "dump", failing_dump)
+    with pytest.raises(OSError):
+        store.save("pipeline", create_artifact(2))
+
+    assert store.get_latest("pipeline") == record
+    assert sorted(os.listdir(tmp_path / "pipeline")) == sorted([".lock", record['file'], "latest.json", "versions.json"])
+
+def test_versions_are_pruned_and_identical_saves_kept(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path), keep_versions=2)
+    records = [store.save("pipeline", create_artifact(version)) for version in range(3)]
+
+    assert store.save("pipeline", create_artifact(2)) == records[-1]
+    assert store.get_versions("pipeline") == records[1:]
+    assert not os.path.exists(tmp_path / "pipeline" / records[0]['file'])
+
+@pytest.mark.parametrize("by", ['file', 'sha256'])
+def test_rollback_to_named_version(tmp_path, by):
+    store = ArtifactStore(root_dir=str(tmp_path), keep_versions=2)
+    records = [store.save("pipeline", create_artifact(version)) for version in range(2)]
+
+    assert store.rollback("pipeline", records[0][by]) == records[0]
+
+    assert store.load("pipeline")['version'] == 0
+    assert store.get_versions("pipeline") == [records[1], records[0]]
+    # The next save prunes the version rolled back from, not the one rolled back to
+    store.save("pipeline", create_artifact(2))
+    assert [record['file'] for record in store.get_versions("pipeline")] == [records[0]['file'], store.get_latest("pipeline")['file']]
+    with pytest.raises(KeyError):
+        store.rollback("pipeline", records[1]['file'])
+
+@pytest.mark.parametrize("compress, mmap_mode", [(0, None), (0, "r"), (3, None)])
+def test_load_round_trips_each_format(tmp_path, compress, mmap_mode):
+    store = ArtifactStore(root_dir=str(tmp_path), compress=compress)
+    store.save("pipeline", create_artifact(1))
+
+    artifact = store.load("pipeline", mmap_mode=mmap_mode)
+
+    np.testing.assert_array_equal(artifact['values'], create_artifact(1)['values'])
+    stats = store.get_stats()["pipeline"]
+    assert stats['save']['file_bytes'] == stats['load']['file_bytes'] > 0
+
+def save_versions(root_dir, versions):
+    store = ArtifactStore(root_dir=root_dir, keep_versions=100)
+    for version in versions:
+        store.save("pipeline", create_artifact(version))
+
+def test_concurrent_writers_keep_every_version(tmp_path):
+    processes = [multiprocessing.get_context("fork").Process(target=save_versions, args=(str(tmp_path), range(i, 40, 4))) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = ArtifactStore(root_dir=str(tmp_path))
+    versions = store.get_versions("pipeline")
+    assert len(versions) == 40
+    assert store.get_latest("pipeline") == versions[-1]
+    assert {record['file'] for record in versions} == {name for name in os.listdir(tmp_path / "pipeline") if name.endswith(".joblib")}
+    assert sorted(joblib.load(tmp_path / "pipeline" / record['file'])['version'] for record in versions) == list(range(40))
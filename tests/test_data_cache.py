@@ -0,0 +1,133 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pytest
+from afl_match_outcome_model.data_preparation.data_cache import DataCache
+
+pytest.importorskip("pyarrow")
+
+class FakeAFLDataClient:
+    """Stands in for AFLPy.AFLData_Client, serving and storing datasets in memory and counting calls."""
+
+    def __init__(self, datasets=None):
+        self.datasets = {} if datasets is None else datasets
+        self.loads = []
+        self.uploads = []
+
+    def load_data(self, Dataset_Name, ID=None):
+        self.loads.append((Dataset_Name, ID))
+        return self.datasets[Dataset_Name].copy()
+
+    def upload_data(self, Dataset_Name, Dataset, **kwargs):
+        self.uploads.append(Dataset_Name)
+        self.datasets[Dataset_Name] = Dataset.copy()
+
+def create_dataset(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Match_ID': [f"AFL_2024_{i:02d}" for i in range(n_rows)], 'Value': rng.normal(size=n_rows)})
+
+@pytest.fixture
+def client():
+    return FakeAFLDataClient({'Matches': create_dataset(50), 'Squads': create_dataset(50, seed=1)})
+
+def test_warm_load_is_served_from_cache(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    
+    cold = cache.load_data('Matches', ID=['2024'])
+    warm = cache.load_data('Matches', ID=['2024'])
+    
+    pd.testing.assert_frame_equal(warm, cold)
+    assert client.loads == [('Matches', ['2024'])]
+    assert cache.get_fingerprint('Matches', ID=['2024']) is not None
+
+def test_refresh_with_unchanged_data_keeps_file(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    cache.load_data('Matches')
+    path = cache._get_path(next(iter(cache._read_index())))
+    mtime = os.stat(path).st_mtime_ns
+    
+    cache.load_data('Matches', refresh=True)
+    
+    assert len(client.loads) == 2
+    assert os.stat(path).st_mtime_ns == mtime
+
+def test_expired_entry_is_refetched(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), ttl=0.05, client=client)
+    
+    cache.load_data('Matches')
+    time.sleep(0.1)
+    cache.load_data('Matches')
+    
+    assert len(client.loads) == 2
+
+def test_least_recently_used_entry_is_evicted(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    cache.load_data('Matches')
+    entry_bytes = cache.get_stats()['bytes']
+    
+    cache.max_bytes = int(2.5 * entry_bytes)
+    cache.load_data('Squads')
+    cache.load_data('Matches')
+    client.datasets['Fixtures'] = create_dataset(50, seed=2)
+    cache.load_data('Fixtures')
+    
+    assert cache.get_stats()['entries'] == 2
+    assert cache.get_fingerprint('Squads') is None
+    assert cache.get_fingerprint('Matches') is not None
+
+def test_upload_invalidates_dataset(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    cache.load_data('Matches', ID=['2023'])
+    cache.load_data('Matches', ID=['2024'])
+    cache.load_data('Squads')
+    
+    new_matches = create_dataset(10, seed=3)
+    cache.upload_data('Matches', new_matches, overwrite=True)
+    
+    assert cache.get_fingerprint('Matches', ID=['2023']) is None
+    assert cache.get_fingerprint('Squads') is not None
+    pd.testing.assert_frame_equal(cache.load_data('Matches', ID=['2024']), new_matches)
+
+def test_file_not_matching_fingerprint_is_refetched(tmp_path, client):
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    cache.load_data('Matches')
+    
+    # Another writer replaced the file without this entry's index update
+    other_cache = DataCache(cache_dir=str(tmp_path / "other"), client=FakeAFLDataClient({'Matches': create_dataset(5, seed=4)}))
+    other_cache.load_data('Matches')
+    key = next(iter(cache._read_index()))
+    os.replace(other_cache._get_path(key), cache._get_path(key))
+    
+    pd.testing.assert_frame_equal(cache.load_data('Matches'), client.datasets['Matches'])
+    assert len(client.loads) == 2
+
+def test_route_match_and_squad_loads_are_refetched(tmp_path):
+    client = FakeAFLDataClient({'AFL_API_Matches': create_dataset(9), 'AFL_API_Team_Positions': create_dataset(44, seed=1)})
+    cache = DataCache(cache_dir=str(tmp_path), client=client)
+    
+    # As loaded by the preprocess routes and get_squad_list_from_match_id
+    cache.load_data(Dataset_Name="AFL_API_Matches", ID=["AFL_2024_R1"])
+    cache.load_data(Dataset_Name="AFL_API_Team_Positions", ID="AFL_2024_R1_Richmond_Carlton")
+    client.datasets['AFL_API_Matches'] = create_dataset(9, seed=5)
+    
+    pd.testing.assert_frame_equal(cache.load_data(Dataset_Name="AFL_API_Matches", ID=["AFL_2024_R1"]), client.datasets['AFL_API_Matches'])
+    cache.load_data(Dataset_Name="AFL_API_Team_Positions", ID="AFL_2024_R1_Richmond_Carlton")
+    assert len(client.loads) == 4
+    assert cache.get_stats()['entries'] == 0
+
+def load_datasets(cache_dir, names):
+    cache = DataCache(cache_dir=cache_dir, client=FakeAFLDataClient({name: create_dataset(20, seed=i) for i, name in enumerate(names)}))
+    for name in names:
+        cache.load_data(name)
+
+def test_concurrent_processes_keep_every_index_entry(tmp_path):
+    names = [f"Dataset_{i}" for i in range(40)]
+    processes = [multiprocessing.get_context("fork").Process(target=load_datasets, args=(str(tmp_path), names[i::4])) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    
+    assert DataCache(cache_dir=str(tmp_path)).get_stats()['entries'] == len(names)
@@ -0,0 +1,89 @@
+import pickle
+import numpy as np
+import pandas as pd
+import geopy.distance
+from afl_match_outcome_model.data_preparation.distance import calculate_geodesic_distance, create_venue_distance_matrix, lookup_venue_distances
+from afl_match_outcome_model.data_preparation.feature_engineering import create_distance_travelled_feature
+from afl_match_outcome_model.data_preparation.transformers import VenueInfoMerger
+
+venue_info = pd.DataFrame([
+    ('M.C.G.', -37.8200, 144.9834),
+    ('Docklands', -37.8165, 144.9475),
+    ('S.C.G.', -33.8917, 151.2247),
+    ('Gabba', -27.4858, 153.0381),
+    ('Adelaide Oval', -34.9156, 138.5961),
+    ('Perth Stadium', -31.9512, 115.8891),
+    ('Marrara Oval', -12.3990, 130.8872),
+    ('Jiangwan Stadium', 31.3058, 121.5137),
+    ('Wellington', -41.2731, 174.7855),
+], columns=['Venue', 'Latitude', 'Longitude'])
+
+home_info = pd.DataFrame({'Home_Team': ['Collingwood', 'Sydney', 'West Coast'], 'Home_Team_Venue': ['M.C.G.', 'S.C.G.', 'Perth Stadium']})
+away_info = home_info.rename(columns={'Home_Team': 'Away_Team', 'Home_Team_Venue': 'Away_Team_Venue'})
+
+max_error_km = 1e-3
+
+def get_geopy_distances(latitude_1, longitude_1, latitude_2, longitude_2):
+    return np.array([geopy.distance.geodesic((lat_1, lon_1), (lat_2, lon_2)).km for lat_1, lon_1, lat_2, lon_2 in zip(latitude_1, longitude_1, latitude_2, longitude_2)])
+
+def test_geodesic_distance_matches_geopy_over_random_points():
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(-89, 89, 2000), rng.uniform(-180, 180, 2000), rng.uniform(-89, 89, 2000), rng.uniform(-180, 180, 2000)])
+    # Identical and nearly antipodal pairs
+    points[:10, 2:] = points[:10, :2]
+    points[10:15, 2:] = np.column_stack([-points[10:15, 0], points[10:15, 1] - 179.9])
+    
+    distances = calculate_geodesic_distance(*points.T)
+    
+    np.testing.assert_allclose(distances, get_geopy_distances(*points.T), rtol=0, atol=max_error_km)
+
+def test_geodesic_distance_is_nan_for_missing_coordinates():
+    distances = calculate_geodesic_distance([-37.82, np.nan], [144.98, 144.98], [-33.89, -33.89], [151.22, 151.22])
+    
+    assert not np.isnan(distances[0]) and np.isnan(distances[1])
+
+def test_venue_distance_matrix_matches_geopy():
+    venue_distance_matrix = create_venue_distance_matrix(venue_info)
+    from_venues, to_venues = np.repeat(venue_info['Venue'], len(venue_info)), np.tile(venue_info['Venue'], len(venue_info))
+    coordinates = venue_info.set_index('Venue')
+    
+    distances = lookup_venue_distances(venue_distance_matrix, from_venues, to_venues)
+    
+    geopy_distances = get_geopy_distances(coordinates.loc[from_venues, 'Latitude'], coordinates.loc[from_venues, 'Longitude'], coordinates.loc[to_venues, 'Latitude'], coordinates.loc[to_venues, 'Longitude'])
+    np.testing.assert_allclose(distances, geopy_distances, rtol=0, atol=max_error_km)
+    assert np.isnan(lookup_venue_distances(venue_distance_matrix, ['M.C.G.'], ['Unknown']))[0]
+
+def test_distance_travelled_feature_matches_geopy():
+    rng = np.random.default_rng(1)
+    venues = venue_info.set_index('Venue').loc[rng.choice(venue_info['Venue'], 150)]
+    match_stats = pd.DataFrame({
+        'Venue_Latitude': venues['Latitude'].to_numpy()[0::3], 'Venue_Longitude': venues['Longitude'].to_numpy()[0::3],
+        'Home_Team_Venue_Latitude': venues['Latitude'].to_numpy()[1::3], 'Home_Team_Venue_Longitude': venues['Longitude'].to_numpy()[1::3],
+        'Away_Team_Venue_Latitude': venues['Latitude'].to_numpy()[2::3], 'Away_Team_Venue_Longitude': venues['Longitude'].to_numpy()[2::3],
+    })
+    
+    match_stats = create_distance_travelled_feature(match_stats)
+    
+    for location in ['Home', 'Away']:
+        geopy_distances = get_geopy_distances(match_stats['Venue_Latitude'], match_stats['Venue_Longitude'], match_stats[f'{location}_Team_Venue_Latitude'], match_stats[f'{location}_Team_Venue_Longitude'])
+        np.testing.assert_allclose(match_stats[f'{location}_Distance_Travelled'], geopy_distances, rtol=0, atol=max_error_km)
+
+def test_venue_info_merger_distances_match_geopy():
+    X = pd.DataFrame({'Venue': ['M.C.G.', 'Perth Stadium', 'Jiangwan Stadium'], 'Home_Team': ['Collingwood', 'West Coast', 'Sydney'], 'Away_Team': ['Sydney', 'Collingwood', 'West Coast']})
+    
+    X_venue = VenueInfoMerger(venue_info, home_info, away_info).fit(X).transform(X)
+    
+    for location in ['Home', 'Away']:
+        geopy_distances = get_geopy_distances(X_venue['Venue_Latitude'], X_venue['Venue_Longitude'], X_venue[f'{location}_Team_Venue_Latitude'], X_venue[f'{location}_Team_Venue_Longitude'])
+        np.testing.assert_allclose(X_venue[f'{location}_Distance_Travelled'], geopy_distances, rtol=0, atol=max_error_km)
+
+def test_venue_info_merger_builds_distance_matrix_for_older_pickles():
+    merger = VenueInfoMerger(venue_info, home_info, away_info).fit(None)
+    state = dict(merger.__getstate__())
+    del state['venue_distance_matrix']
+    older = VenueInfoMerger.__new__(VenueInfoMerger)
+    older.__dict__.update(state)
+    
+    loaded = pickle.loads(pickle.dumps(older))
+    
+    pd.testing.assert_frame_equal(loaded.venue_distance_matrix, merger.venue_distance_matrix)
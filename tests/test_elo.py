@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from afl_match_outcome_model.data_preparation.elo import find_season_first_match_flags, sweep_elo_parameters
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer
+from synthetic_data import create_synthetic_matches
+
+def score_elo_transformer(matches, burn_in, **params):
+    """Log loss and Brier score of an ELOTransformer's home win probabilities against each result."""
+
+    transformer = ELOTransformer(**params).fit(matches)
+    probs_col = 'Home_xELO_probs' if params['expected'] else 'Home_ELO_probs'
+    probs = transformer.elo_table[probs_col].reindex(matches['Match_ID']).to_numpy()[burn_in:]
+    margins = matches['Margin'].to_numpy(dtype=np.float64)[burn_in:]
+    outcomes = np.where(margins > 0, 1.0, np.where(margins == 0, 0.5, 0.0))
+    clipped_probs = np.clip(probs, 1e-15, 1 - 1e-15)
+
+    return -np.mean(outcomes * np.log(clipped_probs) + (1 - outcomes) * np.log(1 - clipped_probs)), np.mean((probs - outcomes) ** 2)
+
+@pytest.mark.parametrize("expected", [False, True])
+@pytest.mark.parametrize("use_numba", [False, True])
+def test_sweep_matches_individual_elo_transformer_fits(expected, use_numba):
+    matches = create_synthetic_matches(500)
+
+    sweep = sweep_elo_parameters(matches, k_factors=[16, 32], initial_ratings=[1500, 1400], season_regressions=[0.0, 0.5], expected=expected, burn_in=50, use_numba=use_numba)
+
+    for config in sweep.itertuples():
+        log_loss, brier_score = score_elo_transformer(matches, 50, k_factor=config.k_factor, initial_rating=config.initial_rating, season_regression=config.season_regression, expected=expected)
+        np.testing.assert_allclose([config.log_loss, config.brier_score], [log_loss, brier_score], rtol=1e-10)
+
+def test_season_first_match_flags_match_elo_transformer():
+    matches = create_synthetic_matches(500)
+    transformer = ELOTransformer().fit(matches.iloc[:300])
+    transformer.partial_fit(matches)
+
+    # The transformer's flags for later matches use the first rounds recorded by the earlier fit
+    for flags, expected_flags in zip(transformer._find_season_first_match_flags(matches), find_season_first_match_flags(matches)):
+        np.testing.assert_array_equal(flags, expected_flags)
+    assert find_season_first_match_flags(matches)[0][:9].all()
@@ -0,0 +1,80 @@
+import pickle
+import numpy as np
+import pandas as pd
+from afl_match_outcome_model.data_preparation.keyed_table import KeyedTable, get_partition_values, upsert_rows
+
+key_cols = ['Match_ID', 'Chain_Number', 'Order', 'Player']
+
+def create_chains(match_ids, n_chains=3, value=0.0):
+    index = pd.MultiIndex.from_product([match_ids, np.arange(n_chains)], names=['Match_ID', 'Chain_Number'])
+    return index.to_frame(index=False).assign(Order=0, Player="Player", xScore=value)
+
+def test_upsert_appends_new_partitions():
+    table = KeyedTable(create_chains(['AFL_2024_01_A_B']), key_cols=key_cols)
+
+    table.upsert(create_chains(['AFL_2024_02_A_B', 'AFL_2024_02_C_D'], value=1.0))
+
+    expected = pd.concat([create_chains(['AFL_2024_01_A_B']), create_chains(['AFL_2024_02_A_B', 'AFL_2024_02_C_D'], value=1.0)], ignore_index=True)
+    pd.testing.assert_frame_equal(table.to_frame(), expected)
+    assert get_partition_values(table) == ['AFL_2024_01_A_B', 'AFL_2024_02_A_B', 'AFL_2024_02_C_D']
+    assert len(table) == 9
+
+def test_upsert_replaces_whole_partitions():
+    table = KeyedTable(create_chains(['AFL_2024_01_A_B', 'AFL_2024_01_C_D'], n_chains=4), key_cols=key_cols)
+    table.upsert(create_chains(['AFL_2024_02_A_B']))
+
+    # The reloaded match has fewer chains than before, every old chain of it is replaced
+    table.upsert(create_chains(['AFL_2024_01_A_B'], n_chains=2, value=2.0))
+    table.upsert(create_chains(['AFL_2024_02_A_B'], n_chains=1, value=3.0))
+
+    frame = table.to_frame()
+    pd.testing.assert_frame_equal(frame.sort_values(key_cols, ignore_index=True), pd.concat([
+        create_chains(['AFL_2024_01_A_B'], n_chains=2, value=2.0),
+        create_chains(['AFL_2024_01_C_D'], n_chains=4),
+        create_chains(['AFL_2024_02_A_B'], n_chains=1, value=3.0),
+    ]).sort_values(key_cols, ignore_index=True))
+    assert sorted(get_partition_values(table)) == ['AFL_2024_01_A_B', 'AFL_2024_01_C_D', 'AFL_2024_02_A_B']
+
+def test_key_collisions_in_new_rows_keep_the_last():
+    table = KeyedTable(create_chains(['AFL_2024_01_A_B']), key_cols=key_cols)
+    rows = pd.concat([create_chains(['AFL_2024_01_A_B'], value=1.0), create_chains(['AFL_2024_01_A_B'], value=2.0)], ignore_index=True)
+
+    table.upsert(rows)
+
+    pd.testing.assert_frame_equal(table.to_frame().reset_index(drop=True), create_chains(['AFL_2024_01_A_B'], value=2.0))
+
+def test_to_frame_is_cached_until_the_next_upsert():
+    table = KeyedTable(create_chains(['AFL_2024_01_A_B']), key_cols=key_cols)
+    table.upsert(create_chains(['AFL_2024_02_A_B']))
+
+    frame = table.to_frame()
+    assert table.to_frame() is frame
+    table.upsert(create_chains([])[:0])
+    assert table.to_frame() is frame
+
+    table.upsert(create_chains(['AFL_2024_03_A_B']))
+    assert table.to_frame() is not frame
+    assert len(table.parts) == 1
+
+def test_upsert_rows_wraps_dataframes_and_pickles():
+    table = upsert_rows(create_chains(['AFL_2024_01_A_B']), create_chains(['AFL_2024_01_A_B'], value=1.0), key_cols=key_cols)
+
+    loaded = pickle.loads(pickle.dumps(table))
+
+    pd.testing.assert_frame_equal(loaded.to_frame(), table.to_frame())
+    loaded.upsert(create_chains(['AFL_2024_02_A_B']))
+    assert get_partition_values(loaded) == ['AFL_2024_01_A_B', 'AFL_2024_02_A_B']
+
+def test_loads_pickles_without_frame_cache():
+    table = KeyedTable.__new__(KeyedTable)
+    table.__dict__.update({
+        'key_cols': key_cols,
+        'partition_col': 'Match_ID',
+        'parts': [create_chains(['AFL_2024_01_A_B']), create_chains(['AFL_2024_02_A_B'])],
+        'partitions': {'AFL_2024_01_A_B': 0, 'AFL_2024_02_A_B': 1},
+    })
+
+    loaded = pickle.loads(pickle.dumps(table))
+    loaded.upsert(create_chains(['AFL_2024_01_A_B'], value=1.0))
+
+    pd.testing.assert_frame_equal(loaded.to_frame(), pd.concat([create_chains(['AFL_2024_02_A_B']), create_chains(['AFL_2024_01_A_B'], value=1.0)], ignore_index=True))
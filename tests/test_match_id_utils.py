@@ -0,0 +1,68 @@
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from afl_match_outcome_model.data_preparation import match_id_utils
+from afl_match_outcome_model.data_preparation.match_id_utils import create_match_id_table, parse_match_ids
+from synthetic_data import create_synthetic_matches
+
+def assert_components_match(components, match_ids):
+    expected = create_match_id_table(pd.Index(match_ids))
+    for col in match_id_utils.match_id_components:
+        np.testing.assert_array_equal(np.asarray(components[col], dtype=object), expected[col].to_numpy(dtype=object))
+
+def test_parse_match_ids_matches_scalar_parsers():
+    match_ids = pd.Series(["AFL_2023_F4_Collingwood_Brisbane", "AFL_2024_05_GreaterWesternSydney_StKilda"] * 3, index=np.arange(10, 16))
+    
+    components = parse_match_ids(match_ids)
+    
+    assert list(components.index) == list(match_ids.index)
+    assert list(components['Home_Team'].astype(str)) == [match_id_utils.get_home_team_from_match_id(match_id) for match_id in match_ids]
+    assert list(components['Away_Team'].astype(str)) == [match_id_utils.get_away_team_from_match_id(match_id) for match_id in match_ids]
+    assert list(components['Year']) == [match_id_utils.get_season_from_match_id(match_id) for match_id in match_ids]
+
+def test_parse_match_ids_rejects_missing_values():
+    with pytest.raises(ValueError):
+        parse_match_ids(pd.Series(["AFL_2023_F4_Collingwood_Brisbane", None]))
+
+def test_concurrent_calls_each_get_their_own_match_ids(monkeypatch):
+    monkeypatch.setattr(match_id_utils, 'match_id_table', match_id_utils.match_id_table.iloc[:0])
+    match_ids = create_synthetic_matches(8000)['Match_ID'].to_numpy()
+    chunks = np.array_split(match_ids, 16)
+    results, errors = {}, []
+    
+    def parse(i):
+        try:
+            for _ in range(5):
+                results[i] = parse_match_ids(chunks[i])
+        except Exception as e:
+            errors.append(e)
+    
+    # Switching threads often interleaves the calls between reading and replacing the shared table
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=parse, args=(i,)) for i in range(len(chunks))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    
+    assert not errors
+    for i, chunk in enumerate(chunks):
+        assert_components_match(results[i], chunk)
+
+def test_match_id_table_is_capped(monkeypatch):
+    monkeypatch.setattr(match_id_utils, 'match_id_table', match_id_utils.match_id_table.iloc[:0])
+    monkeypatch.setattr(match_id_utils, 'match_id_table_max_rows', 100)
+    match_ids = create_synthetic_matches(500)['Match_ID'].to_numpy()
+    
+    for chunk in np.array_split(match_ids, 5):
+        assert_components_match(parse_match_ids(chunk), chunk)
+    
+    assert len(match_id_utils.match_id_table) == 100
+    assert list(match_id_utils.match_id_table.index) == list(match_ids[-100:])
+    assert_components_match(parse_match_ids(match_ids), match_ids)
@@ -0,0 +1,102 @@
+import os
+import joblib
+import numpy as np
+import pytest
+from afl_match_outcome_model.predict.model_registry import ModelRegistry
+
+class CountingLoader:
+    """Loads with joblib, counting the loads."""
+
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self, file_path):
+        self.loads += 1
+        return joblib.load(file_path)
+
+def dump(artifact, path, mtime_ns=None):
+    joblib.dump(artifact, path)
+    # Filesystem timestamps can be coarser than the test, so each write sets its own mtime
+    mtime_ns = os.stat(path).st_mtime_ns if mtime_ns is None else mtime_ns
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+@pytest.fixture
+def registry():
+    return ModelRegistry(loader=CountingLoader())
+
+def test_unchanged_file_is_not_reloaded(tmp_path, registry):
+    path = str(tmp_path / "model.joblib")
+    dump({'version': 1}, path)
+    registry.register("model", path)
+
+    first = registry.get("model")
+
+    assert registry.get("model") is first
+    assert registry.loader.loads == 1
+    stats = registry.get_stats()["model"]
+    assert stats['loads'] == 1 and stats['file_bytes'] == os.path.getsize(path) and stats['load_seconds'] >= 0
+
+def test_changed_file_is_hot_reloaded(tmp_path, registry):
+    path = str(tmp_path / "model.joblib")
+    dump({'version': 1}, path, mtime_ns=10 ** 18)
+    registry.register("model", path)
+    previous = registry.get("model")
+
+    dump({'version': 2}, path, mtime_ns=10 ** 18 + 10 ** 9)
+
+    assert registry.get("model") == {'version': 2}
+    assert previous == {'version': 1}
+    assert registry.get_stats()["model"]['loads'] == 2
+
+def test_size_change_with_same_mtime_is_reloaded(tmp_path, registry):
+    path = str(tmp_path / "model.joblib")
+    dump(np.zeros(10), path, mtime_ns=10 ** 18)
+    registry.register("model", path)
+    registry.get("model")
+
+    dump(np.zeros(100), path, mtime_ns=10 ** 18)
+
+    assert len(registry.get("model")) == 100
+
+def test_rewrite_with_same_content_is_not_reloaded(tmp_path, registry):
+    path = str(tmp_path / "model.joblib")
+    dump({'version': 1}, path, mtime_ns=10 ** 18)
+    registry.register("model", path)
+    first = registry.get("model")
+
+    dump({'version': 1}, path, mtime_ns=10 ** 18 + 10 ** 9)
+
+    assert registry.get("model") is first
+    assert registry.loader.loads == 1
+
+def test_failed_load_keeps_previous_artifact(tmp_path, registry):
+    path = str(tmp_path / "model.joblib")
+    dump({'version': 1}, path, mtime_ns=10 ** 18)
+    registry.register("model", path)
+    registry.get("model")
+
+    with open(path, "wb") as f:
+        f.write(b"partial")
+    os.utime(path, ns=(10 ** 18 + 10 ** 9, 10 ** 18 + 10 ** 9))
+
+    assert registry.get("model") == {'version': 1}
+    dump({'version': 2}, path, mtime_ns=10 ** 18 + 2 * 10 ** 9)
+    assert registry.get("model") == {'version': 2}
+
+def test_path_function_follows_new_file(tmp_path, registry):
+    paths = [str(tmp_path / "model-1.joblib"), str(tmp_path / "model-2.joblib")]
+    dump({'version': 1}, paths[0])
+    dump({'version': 2}, paths[1])
+    latest = [paths[0]]
+    registry.register("model", lambda: latest[0])
+
+    assert registry.get("model") == {'version': 1}
+    latest[0] = paths[1]
+    assert registry.get("model") == {'version': 2}
+    assert registry.get_stats()["model"]['file_path'] == paths[1]
+
+def test_missing_file_raises_before_first_load(tmp_path, registry):
+    registry.register("model", str(tmp_path / "missing.joblib"))
+
+    with pytest.raises(FileNotFoundError):
+        registry.get("model")
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from afl_match_outcome_model.data_preparation.pipeline_profiler import PipelineProfiler
+
+class RecordingTransformer(BaseEstimator, TransformerMixin):
+    def fit(self, X, y=None):
+        self.fitted_y = y
+        return self
+    
+    def transform(self, X):
+        return X + 1
+
+def create_data(n_rows=100, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 3)), columns=['a', 'b', 'c'])
+    return X, X @ np.array([1.0, -2.0, 0.5]) + 3
+
+def test_fit_passes_y_to_every_step():
+    X, y = create_data()
+    pipeline = Pipeline([('record', RecordingTransformer()), ('model', LinearRegression())])
+    
+    PipelineProfiler(pipeline).fit(X, y)
+    
+    expected = Pipeline([('record', RecordingTransformer()), ('model', LinearRegression())]).fit(X, y)
+    pd.testing.assert_series_equal(pipeline['record'].fitted_y, y)
+    np.testing.assert_allclose(pipeline.predict(X), expected.predict(X))
+
+def test_fit_transform_matches_pipeline_and_reports_each_step():
+    X, y = create_data()
+    pipeline = Pipeline([('first', RecordingTransformer()), ('second', RecordingTransformer())])
+    profiler = PipelineProfiler(pipeline, name="test")
+    
+    Xt = profiler.fit_transform(X, y)
+    
+    pd.testing.assert_frame_equal(Xt, X + 2)
+    pd.testing.assert_series_equal(pipeline['second'].fitted_y, y)
+    assert [step['name'] for step in profiler.last_report['steps']] == ['first', 'second']
+    assert profiler.last_report['method'] == "fit_transform"
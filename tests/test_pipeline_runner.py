@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+from afl_match_outcome_model.data_preparation.pipeline_runner import ParallelPipeline, get_step, get_step_waves
+from afl_match_outcome_model.data_preparation.transformers import ELOTransformer, PastPerformanceTransformer
+from synthetic_data import create_synthetic_matches
+
+class ColumnSum(BaseEstimator, TransformerMixin):
+    def __init__(self, columns, output):
+        self.columns = columns
+        self.output = output
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return X.assign(**{self.output: X[self.columns].sum(axis=1)})
+
+class ColumnRewriter(BaseEstimator, TransformerMixin):
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return X.assign(Home_Score=0)
+
+class RowDropper(BaseEstimator, TransformerMixin):
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return X.iloc[1:].assign(Dropped=1)
+
+def create_steps():
+    window_summarizer_kwargs = {"lag_feature": {"lag": [1, 2], "mean": [[1, 5]]}}
+    return [
+        ('elo', ELOTransformer(), []),
+        ('xelo', ELOTransformer(expected=True), []),
+        ('score_for', PastPerformanceTransformer(['Team_Score', 'Team_Goals'], window_summarizer_kwargs, for_against="For"), []),
+        ('score_against', PastPerformanceTransformer(['Opponent_Score', 'Opponent_Goals'], window_summarizer_kwargs, for_against="Against"), []),
+    ]
+
+def steps_without_dependencies(steps):
+    return [(name, transformer) for name, transformer, _ in steps]
+
+def transform_in_turn(pipeline, X):
+    """Runs a fitted Pipeline's steps one after another, as Pipeline.transform does."""
+
+    for transformer in pipeline.named_steps.values():
+        X = transformer.transform(X)
+    return X
+
+def test_get_step_waves_runs_each_step_after_its_dependencies():
+    steps = [('a', None, []), ('b', None, ['a']), ('c', None, []), ('d', None, ['b', 'c']), ('e', None, ['a'])]
+
+    assert get_step_waves(steps) == [['a', 'c'], ['b', 'e'], ['d']]
+
+@pytest.mark.parametrize("steps, message", [
+    ([('a', None, ['b']), ('b', None, ['a']), ('c', None, [])], "cyclic"),
+    ([('a', None, ['missing'])], "unknown"),
+    ([('a', None, []), ('a', None, [])], "unique"),
+])
+def test_get_step_waves_raises_on_invalid_dependencies(steps, message):
+    with pytest.raises(ValueError, match=message):
+        get_step_waves(steps)
+
+@pytest.mark.parametrize("backend", ["loky", "threading"])
+def test_parallel_pipeline_matches_sequential_pipeline(backend):
+    matches = create_synthetic_matches(600)
+    history, fixtures = matches.iloc[:-9], matches.iloc[-9:]
+    pipeline = Pipeline(steps_without_dependencies(create_steps()))
+    parallel = ParallelPipeline(create_steps(), n_jobs=2, backend=backend, parallel_min_rows=0)
+
+    expected = pipeline.fit_transform(history)
+    pd.testing.assert_frame_equal(parallel.fit_transform(history), expected[parallel.transform(history).columns], check_like=True)
+    pd.testing.assert_frame_equal(parallel.transform(matches), transform_in_turn(pipeline, matches), check_like=True)
+    # The steps reset a fixture frame's index, the ParallelPipeline keeps its input's
+    pd.testing.assert_frame_equal(parallel.transform(fixtures).reset_index(drop=True), transform_in_turn(pipeline, fixtures), check_like=True)
+    assert set(parallel.step_timings) == {'elo', 'xelo', 'score_for', 'score_against'}
+
+def test_dependent_step_receives_its_dependencies_columns():
+    matches = create_synthetic_matches(200)
+    steps = [
+        ('home', ColumnSum(['Home_Score'], 'Home_Copy'), []),
+        ('away', ColumnSum(['Away_Score'], 'Away_Copy'), []),
+        ('total', ColumnSum(['Home_Copy', 'Away_Copy'], 'Total'), ['home', 'away']),
+    ]
+
+    transformed = ParallelPipeline(steps, n_jobs=2, backend="threading", parallel_min_rows=0).fit_transform(matches)
+
+    pd.testing.assert_series_equal(transformed['Total'], matches['Home_Score'] + matches['Away_Score'], check_names=False)
+
+def test_fit_keeps_steps_and_stores_fitted_copies():
+    matches = create_synthetic_matches(300)
+    steps = create_steps()
+    elo = steps[0][1]
+    parallel = ParallelPipeline(steps, n_jobs=2, parallel_min_rows=0).fit(matches)
+
+    assert parallel.get_params()['steps'] is steps
+    assert steps[0][1] is elo and not hasattr(elo, 'elo_table')
+    assert get_step(parallel, 'elo') is parallel.fitted_steps['elo']
+    assert hasattr(get_step(parallel, 'elo'), 'elo_table')
+
+    # A transform leaves the fitted copies in place
+    fitted_elo = parallel.fitted_steps['elo']
+    parallel.transform(matches)
+    assert parallel.fitted_steps['elo'] is fitted_elo
+
+    # Setting new steps fits them afresh
+    parallel.set_params(steps=create_steps()[:1]).fit(matches)
+    assert list(parallel.fitted_steps) == ['elo'] and parallel.fitted_steps['elo'] is not fitted_elo
+
+@pytest.mark.parametrize("transformer, message", [(ColumnRewriter(), "rewrites columns Home_Score"), (RowDropper(), "every row")])
+def test_step_rewriting_input_raises(transformer, message):
+    matches = create_synthetic_matches(100)
+    parallel = ParallelPipeline([('step', transformer, [])])
+
+    with pytest.raises(ValueError, match=message):
+        parallel.fit_transform(matches)
@@ -0,0 +1,127 @@
+import glob
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pytest
+from afl_match_outcome_model.data_preparation.pipeline_utils import ema5
+from afl_match_outcome_model.data_preparation.player_feature_store import PlayerFeatureStore
+from afl_match_outcome_model.data_preparation.transformers import SquadPerformanceTransformer, YearRoundTransformer
+from synthetic_data import create_synthetic_matches
+
+target_cols = ['xScore', 'exp_vaep_value']
+window_summarizer_kwargs = {"lag_feature": {"lag": [1], "mean": [[1, 3]], ema5: [[1, 5]]}}
+
+def create_squad_data(matches, squad_size=6, list_size=10, seed=0):
+    """Creates squads drawn from each team's list, and one chain per squad player with their xScore and exp_vaep_value."""
+    
+    rng = np.random.default_rng(seed)
+    teams = np.concatenate([matches['Home_Team'].to_numpy(), matches['Away_Team'].to_numpy()])
+    match_ids = np.concatenate([matches['Match_ID'].to_numpy(), matches['Match_ID'].to_numpy()])
+    player_numbers = np.argsort(rng.random((len(teams), list_size)), axis=1)[:, :squad_size]
+    squads = pd.DataFrame({
+        'Match_ID': np.repeat(match_ids, squad_size),
+        'Team': np.repeat(teams, squad_size),
+        'Player': [f"{team} {number}" for team, number in zip(np.repeat(teams, squad_size), player_numbers.ravel())],
+    })
+    chains = squads.assign(Chain_Number=0, Order=0, xScore=rng.gamma(1, 1, len(squads)), exp_vaep_value=rng.normal(0, 1, len(squads)))
+    
+    return squads, chains.drop(columns='exp_vaep_value'), chains.drop(columns='xScore')
+
+@pytest.fixture
+def data():
+    matches = YearRoundTransformer().fit_transform(create_synthetic_matches(120)[['Match_ID', 'Home_Team', 'Away_Team']])
+    return (matches,) + create_squad_data(matches)
+
+def create_transformer(squads, expected_score, expected_vaep, feature_store=None):
+    return SquadPerformanceTransformer(squads, expected_score, expected_vaep, target_cols, window_summarizer_kwargs, dtype="float64", feature_store=feature_store)
+
+def create_store(store_dir):
+    return PlayerFeatureStore(str(store_dir), target_cols, window_summarizer_kwargs['lag_feature'], dtype="float64")
+
+def test_store_features_match_window_summarizer(tmp_path, data):
+    matches, squads, expected_score, expected_vaep = data
+    expected = create_transformer(squads, expected_score, expected_vaep).fit(matches).transform(matches)
+    
+    # The store is filled for the first matches, then updated for the rest
+    transformer = create_transformer(squads[squads['Match_ID'].isin(matches['Match_ID'].iloc[:60])], expected_score, expected_vaep, create_store(tmp_path))
+    transformer.update_feature_store()
+    transformer.squads = squads
+    transformer.update_feature_store()
+    
+    pd.testing.assert_frame_equal(transformer.fit(matches).transform(matches), expected)
+    pd.testing.assert_frame_equal(create_store(tmp_path).get_data(), transformer.feature_store.get_data())
+
+def test_fit_only_reads_store(tmp_path, data):
+    matches, squads, expected_score, expected_vaep = data
+    transformer = create_transformer(squads, expected_score, expected_vaep, create_store(tmp_path))
+    
+    with pytest.raises(ValueError, match="update_feature_store"):
+        transformer.fit(matches)
+    assert not glob.glob(str(tmp_path / "*.parquet"))
+    
+    transformer.update_feature_store()
+    part_paths = sorted(glob.glob(str(tmp_path / "*.parquet")))
+    transformer.fit(matches)
+    
+    assert sorted(glob.glob(str(tmp_path / "*.parquet"))) == part_paths
+
+def test_store_with_other_windows_is_rejected(tmp_path, data):
+    matches, squads, expected_score, expected_vaep = data
+    feature_store = PlayerFeatureStore(str(tmp_path), target_cols, {"lag": [1]}, dtype="float64")
+    
+    with pytest.raises(ValueError, match="lag_feature"):
+        create_transformer(squads, expected_score, expected_vaep, feature_store).update_feature_store()
+
+def test_rows_deleted_upstream_are_removed(tmp_path, data):
+    matches, squads, expected_score, expected_vaep = data
+    transformer = create_transformer(squads, expected_score, expected_vaep, create_store(tmp_path))
+    transformer.update_feature_store()
+    
+    # A match's squads are withdrawn upstream, shifting the windows of its players' later matches
+    remaining_squads = squads[squads['Match_ID'] != matches['Match_ID'].iloc[30]]
+    transformer.squads = remaining_squads
+    transformer.update_feature_store()
+    
+    expected = create_transformer(remaining_squads, expected_score, expected_vaep).fit(matches).transform(matches)
+    pd.testing.assert_frame_equal(transformer.fit(matches).transform(matches), expected)
+    reloaded = create_store(tmp_path).load()
+    pd.testing.assert_frame_equal(reloaded.get_data(), transformer.feature_store.get_data())
+    assert (reloaded.get_data()['Match_ID'] != matches['Match_ID'].iloc[30]).all()
+    
+    reloaded.compact()
+    pd.testing.assert_frame_equal(create_store(tmp_path).get_data(), transformer.feature_store.get_data())
+
+def create_player_rows(players, n_rounds=20):
+    # Each player's values are seeded by their number, so do not depend on which players are updated together
+    rows = []
+    for player in players:
+        rng = np.random.default_rng(int(player.split()[1]))
+        index = pd.MultiIndex.from_product([[player], np.arange(n_rounds) + 202101], names=['Player', 'YearRound'])
+        rows.append(pd.DataFrame({
+            'Match_ID': [f"AFL_{year_round}" for _, year_round in index],
+            'Team': player.split()[0],
+            'xScore': rng.gamma(1, 1, n_rounds),
+            'exp_vaep_value': rng.normal(0, 1, n_rounds),
+        }, index=index))
+    return pd.concat(rows)
+
+def update_store(store_dir, players, compact):
+    store = create_store(store_dir)
+    for i in range(0, len(players), 2):
+        store.update(create_player_rows(players[i:i + 2]))
+        if compact:
+            store.compact()
+
+def test_concurrent_processes_keep_every_update(tmp_path):
+    players = [f"Team{i % 4} {i}" for i in range(48)]
+    processes = [multiprocessing.get_context("fork").Process(target=update_store, args=(str(tmp_path), players[i::4], i == 0)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    
+    data = create_store(tmp_path).get_data()
+    expected = create_store(tmp_path / "expected")
+    for player in players:
+        expected.update(create_player_rows([player]))
+    pd.testing.assert_frame_equal(data, expected.get_data())
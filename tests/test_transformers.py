@@ -0,0 +1,267 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.exceptions import NotFittedError
+from sklearn.pipeline import Pipeline
+from afl_match_outcome_model.data_preparation import data_cache
+from afl_match_outcome_model.data_preparation.update_preprocessor import fit_preprocessor
+from afl_match_outcome_model.data_preparation.transformers import DaysRestTransformer, ELOTransformer, ExpectedMerger, SquadPerformanceTransformer
+from synthetic_data import create_synthetic_matches
+
+def create_baseline_elo_pickle(transformer):
+    """Pickles a fitted ELOTransformer with the attributes it had before the ELO table, per match dicts of ratings and probabilities."""
+    
+    elo_table = transformer.elo_table
+    baseline = ELOTransformer.__new__(ELOTransformer)
+    baseline.__dict__.update({
+        'k_factor': transformer.k_factor,
+        'initial_rating': transformer.initial_rating,
+        'expected': transformer.expected,
+        'elo_dict': dict(transformer.elo_dict),
+        'team_season_first_matches': transformer.team_season_first_matches,
+        'elos': {match_id: list(row) for match_id, row in zip(elo_table.index, elo_table.iloc[:, :2].to_numpy())},
+        'elo_probs': {match_id: list(row) for match_id, row in zip(elo_table.index, elo_table.iloc[:, 2:].to_numpy())},
+    })
+    
+    return pickle.dumps(baseline)
+
+def test_elo_transformer_transforms_after_loading_baseline_pickle():
+    matches = create_synthetic_matches(300)
+    history, fixtures = matches.iloc[:-9], matches.iloc[-9:]
+    transformer = ELOTransformer().fit(history)
+    
+    baseline = pickle.loads(create_baseline_elo_pickle(transformer))
+    
+    assert not hasattr(baseline, 'elos')
+    assert baseline.last_match_id == history['Match_ID'].iloc[-1]
+    pd.testing.assert_frame_equal(baseline.transform(matches), transformer.transform(matches))
+    pd.testing.assert_frame_equal(baseline.transform(fixtures), transformer.transform(fixtures))
+
+def test_elo_transformer_warm_start_refits_baseline_pickle():
+    matches = create_synthetic_matches(300)
+    transformer = ELOTransformer().fit(matches.iloc[:-9])
+    
+    # The baseline pickle kept no margins, so the first warm start refits the full history
+    baseline = pickle.loads(create_baseline_elo_pickle(transformer))
+    baseline.warm_start = True
+    baseline.fit(matches)
+    
+    pd.testing.assert_frame_equal(baseline.transform(matches), ELOTransformer().fit(matches).transform(matches))
+    assert not np.isnan(baseline.fitted_margins).any()
+
+def create_days_rest_matches():
+    return pd.DataFrame({
+        'Match_ID': ['M1', 'M2', 'M3', 'M4', 'M5'],
+        'Home_Team': ['Carlton', 'Richmond', 'Carlton', 'Geelong', 'Richmond'],
+        'Away_Team': ['Richmond', 'Geelong', 'Geelong', 'Carlton', 'Carlton'],
+        'Date': pd.to_datetime(['2024-03-14', '2024-03-21', '2024-03-23', '2024-03-30', '2024-04-04']),
+    })
+
+def test_days_rest_of_training_rows_is_days_since_previous_match():
+    matches = create_days_rest_matches()
+    
+    Xt = DaysRestTransformer().fit(matches).transform(matches)
+    
+    # A team's first match has no previous match
+    np.testing.assert_array_equal(Xt['Home_Days_Rest'], [np.nan, 7, 9, 7, 14])
+    np.testing.assert_array_equal(Xt['Away_Days_Rest'], [np.nan, np.nan, 2, 7, 5])
+
+def test_days_rest_of_fixtures_is_days_since_latest_fitted_match():
+    matches = create_days_rest_matches()
+    fixtures = pd.DataFrame({'Match_ID': ['M6', 'M7'], 'Home_Team': ['Geelong', 'Brisbane'], 'Away_Team': ['Richmond', 'Carlton'], 'Date': pd.to_datetime(['2024-04-11', '2024-04-12'])})
+    
+    Xt = DaysRestTransformer().fit(matches).transform(fixtures)
+    
+    # A team not in the fitted history has no previous match
+    np.testing.assert_array_equal(Xt['Home_Days_Rest'], [12, np.nan])
+    np.testing.assert_array_equal(Xt['Away_Days_Rest'], [7, 8])
+
+def test_days_rest_ignores_same_day_duplicates():
+    matches = create_days_rest_matches()
+    duplicated = pd.concat([matches, matches.iloc[[2]]], axis=0, ignore_index=True)
+    
+    Xt = DaysRestTransformer().fit(duplicated).transform(duplicated)
+    
+    pd.testing.assert_frame_equal(Xt.iloc[:5], DaysRestTransformer().fit(matches).transform(matches))
+    pd.testing.assert_frame_equal(Xt.iloc[[5]].reset_index(drop=True), Xt.iloc[[2]].reset_index(drop=True))
+
+def test_days_rest_loads_pickles_with_latest_dates():
+    matches = create_days_rest_matches()
+    fixtures = pd.DataFrame({'Match_ID': ['M6'], 'Home_Team': ['Geelong'], 'Away_Team': ['Richmond'], 'Date': pd.to_datetime(['2024-04-11'])})
+    baseline = DaysRestTransformer.__new__(DaysRestTransformer)
+    baseline.__dict__['latest_date'] = {team: max(matches.loc[(matches['Home_Team'] == team) | (matches['Away_Team'] == team), 'Date']) for team in ['Carlton', 'Richmond', 'Geelong']}
+    
+    baseline = pickle.loads(pickle.dumps(baseline))
+    
+    # Fixtures after the fitted history get the days since each team's latest date, as before the team timeline
+    pd.testing.assert_frame_equal(baseline.transform(fixtures), DaysRestTransformer().fit(matches).transform(fixtures))
+    assert list(baseline.transform(fixtures)[['Home_Days_Rest', 'Away_Days_Rest']].iloc[0]) == [12, 7]
+
+def assert_elo_transformers_equal(transformer, expected):
+    pd.testing.assert_frame_equal(transformer.elo_table, expected.elo_table, check_exact=True)
+    pd.testing.assert_series_equal(transformer.fitted_margins, expected.fitted_margins, check_exact=True)
+    assert transformer.elo_dict == expected.elo_dict
+    assert transformer.team_season_first_matches == expected.team_season_first_matches
+    assert transformer.last_match_id == expected.last_match_id
+
+@pytest.mark.parametrize("expected", [False, True])
+@pytest.mark.parametrize("n_fitted", [150, 218, 300])
+def test_elo_transformer_partial_fit_matches_full_fit(expected, n_fitted):
+    # 218 matches is one season, so the splits fall mid season, at a season boundary and in the next season
+    matches = create_synthetic_matches(450)
+    transformer = ELOTransformer(expected=expected).fit(matches.iloc[:n_fitted])
+    
+    transformer.partial_fit(matches.iloc[:n_fitted + 50])
+    transformer.partial_fit(matches)
+    
+    assert_elo_transformers_equal(transformer, ELOTransformer(expected=expected).fit(matches))
+
+def test_elo_transformer_warm_start_fit_folds_in_new_matches():
+    matches = create_synthetic_matches(450)
+    transformer = ELOTransformer(warm_start=True).fit(matches.iloc[:300])
+    fitted_elo_table = transformer.elo_table
+    
+    transformer.fit(matches)
+    
+    assert_elo_transformers_equal(transformer, ELOTransformer().fit(matches))
+    # The fitted matches were kept rather than recalculated
+    assert transformer.elo_table.iloc[:300].equals(fitted_elo_table)
+
+def test_elo_transformer_warm_start_refits_rewritten_history():
+    matches = create_synthetic_matches(450)
+    transformer = ELOTransformer(warm_start=True).fit(matches.iloc[:300])
+    
+    rewritten = matches.copy()
+    rewritten.loc[100, 'Margin'] += 12
+    
+    assert not transformer._can_partial_fit(rewritten)
+    with pytest.raises(ValueError, match="refit with fit"):
+        pickle.loads(pickle.dumps(transformer)).partial_fit(rewritten)
+    assert_elo_transformers_equal(transformer.fit(rewritten), ELOTransformer().fit(rewritten))
+
+def test_elo_transformer_warm_start_refits_matches_before_checkpoint():
+    matches = create_synthetic_matches(450)
+    # A match missing from the fitted history arrives after later matches were fitted
+    transformer = ELOTransformer(warm_start=True).fit(matches.drop(index=100).iloc[:299])
+    
+    assert not transformer._can_partial_fit(matches)
+    assert_elo_transformers_equal(transformer.fit(matches), ELOTransformer().fit(matches))
+
+def test_fit_preprocessor_warm_starts_elo(monkeypatch):
+    matches = create_synthetic_matches(450).assign(Match_Status="CONCLUDED")
+    monkeypatch.setattr(data_cache.data_cache, 'client', FakeMatchesClient(matches))
+    preproc = Pipeline([('elo', ELOTransformer().fit(matches.iloc[:300]))])
+    fitted_elo_table = preproc['elo'].elo_table
+    
+    fit_preprocessor(preproc)
+    
+    assert preproc['elo'].warm_start
+    assert preproc['elo'].elo_table.iloc[:300].equals(fitted_elo_table)
+    assert_elo_transformers_equal(preproc['elo'], ELOTransformer().fit(matches))
+
+class FakeMatchesClient:
+    """Stands in for AFLPy.AFLData_Client, serving one match table."""
+    
+    def __init__(self, matches):
+        self.matches = matches
+    
+    def load_data(self, Dataset_Name, ID=None):
+        return self.matches.copy()
+
+def create_chain_data(matches, chains_per_team=5, seed=0):
+    """Creates chain level xScore and exp_vaep_value rows for each team in each match."""
+    
+    rng = np.random.default_rng(seed)
+    teams = np.concatenate([matches['Home_Team'].to_numpy(), matches['Away_Team'].to_numpy()])
+    match_ids = np.concatenate([matches['Match_ID'].to_numpy(), matches['Match_ID'].to_numpy()])
+    n_rows = len(teams) * chains_per_team
+    chains = pd.DataFrame({
+        'Match_ID': np.repeat(match_ids, chains_per_team),
+        'Chain_Number': np.tile(np.arange(chains_per_team), len(teams)),
+        'Team': np.repeat(teams, chains_per_team),
+        'xScore': rng.gamma(1, 1, n_rows),
+        'exp_vaep_value': rng.normal(0, 1, n_rows),
+    })
+    
+    return chains[['Match_ID', 'Chain_Number', 'Team', 'xScore']], chains[['Match_ID', 'Chain_Number', 'Team', 'exp_vaep_value']]
+
+def create_fixture_matches(n_matches):
+    # The synthetic matches already carry team sums, the merger adds them
+    return create_synthetic_matches(n_matches)[['Match_ID', 'Home_Team', 'Away_Team']]
+
+def test_expected_merger_fit_keeps_params():
+    matches = create_fixture_matches(50)
+    expected_score, expected_vaep = create_chain_data(matches)
+    merger = ExpectedMerger(expected_score, expected_vaep)
+    params = merger.get_params()
+    
+    merger.fit(matches)
+    
+    assert merger.get_params()['expected_score'] is params['expected_score']
+    assert merger.get_params()['expected_vaep'] is params['expected_vaep']
+    Xt = merger.transform(matches)
+    np.testing.assert_allclose(Xt['Home_xScore_sum'], [expected_score.loc[(expected_score['Match_ID'] == match_id) & (expected_score['Team'] == team), 'xScore'].sum() for match_id, team in zip(matches['Match_ID'], matches['Home_Team'])])
+
+def test_expected_merger_refit_and_clone_match():
+    matches = create_fixture_matches(50)
+    merger = ExpectedMerger(*create_chain_data(matches)).fit(matches)
+    Xt = merger.transform(matches)
+    
+    pd.testing.assert_frame_equal(merger.fit(matches).transform(matches), Xt)
+    pd.testing.assert_frame_equal(clone(merger).fit(matches).transform(matches), Xt)
+
+def test_expected_merger_raises_before_fit():
+    matches = create_fixture_matches(10)
+    
+    with pytest.raises(NotFittedError):
+        ExpectedMerger(*create_chain_data(matches)).transform(matches)
+    with pytest.raises(ValueError):
+        ExpectedMerger().fit(matches)
+
+def test_expected_merger_update_matches_full_aggregation():
+    matches = create_fixture_matches(60)
+    expected_score, expected_vaep = create_chain_data(matches)
+    history, new_matches = matches.iloc[:50], matches.iloc[50:]
+    merger = ExpectedMerger(expected_score[expected_score['Match_ID'].isin(history['Match_ID'])], expected_vaep[expected_vaep['Match_ID'].isin(history['Match_ID'])]).fit(history)
+    
+    # New matches are appended and a corrected match replaces its earlier chains
+    corrected_match_id = history['Match_ID'].iloc[10]
+    corrected_score = expected_score[expected_score['Match_ID'] == corrected_match_id].assign(xScore=lambda data: data['xScore'] + 1)
+    new_score = pd.concat([expected_score[expected_score['Match_ID'].isin(new_matches['Match_ID'])], corrected_score])
+    merger.update_expected_data(expected_score=new_score, expected_vaep=expected_vaep[expected_vaep['Match_ID'].isin(new_matches['Match_ID'])])
+    
+    full_score = pd.concat([expected_score[expected_score['Match_ID'] != corrected_match_id], corrected_score])
+    expected = ExpectedMerger(full_score, expected_vaep).fit(matches).transform(matches)
+    assert merger.expected_score is None and merger.expected_vaep is None
+    pd.testing.assert_frame_equal(merger.transform(matches), expected)
+    pd.testing.assert_frame_equal(merger.fit(matches).transform(matches), expected)
+    pd.testing.assert_frame_equal(clone(merger).fit(matches).transform(matches), expected)
+
+def test_expected_merger_loads_pickles_with_fitted_sums_under_param_names():
+    matches = create_fixture_matches(30)
+    merger = ExpectedMerger(*create_chain_data(matches)).fit(matches)
+    older = ExpectedMerger.__new__(ExpectedMerger)
+    older.__dict__.update({'expected_score': None, 'expected_vaep': None, 'xscore_team_sum': merger.fitted_xscore_team_sum, 'xvaep_team_sum': merger.fitted_xvaep_team_sum})
+    
+    loaded = pickle.loads(pickle.dumps(older))
+    
+    pd.testing.assert_frame_equal(loaded.transform(matches), merger.transform(matches))
+    pd.testing.assert_frame_equal(loaded.fit(matches).transform(matches), merger.transform(matches))
+
+def legacy_reset_squads_index(expected_squads):
+    """Per player concat that reset_squads_index replaced."""
+    
+    return pd.concat([expected_squads[expected_squads['Player'] == player].reset_index(drop=True).reset_index(drop = False).set_index(['Player', 'index']).sort_index() for player in list(expected_squads['Player'].unique())], axis=0)
+
+def test_reset_squads_index_matches_legacy():
+    rng = np.random.default_rng(0)
+    players = np.array([f"Player {i}" for i in range(40)], dtype=object)[rng.integers(0, 40, 500)]
+    players[rng.choice(500, 25, replace=False)] = None
+    expected_squads = pd.DataFrame({'Match_ID': np.arange(500).astype(str), 'Player': players, 'xScore': rng.gamma(1, 1, 500)}, index=rng.permutation(500))
+    
+    reset_squads = SquadPerformanceTransformer.reset_squads_index(expected_squads)
+    
+    pd.testing.assert_frame_equal(reset_squads, legacy_reset_squads_index(expected_squads))
+    assert len(reset_squads) == 475
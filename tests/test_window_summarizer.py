@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from afl_match_outcome_model.data_preparation.pipeline_utils import ema5, ema20, team_performance_cols
+from afl_match_outcome_model.data_preparation.transformers import PastPerformanceTransformer
+from afl_match_outcome_model.data_preparation.window_summarizer import GroupedWindowSummarizer
+from synthetic_data import create_synthetic_matches
+
+lag_feature = {"lag": [1, 3], "mean": [[1, 5]], "std": [[2, 10]], ema5: [[1, 5]], ema20: [[1, 20]]}
+
+def create_team_data(n_rounds=30, teams=("Carlton", "Geelong", "Richmond"), seed=0):
+    """Creates team values indexed by (Team, YearRound), each team missing some rounds."""
+
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product([list(teams), 202100 + np.arange(1, n_rounds + 1)], names=['Team', 'YearRound'])
+    data = pd.DataFrame({'Score': rng.normal(80, 20, len(index)), 'Margin': rng.normal(0, 30, len(index))}, index=index)
+
+    return data[rng.random(len(index)) > 0.2]
+
+def full_recompute(history, X):
+    """Features of X summarised over the whole of history and X, with X taking precedence, without the window state."""
+
+    combined = X.combine_first(history)
+
+    return GroupedWindowSummarizer(lag_feature, ['Score', 'Margin']).fit(combined).transform(combined).loc[X.index]
+
+def create_fixtures(index):
+    return pd.DataFrame({'Score': np.nan, 'Margin': np.nan}, index=pd.MultiIndex.from_tuples(index, names=['Team', 'YearRound']))
+
+def test_fixtures_after_history_use_window_state_and_match_full_recompute():
+    history = create_team_data()
+    # A new team, and a team whose last fitted round is before the others'
+    history = history.drop(index=history.loc['Richmond'].index[-5:].map(lambda year_round: ('Richmond', year_round)))
+    fixtures = create_fixtures([('Carlton', 202131), ('Geelong', 202131), ('Richmond', 202131), ('Brisbane', 202131)])
+    summarizer = GroupedWindowSummarizer(lag_feature, ['Score', 'Margin']).fit(history)
+
+    assert summarizer.is_after_fitted_data(fixtures.index)
+    pd.testing.assert_frame_equal(summarizer.transform(fixtures), full_recompute(history, fixtures), check_exact=True)
+
+@pytest.mark.parametrize("fixture_round", [202130, 202120])
+def test_rows_not_after_last_times_fall_back_to_full_recompute(fixture_round):
+    history = create_team_data()
+    last_round = history.loc['Carlton'].index[-1]
+    # A row at a team's last fitted round rewrites it, an earlier one inserts into its history
+    X = pd.DataFrame({'Score': [100.0, 60.0], 'Margin': [20.0, -20.0]}, index=pd.MultiIndex.from_tuples([('Carlton', min(fixture_round, last_round)), ('Geelong', 202131)], names=['Team', 'YearRound']))
+    summarizer = GroupedWindowSummarizer(lag_feature, ['Score', 'Margin']).fit(history)
+
+    assert not summarizer.is_after_fitted_data(X.index)
+    pd.testing.assert_frame_equal(summarizer.transform(X), full_recompute(history, X), check_exact=True)
+
+def test_past_performance_fixtures_match_full_history():
+    matches = create_synthetic_matches(609)
+    history, fixtures = matches.iloc[:-9], matches.iloc[-9:].copy()
+    fixtures[[col for col in fixtures if 'Score' in col or 'Goals' in col or 'Behinds' in col]] = np.nan
+    window_summarizer_kwargs = {"lag_feature": lag_feature}
+    transformer = PastPerformanceTransformer(team_performance_cols, window_summarizer_kwargs).fit(history)
+
+    expected = PastPerformanceTransformer(team_performance_cols, window_summarizer_kwargs).fit(pd.concat([history, fixtures])).transform(pd.concat([history, fixtures]))
+
+    pd.testing.assert_frame_equal(transformer.transform(fixtures), expected.iloc[-9:].reset_index(drop=True), check_exact=True)